@@ -5,13 +5,30 @@ from config import Config
 from routes.auth import auth_bp
 from routes.user import user_bp
 from routes.admin import admin_bp
+from routes.ops import ops_bp
+from commands import register_commands
+from utils.query_stats import init_query_stats
+from utils.json_provider import init_json_provider
+from utils.compression import init_compression
+from utils.jwt import token_revocation_check
+from services.token_revocation import TokenRevocation
 
 def create_app():
     app = Flask(__name__)
     app.config.from_object(Config)
     
+    # Serialize JSON with orjson when it is installed
+    init_json_provider(app)
+    
     # Initialize database
     init_db(app)
+    init_query_stats(app)
+    
+    # Compress large JSON responses for clients that accept gzip or br
+    init_compression(app)
+    
+    # Reject access tokens of revoked logins (see RefreshToken.revoke_family)
+    token_revocation_check(TokenRevocation.is_revoked)
     
     # Enable CORS
     CORS(app)
@@ -20,6 +37,10 @@ def create_app():
     app.register_blueprint(auth_bp, url_prefix='/api/auth')
     app.register_blueprint(user_bp, url_prefix='/api/user')
     app.register_blueprint(admin_bp, url_prefix='/api/admin')
+    app.register_blueprint(ops_bp)
+    
+    # Register CLI commands
+    register_commands(app)
     
     return app
 
@@ -0,0 +1,71 @@
+"""Per-request authentication overhead of token_required, with and without the verified-token cache.
+
+Run from the backend directory:
+
+    python benchmarks/bench_auth.py [--requests 20000]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask, jsonify
+from config import Config
+from utils.jwt import generate_token, decode_token, verify_token, token_required
+
+def make_app(cache_size):
+    app = Flask(__name__)
+    app.config.from_object(Config)
+    app.config['TOKEN_CACHE_SIZE'] = cache_size
+
+    @app.route('/ping')
+    def ping():
+        return jsonify({'ok': True})
+
+    @app.route('/auth-ping')
+    @token_required
+    def auth_ping():
+        return jsonify({'ok': True})
+
+    return app
+
+def measure(func, count):
+    """Mean microseconds per call"""
+    start = time.perf_counter()
+    for _ in range(count):
+        func()
+    return (time.perf_counter() - start) / count * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=20000)
+    args = parser.parse_args()
+
+    results = []
+    for label, cache_size in (('uncached', 0), ('cached', Config.TOKEN_CACHE_SIZE)):
+        app = make_app(cache_size)
+        client = app.test_client()
+
+        with app.app_context():
+            token = generate_token(1)
+            headers = {'Authorization': f'Bearer {token}'}
+
+            decode_us = measure(lambda: decode_token(token), args.requests)
+            verify_us = measure(lambda: verify_token(token), args.requests)
+
+        # Interleave rounds so drift in the test client cost affects both endpoints alike
+        baseline_us = auth_us = 0.0
+        rounds = 5
+        for _ in range(rounds):
+            baseline_us += measure(lambda: client.get('/ping'), args.requests // 10) / rounds
+            auth_us += measure(lambda: client.get('/auth-ping', headers=headers), args.requests // 10) / rounds
+        results.append((label, decode_us, verify_us, auth_us - baseline_us))
+
+    print(f"{'mode':<10}{'decode_token':>15}{'verify_token':>15}{'request overhead':>20}")
+    for label, decode_us, verify_us, overhead_us in results:
+        print(f"{label:<10}{decode_us:>13.1f}us{verify_us:>13.1f}us{overhead_us:>18.1f}us")
+
+if __name__ == '__main__':
+    main()
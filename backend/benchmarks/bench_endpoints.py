@@ -0,0 +1,52 @@
+"""Upload endpoints end to end through the Flask test client"""
+import io
+import os
+
+import pytest
+
+def _post_file(client, url, path, headers):
+    with open(path, 'rb') as f:
+        data = f.read()
+
+    def post():
+        return client.post(
+            url, data={'file': (io.BytesIO(data), os.path.basename(path))},
+            headers=headers, content_type='multipart/form-data'
+        )
+
+    return post
+
+def _skip_if_too_large(app, path):
+    limit = app.config.get('MAX_CONTENT_LENGTH')
+    if limit and os.path.getsize(path) > limit:
+        pytest.skip(f'{os.path.basename(path)} is larger than MAX_CONTENT_LENGTH')
+
+def test_upload_packing_list(benchmark, app, client, user_headers, price_list_loaded, dataset):
+    path = dataset['packing'][0]
+    _skip_if_too_large(app, path)
+    response = benchmark(_post_file(client, '/api/user/upload/packing-list', path, user_headers))
+    assert response.status_code == 200, response.get_json()
+
+def test_upload_price_list(benchmark, app, client, admin_headers, dataset):
+    path = dataset['price'][0]
+    _skip_if_too_large(app, path)
+    response = benchmark(_post_file(client, '/api/admin/upload/price-list', path, admin_headers))
+    assert response.status_code == 200, response.get_json()
+
+def test_upload_duty_rates(benchmark, app, client, admin_headers, dataset):
+    path = dataset['duty'][0]
+    _skip_if_too_large(app, path)
+    response = benchmark(_post_file(client, '/api/admin/upload/duty-rate', path, admin_headers))
+    assert response.status_code == 200, response.get_json()
+
+@pytest.fixture(scope='module')
+def uploaded_id(app, client, user_headers, price_list_loaded, dataset):
+    path = dataset['packing'][0]
+    _skip_if_too_large(app, path)
+    return _post_file(client, '/api/user/upload/packing-list', path, user_headers)().get_json()['upload_id']
+
+@pytest.mark.parametrize('encoding', ['identity', 'gzip'])
+def test_upload_details(benchmark, client, user_headers, uploaded_id, encoding):
+    headers = {**user_headers, 'Accept-Encoding': encoding}
+    response = benchmark(client.get, f'/api/user/upload/{uploaded_id}', headers=headers)
+    assert response.status_code == 200
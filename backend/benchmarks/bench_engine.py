@@ -0,0 +1,136 @@
+"""Concurrent upload, review and listing traffic under each database engine profile.
+
+Each round starts a fresh app and database, then runs uploader, reviewer and reader threads
+through the test client. Server errors (e.g. "database is locked") and reviews lost to the
+other reviewer are reported in extra_info.
+Run from the backend directory:
+
+    python -m pytest benchmarks/bench_engine.py
+    BENCH_POSTGRES_URL=postgresql://localhost/bench python -m pytest benchmarks/bench_engine.py
+"""
+import io
+import os
+import threading
+import time
+
+import pytest
+
+from create_sample_files import generate_packing_list, generate_price_list
+
+UPLOADERS = int(os.environ.get('BENCH_ENGINE_UPLOADERS', 4))
+UPLOADS_PER_THREAD = int(os.environ.get('BENCH_ENGINE_UPLOADS', 10))
+REVIEWERS = 2
+READERS = 4
+POSTGRES_URL = os.environ.get('BENCH_POSTGRES_URL')
+
+CASES = [('sqlite', 'none'), ('sqlite', 'sqlite')]
+if POSTGRES_URL:
+    CASES += [('postgresql', 'none'), ('postgresql', 'postgresql')]
+
+@pytest.fixture(scope='module')
+def traffic_files(tmp_path_factory):
+    directory = tmp_path_factory.mktemp('engine')
+    files = {'price': str(directory / 'price.xlsx'), 'packing': str(directory / 'packing.xlsx')}
+    generate_price_list(files['price'], 500)
+    generate_packing_list(files['packing'], 100, catalogue_size=500, mismatch_rate=0.2)
+    return {kind: open(path, 'rb').read() for kind, path in files.items()}
+
+def _make_app(monkeypatch, tmp_path, database, profile, files):
+    from config import Config
+    from app import create_app
+    from database import db
+    from models.user import User
+    from utils.jwt import generate_token
+
+    url = f"sqlite:///{tmp_path / f'{profile}-{os.urandom(4).hex()}.db'}" if database == 'sqlite' else POSTGRES_URL
+    monkeypatch.setattr(Config, 'SQLALCHEMY_DATABASE_URI', url)
+    monkeypatch.setattr(Config, 'DB_ENGINE_PROFILE', profile)
+    app = create_app()
+    app.testing = True
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        admin = User(username='engine-admin', is_admin=True)
+        user = User(username='engine-user')
+        for account in (admin, user):
+            account.set_password('bench-password')
+            db.session.add(account)
+        db.session.commit()
+        headers = {
+            'admin': {'Authorization': f'Bearer {generate_token(admin.id, True)}'},
+            'user': {'Authorization': f'Bearer {generate_token(user.id)}'}
+        }
+
+    client = app.test_client()
+    client.post('/api/admin/upload/price-list', data={'file': (io.BytesIO(files['price']), 'price.xlsx')},
+                headers=headers['admin'], content_type='multipart/form-data')
+    return app, client, headers
+
+def _run_traffic(client, headers, files):
+    counts = {'uploads': 0, 'reviews': 0, 'reads': 0, 'conflicts': 0, 'errors': 0}
+    lock = threading.Lock()
+    uploads_done = threading.Event()
+
+    def count(response, key):
+        with lock:
+            if response.status_code >= 500:
+                key = 'errors'
+            elif response.status_code >= 400:
+                key = 'conflicts'  # Already reviewed by the other reviewer
+            counts[key] += 1
+
+    def uploader():
+        for _ in range(UPLOADS_PER_THREAD):
+            count(client.post(
+                '/api/user/upload/packing-list', data={'file': (io.BytesIO(files['packing']), 'packing.xlsx')},
+                headers=headers['user'], content_type='multipart/form-data'
+            ), 'uploads')
+
+    def reviewer(offset):
+        while not uploads_done.is_set():
+            response = client.get('/api/admin/uploads?status=pending&per_page=10', headers=headers['admin'])
+            count(response, 'reads')
+            pending = response.get_json().get('uploads', []) if response.status_code == 200 else []
+            for upload in pending[offset::REVIEWERS]:
+                count(client.post(f"/api/admin/review/{upload['id']}", json={'action': 'approve'},
+                                  headers=headers['admin']), 'reviews')
+
+    def reader():
+        while not uploads_done.is_set():
+            count(client.get('/api/user/uploads', headers=headers['user']), 'reads')
+            count(client.get('/api/admin/stats', headers=headers['admin']), 'reads')
+
+    background = [threading.Thread(target=reviewer, args=(i,)) for i in range(REVIEWERS)]
+    background += [threading.Thread(target=reader) for _ in range(READERS)]
+    uploading = [threading.Thread(target=uploader) for _ in range(UPLOADERS)]
+    start = time.perf_counter()
+    for thread in background + uploading:
+        thread.start()
+    for thread in uploading:
+        thread.join()
+    uploads_done.set()
+    for thread in background:
+        thread.join()
+    counts['seconds'] = time.perf_counter() - start
+    return counts
+
+@pytest.mark.parametrize('database,profile', CASES)
+def test_concurrent_traffic(benchmark, monkeypatch, tmp_path, traffic_files, database, profile):
+    def setup():
+        _, client, headers = _make_app(monkeypatch, tmp_path, database, profile, traffic_files)
+        return (client, headers), {}
+
+    results = []
+
+    def run(client, headers):
+        results.append(_run_traffic(client, headers, traffic_files))
+
+    benchmark.pedantic(run, setup=setup, rounds=3)
+    benchmark.extra_info.update({'database': database, 'profile': profile})
+    for key in ('uploads', 'reviews', 'reads', 'conflicts', 'errors'):
+        benchmark.extra_info[key] = sum(result[key] for result in results)
+    # Uploads bound the round time, so read throughput shows reader/writer contention best
+    benchmark.extra_info['reads_per_s'] = round(
+        benchmark.extra_info['reads'] / sum(result['seconds'] for result in results), 1
+    )
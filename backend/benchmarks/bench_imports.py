@@ -0,0 +1,20 @@
+"""Bulk price list and duty table updates, measured against already loaded tables"""
+import pytest
+
+from services.file_parser import FileParser
+from models.price import PriceList
+from models.duty import DutyRate
+
+@pytest.fixture(scope='module')
+def price_data(dataset):
+    return FileParser.parse_price_list(dataset['price'][0])['price_data']
+
+@pytest.fixture(scope='module')
+def rate_data(dataset):
+    return FileParser.parse_duty_rates(dataset['duty'][0])['rate_data']
+
+def test_update_prices(benchmark, app_context, price_data):
+    assert benchmark(PriceList.update_prices, price_data) == len(price_data)
+
+def test_update_rates(benchmark, app_context, rate_data):
+    assert benchmark(DutyRate.update_rates, rate_data) == len(rate_data)
@@ -0,0 +1,44 @@
+"""Stored item formats: JSON text against ItemCodec's packed columns, for size and decode speed"""
+import pytest
+
+from services.file_parser import FileParser
+from services.item_codec import ItemCodec
+from services.auto_approver import AutoApprover
+from services.price_matcher import PriceMatcher
+from utils.json_provider import dumps, loads
+
+pytestmark = pytest.mark.skipif(not ItemCodec.available(), reason='needs msgpack and zstandard')
+
+@pytest.fixture(scope='module')
+def validated_items(app, price_list_loaded, dataset):
+    with app.app_context():
+        items = FileParser.parse_packing_list(dataset['packing'][0])['items']
+        return PriceMatcher.validate_items(items)['items']
+
+@pytest.fixture(scope='module')
+def stored(validated_items):
+    return {'json': dumps(validated_items).encode('utf-8'), 'packed': ItemCodec.encode(validated_items)}
+
+def _record_sizes(benchmark, stored):
+    benchmark.extra_info['json_bytes'] = len(stored['json'])
+    benchmark.extra_info['packed_bytes'] = len(stored['packed'])
+    benchmark.extra_info['ratio'] = round(len(stored['json']) / len(stored['packed']), 2)
+
+def test_encode_json(benchmark, validated_items):
+    benchmark(dumps, validated_items)
+
+def test_encode_packed(benchmark, validated_items):
+    benchmark(ItemCodec.encode, validated_items)
+
+def test_decode_json(benchmark, stored, validated_items):
+    _record_sizes(benchmark, stored)
+    assert benchmark(loads, stored['json']) == validated_items
+
+def test_decode_packed(benchmark, stored, validated_items):
+    _record_sizes(benchmark, stored)
+    assert benchmark(ItemCodec.decode, stored['packed']) == validated_items
+
+def test_decode_packed_fields(benchmark, stored):
+    """The columns the auto-approver reads"""
+    items = benchmark(ItemCodec.decode, stored['packed'], AutoApprover.ITEM_FIELDS)
+    assert set(items[0]) == set(AutoApprover.ITEM_FIELDS)
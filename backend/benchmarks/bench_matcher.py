@@ -0,0 +1,13 @@
+"""PriceMatcher.validate_items against an imported price list"""
+import pytest
+
+from services.file_parser import FileParser
+from services.price_matcher import PriceMatcher
+
+@pytest.fixture(scope='module')
+def parsed_items(dataset):
+    return FileParser.parse_packing_list(dataset['packing'][0])['items']
+
+def test_validate_items(benchmark, app_context, price_list_loaded, parsed_items, dataset):
+    result = benchmark(PriceMatcher.validate_items, parsed_items)
+    assert result['summary']['total_items'] == dataset['packing'][1]['rows']
@@ -0,0 +1,17 @@
+"""FileParser throughput on the generated spreadsheets"""
+from services.file_parser import FileParser
+
+def test_parse_packing_list(benchmark, dataset):
+    path, stats = dataset['packing']
+    result = benchmark(FileParser.parse_packing_list, path)
+    assert result['total_items'] == stats['rows']
+
+def test_parse_price_list(benchmark, dataset):
+    path, stats = dataset['price']
+    result = benchmark(FileParser.parse_price_list, path)
+    assert result['total_items'] == stats['rows']
+
+def test_parse_duty_rates(benchmark, dataset):
+    path, stats = dataset['duty']
+    result = benchmark(FileParser.parse_duty_rates, path)
+    assert result['total_items'] == stats['rows']
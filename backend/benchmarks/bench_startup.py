@@ -0,0 +1,78 @@
+"""Cold start of create_app(), and a budget keeping the data stack out of it.
+
+Each measurement runs in a fresh interpreter. Run from the backend directory:
+
+    python benchmarks/bench_startup.py [--runs 10] [--top 15]
+    python -m pytest benchmarks/bench_startup.py  # Budget checks, CREATE_APP_BUDGET_MS (default 1000)
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Loaded on first parse, export or S3 access; never needed to serve auth or list endpoints
+HEAVY_MODULES = ('pandas', 'numpy', 'openpyxl', 'boto3', 'botocore')
+CREATE_APP_BUDGET_MS = float(os.environ.get('CREATE_APP_BUDGET_MS', 1000))
+
+_PROBE = '''
+import json, sys, time
+start = time.perf_counter()
+from app import create_app
+imported = time.perf_counter()
+create_app()
+done = time.perf_counter()
+print(json.dumps({
+    'import_ms': (imported - start) * 1000,
+    'create_app_ms': (done - imported) * 1000,
+    'total_ms': (done - start) * 1000,
+    'heavy_modules': sorted(m for m in sys.argv[1:] if m in sys.modules)
+}))
+'''
+
+def cold_start(importtime=False):
+    """Time importing app and calling create_app() in a new interpreter"""
+    command = [sys.executable] + (['-X', 'importtime'] if importtime else []) + ['-c', _PROBE, *HEAVY_MODULES]
+    result = subprocess.run(command, cwd=BACKEND_DIR, capture_output=True, text=True, check=True)
+    return json.loads(result.stdout), result.stderr
+
+def slowest_imports(importtime_log, top):
+    """Modules with the largest cumulative import time from a -X importtime log"""
+    entries = []
+    for line in importtime_log.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        entries.append((int(cumulative), name.rstrip()))
+    return sorted(entries, reverse=True)[:top]
+
+def test_create_app_skips_heavy_modules():
+    stats, _ = cold_start()
+    assert stats['heavy_modules'] == [], f"create_app() imported {', '.join(stats['heavy_modules'])}"
+
+def test_create_app_cold_start_budget(benchmark):
+    runs = benchmark.pedantic(lambda: cold_start()[0], rounds=5, iterations=1)
+    assert runs['total_ms'] < CREATE_APP_BUDGET_MS, f"create_app() cold start took {runs['total_ms']:.0f} ms"
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--top', type=int, default=15, help='Slowest imports to list')
+    args = parser.parse_args()
+
+    runs = [cold_start()[0] for _ in range(args.runs)]
+    for key in ('import_ms', 'create_app_ms', 'total_ms'):
+        values = [run[key] for run in runs]
+        print(f'{key:<14} median {statistics.median(values):8.1f}  min {min(values):8.1f}  max {max(values):8.1f}')
+    print(f"heavy modules loaded: {', '.join(runs[-1]['heavy_modules']) or 'none'}")
+
+    _, log = cold_start(importtime=True)
+    print('\nslowest imports (cumulative ms):')
+    for cumulative, name in slowest_imports(log, args.top):
+        print(f'{cumulative / 1000:10.1f}  {name}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""Fixtures for the pytest-benchmark suite: a throwaway app and generated spreadsheets.
+
+Sizes and data come from the environment so the same suite runs from 1k to 1M rows:
+
+    BENCH_ROWS            packing list lines (default 5000)
+    BENCH_CATALOGUE_SIZE  price list and duty table rows (default BENCH_ROWS)
+    BENCH_SEED            generator seed (default 0)
+"""
+import os
+import sys
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.dirname(BACKEND_DIR))  # create_sample_files.py lives in the repository root
+
+from create_sample_files import generate_all
+
+BENCH_ROWS = int(os.environ.get('BENCH_ROWS', 5000))
+BENCH_CATALOGUE_SIZE = int(os.environ.get('BENCH_CATALOGUE_SIZE', BENCH_ROWS))
+BENCH_SEED = int(os.environ.get('BENCH_SEED', 0))
+
+def pytest_benchmark_update_json(config, benchmarks, output_json):
+    """Record the data set with the results so runs are only compared like for like"""
+    output_json['dataset'] = {
+        'rows': BENCH_ROWS,
+        'catalogue_size': BENCH_CATALOGUE_SIZE,
+        'seed': BENCH_SEED
+    }
+
+@pytest.fixture(scope='session')
+def dataset(tmp_path_factory):
+    """Paths and generator stats of the packing list, price list and duty table"""
+    return generate_all(
+        str(tmp_path_factory.mktemp('data')), BENCH_ROWS, BENCH_SEED, BENCH_CATALOGUE_SIZE,
+        mismatch_rate=0.05, missing_rate=0.01, bad_cell_rate=0.001
+    )
+
+@pytest.fixture(scope='session')
+def app(tmp_path_factory):
+    from config import Config
+
+    workdir = tmp_path_factory.mktemp('app')
+    Config.SQLALCHEMY_DATABASE_URI = f"sqlite:///{workdir / 'bench.db'}"
+    Config.UPLOAD_FOLDER = str(workdir / 'uploads')
+    Config.SLOW_REQUEST_MS = 0
+    Config.SLOW_REQUEST_QUERIES = 0
+
+    from app import create_app
+    from database import db
+    from models.user import User
+
+    app = create_app()
+    app.testing = True
+    with app.app_context():
+        db.create_all()
+        for username, is_admin in (('bench-admin', True), ('bench-user', False)):
+            user = User(username=username, is_admin=is_admin)
+            user.set_password('bench-password')
+            db.session.add(user)
+        db.session.commit()
+    return app
+
+@pytest.fixture
+def app_context(app):
+    with app.app_context():
+        yield
+
+@pytest.fixture(scope='session')
+def client(app):
+    return app.test_client()
+
+def _auth_headers(client, username):
+    response = client.post('/api/auth/login', json={'username': username, 'password': 'bench-password'})
+    return {'Authorization': f"Bearer {response.get_json()['token']}"}
+
+@pytest.fixture(scope='session')
+def admin_headers(client):
+    return _auth_headers(client, 'bench-admin')
+
+@pytest.fixture(scope='session')
+def user_headers(client):
+    return _auth_headers(client, 'bench-user')
+
+@pytest.fixture(scope='session')
+def price_list_loaded(app, dataset):
+    """Import the generated price list once so validation finds catalogue prices"""
+    from services.file_parser import FileParser
+    from models.price import PriceList
+
+    with app.app_context():
+        PriceList.update_prices(FileParser.parse_price_list(dataset['price'][0])['price_data'])
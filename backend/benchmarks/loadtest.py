@@ -0,0 +1,305 @@
+"""HTTP load test of the upload and review API with a mixed user and admin workload.
+
+Users upload packing lists and poll their uploads while admins poll stats and listings,
+review pending uploads and occasionally import the price list. Tokens are minted locally
+with the server's JWT_SECRET_KEY for accounts created directly in its database.
+
+Run from the backend directory, against a running server sharing DATABASE_URL and JWT_SECRET_KEY:
+
+    python benchmarks/loadtest.py --base-url http://127.0.0.1:5000 --users 50 --admins 2 --duration 60
+
+or let the harness start a local threaded server on a given database:
+
+    python benchmarks/loadtest.py --serve --database-url sqlite:////tmp/loadtest.db
+    python benchmarks/loadtest.py --serve --database-url postgresql://localhost/packing_list_load
+"""
+import argparse
+import json
+import os
+import queue
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+
+import requests
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.dirname(BACKEND_DIR))
+
+from create_sample_files import generate_packing_list, generate_price_list
+
+USER_MIX = {'upload': 1, 'list': 4, 'detail': 4}
+ADMIN_MIX = {'stats': 3, 'admin_list': 3, 'review': 2, 'price_import': 0.05}
+PERCENTILES = (50, 90, 95, 99)
+
+class Recorder:
+    """Latencies and outcomes per operation, shared by all virtual users"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+
+    def record(self, operation, status, seconds):
+        with self.lock:
+            self.latencies[operation].append(seconds)
+            self.statuses[operation][status] += 1
+            if not isinstance(status, int) or status >= 400:
+                self.errors[operation] += 1
+
+    @staticmethod
+    def percentile(values, pct):
+        """Nearest-rank percentile of sorted values"""
+        if not values:
+            return None
+        rank = max(1, -(-pct * len(values) // 100))
+        return values[int(rank) - 1]
+
+    def report(self, elapsed):
+        operations = {}
+        for operation, values in sorted(self.latencies.items()):
+            values = sorted(values)
+            operations[operation] = {
+                'requests': len(values),
+                'errors': self.errors[operation],
+                'error_rate': round(self.errors[operation] / len(values), 4),
+                'throughput_rps': round(len(values) / elapsed, 2),
+                **{f'p{pct}_ms': round(self.percentile(values, pct) * 1000, 1) for pct in PERCENTILES},
+                'max_ms': round(values[-1] * 1000, 1),
+                'statuses': {str(status): count for status, count in self.statuses[operation].items()}
+            }
+
+        everything = sorted(value for values in self.latencies.values() for value in values)
+        total_errors = sum(self.errors.values())
+        overall = {
+            'requests': len(everything),
+            'errors': total_errors,
+            'error_rate': round(total_errors / len(everything), 4) if everything else 0,
+            'throughput_rps': round(len(everything) / elapsed, 2),
+            **{f'p{pct}_ms': round((self.percentile(everything, pct) or 0) * 1000, 1) for pct in PERCENTILES}
+        }
+        return {'duration_s': round(elapsed, 1), 'overall': overall, 'operations': operations}
+
+class VirtualUser(threading.Thread):
+    """One user or admin issuing weighted random requests until the deadline"""
+
+    def __init__(self, args, token, mix, files, pending, recorder, deadline, seed):
+        super().__init__(daemon=True)
+        self.base_url = args.base_url.rstrip('/')
+        self.think = args.think
+        self.session = requests.Session()
+        self.session.headers['Authorization'] = f'Bearer {token}'
+        self.operations = list(mix)
+        self.weights = [mix[operation] for operation in self.operations]
+        self.files = files
+        self.pending = pending
+        self.recorder = recorder
+        self.deadline = deadline
+        self.rng = random.Random(seed)
+        self.upload_ids = []
+
+    def request(self, operation, method, path, **kwargs):
+        start = time.perf_counter()
+        try:
+            response = self.session.request(method, self.base_url + path, timeout=120, **kwargs)
+            status = response.status_code
+        except requests.RequestException as e:
+            response, status = None, type(e).__name__
+        self.recorder.record(operation, status, time.perf_counter() - start)
+        return response
+
+    def upload(self):
+        with open(self.files['packing'], 'rb') as f:
+            response = self.request('upload', 'POST', '/api/user/upload/packing-list',
+                                    files={'file': ('packing_list.xlsx', f)})
+        if response is not None and response.status_code == 200:
+            data = response.json()
+            self.upload_ids.append(data['upload_id'])
+            if data['status'] == 'pending':
+                self.pending.put(data['upload_id'])
+
+    def list(self):
+        self.request('list', 'GET', '/api/user/uploads')
+
+    def detail(self):
+        if not self.upload_ids:
+            return self.upload()
+        self.request('detail', 'GET', f'/api/user/upload/{self.rng.choice(self.upload_ids)}')
+
+    def stats(self):
+        self.request('stats', 'GET', '/api/admin/stats')
+
+    def admin_list(self):
+        self.request('admin_list', 'GET', '/api/admin/uploads', params={'status': 'pending'})
+
+    def review(self):
+        try:
+            upload_id = self.pending.get_nowait()
+        except queue.Empty:
+            return self.admin_list()
+        action = self.rng.choice(('approve', 'reject'))
+        self.request('review', 'POST', f'/api/admin/review/{upload_id}',
+                     json={'action': action, 'comment': 'load test'})
+
+    def price_import(self):
+        with open(self.files['price'], 'rb') as f:
+            self.request('price_import', 'POST', '/api/admin/upload/price-list',
+                         files={'file': ('price_list.xlsx', f)})
+
+    def run(self):
+        while time.monotonic() < self.deadline:
+            getattr(self, self.rng.choices(self.operations, self.weights)[0])()
+            if self.think:
+                time.sleep(self.rng.uniform(0, 2 * self.think))
+
+def parse_mix(text, default):
+    """'upload=1,list=4' on top of the default mix"""
+    mix = dict(default)
+    for entry in filter(None, (text or '').split(',')):
+        operation, weight = entry.split('=')
+        if operation not in default:
+            raise SystemExit(f'Unknown operation {operation!r}; choose from {", ".join(default)}')
+        mix[operation] = float(weight)
+    return {operation: weight for operation, weight in mix.items() if weight > 0}
+
+def prepare_accounts(users, admins):
+    """Create the load test accounts if needed and mint a token for each"""
+    from app import create_app
+    from database import db
+    from models.user import User
+    from utils.jwt import generate_token
+
+    app = create_app()
+    tokens = {'users': [], 'admins': []}
+    with app.app_context():
+        db.create_all()
+        for role, count in (('users', users), ('admins', admins)):
+            for i in range(count):
+                username = f'loadtest-{role[:-1]}-{i}'
+                user = User.query.filter_by(username=username).first()
+                if user is None:
+                    user = User(username=username, is_admin=role == 'admins')
+                    user.set_password(os.urandom(16).hex())
+                    db.session.add(user)
+                    db.session.flush()
+                tokens[role].append(generate_token(user.id, user.is_admin))
+        db.session.commit()
+    return tokens
+
+def start_server(args):
+    """Run the app with the threaded development server in a subprocess"""
+    port = int(args.base_url.rsplit(':', 1)[1].split('/')[0])
+    workdir = tempfile.mkdtemp(prefix='loadtest-')  # UPLOAD_FOLDER is relative to the working directory
+    server = subprocess.Popen(
+        [sys.executable, '-c',
+         'import sys; sys.path.insert(0, sys.argv[1]); from app import create_app; '
+         'create_app().run(port=int(sys.argv[2]), threaded=True)', BACKEND_DIR, str(port)],
+        cwd=workdir, env=os.environ.copy(), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    for _ in range(100):
+        try:
+            requests.get(args.base_url, timeout=1)
+            return server
+        except requests.ConnectionError:
+            time.sleep(0.1)
+    server.terminate()
+    raise SystemExit('Server did not start')
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--base-url', default='http://127.0.0.1:5000')
+    parser.add_argument('--database-url', help='Database of the server (default: DATABASE_URL or the app default)')
+    parser.add_argument('--serve', action='store_true', help='Start a local threaded server for the run')
+    parser.add_argument('--engine-profile', choices=['auto', 'sqlite', 'postgresql', 'none'],
+                        help='DB_ENGINE_PROFILE of the server started with --serve')
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--admins', type=int, default=2)
+    parser.add_argument('--duration', type=float, default=60, help='Seconds')
+    parser.add_argument('--think', type=float, default=0.5, help='Mean seconds between requests of one virtual user')
+    parser.add_argument('--user-mix', help=f'Weights, e.g. upload=2,list=4 (default: {USER_MIX})')
+    parser.add_argument('--admin-mix', help=f'Weights (default: {ADMIN_MIX})')
+    parser.add_argument('--upload-rows', type=int, default=200)
+    parser.add_argument('--catalogue-size', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', help='Also write the report to this file')
+    args = parser.parse_args()
+
+    if args.database_url:
+        os.environ['DATABASE_URL'] = args.database_url
+    if args.engine_profile:
+        os.environ['DB_ENGINE_PROFILE'] = args.engine_profile
+    user_mix = parse_mix(args.user_mix, USER_MIX)
+    admin_mix = parse_mix(args.admin_mix, ADMIN_MIX)
+
+    datadir = tempfile.mkdtemp(prefix='loadtest-data-')
+    files = {
+        'packing': os.path.join(datadir, 'packing_list.xlsx'),
+        'price': os.path.join(datadir, 'price_list.xlsx')
+    }
+    generate_price_list(files['price'], args.catalogue_size, args.seed)
+    generate_packing_list(files['packing'], args.upload_rows, args.seed, args.catalogue_size,
+                          mismatch_rate=0.02, missing_rate=0.01)
+
+    tokens = prepare_accounts(args.users, args.admins)
+    server = start_server(args) if args.serve else None
+    try:
+        # Load the catalogue so uploads are validated against real prices
+        with open(files['price'], 'rb') as f:
+            response = requests.post(
+                args.base_url.rstrip('/') + '/api/admin/upload/price-list', files={'file': ('price_list.xlsx', f)},
+                headers={'Authorization': f"Bearer {tokens['admins'][0]}"}, timeout=300
+            ) if tokens['admins'] else None
+        if response is not None and response.status_code != 200:
+            raise SystemExit(f'Price list import failed: {response.status_code} {response.text}')
+
+        recorder = Recorder()
+        pending = queue.Queue()
+        deadline = time.monotonic() + args.duration
+        workers = [
+            VirtualUser(args, token, user_mix, files, pending, recorder, deadline, f'{args.seed}:user:{i}')
+            for i, token in enumerate(tokens['users'])
+        ] + [
+            VirtualUser(args, token, admin_mix, files, pending, recorder, deadline, f'{args.seed}:admin:{i}')
+            for i, token in enumerate(tokens['admins'])
+        ]
+        start = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        report = recorder.report(time.perf_counter() - start)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    from config import Config
+    report['config'] = {
+        'database': Config.SQLALCHEMY_DATABASE_URI.split(':', 1)[0],
+        'engine_profile': Config.DB_ENGINE_PROFILE,
+        'users': args.users,
+        'admins': args.admins,
+        'think_s': args.think,
+        'upload_rows': args.upload_rows,
+        'catalogue_size': args.catalogue_size,
+        'user_mix': user_mix,
+        'admin_mix': admin_mix
+    }
+
+    print(f"{'operation':<14}{'requests':>9}{'errors':>8}{'rps':>9}" + ''.join(f'{f"p{p} ms":>10}' for p in PERCENTILES))
+    for name, row in list(report['operations'].items()) + [('overall', report['overall'])]:
+        print(f"{name:<14}{row['requests']:>9}{row['errors']:>8}{row['throughput_rps']:>9}"
+              + ''.join(f"{row[f'p{p}_ms']:>10}" for p in PERCENTILES))
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == '__main__':
+    main()
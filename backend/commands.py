@@ -0,0 +1,114 @@
+import click
+import time
+from flask import current_app
+from database import db
+from models.upload import UploadRecord
+from services.auto_approver import AutoApprover
+from services.item_codec import ItemCodec
+from services.upload_gc import UploadGarbageCollector
+from utils.json_provider import loads
+
+def register_commands(app):
+    """Register maintenance CLI commands with the Flask app"""
+    
+    @app.cli.command('auto-approve')
+    @click.option('--max-pct', type=float, default=None, help='Maximum price difference (%) per mismatched line.')
+    @click.option('--allow-not-found', is_flag=True, default=None, help='Approve uploads with unknown item codes.')
+    @click.option('--batch-size', type=int, default=None, help='Pending uploads loaded per batch.')
+    @click.option('--max-batches', type=int, default=None, help='Stop after this many batches.')
+    @click.option('--interval', type=int, default=0, help='Repeat every N seconds (0 runs once).')
+    @click.option('--dry-run', is_flag=True, help='Report eligible uploads without approving them.')
+    def auto_approve(max_pct, allow_not_found, batch_size, max_batches, interval, dry_run):
+        """Approve pending uploads whose mismatches are all within the configured percentage"""
+        config = current_app.config
+        max_pct = max_pct if max_pct is not None else config['AUTO_APPROVE_MAX_MISMATCH_PCT']
+        if max_pct <= 0:
+            raise click.UsageError('Auto-approval is disabled; set AUTO_APPROVE_MAX_MISMATCH_PCT or pass --max-pct')
+        
+        while True:
+            result = AutoApprover.sweep(
+                max_pct,
+                allow_not_found=allow_not_found if allow_not_found is not None else config['AUTO_APPROVE_ALLOW_NOT_FOUND'],
+                batch_size=batch_size or config['AUTO_APPROVE_BATCH_SIZE'],
+                max_batches=max_batches,
+                dry_run=dry_run
+            )
+            click.echo(
+                f"Scanned {result['scanned']} pending uploads in {result['batches']} batches, "
+                f"{'would approve' if dry_run else 'approved'} {result['approved']}"
+            )
+            
+            if interval <= 0:
+                break
+            time.sleep(interval)
+    
+    @app.cli.command('gc-uploads')
+    @click.option('--dry-run', is_flag=True, help='Report what would be deleted without deleting.')
+    @click.option('--batch-size', type=int, default=None, help='Deletions per batch before pausing.')
+    @click.option('--batch-pause', type=float, default=None, help='Seconds to sleep between batches.')
+    @click.option('--min-age', type=int, default=None, help='Seconds before an unreferenced file counts as orphaned.')
+    @click.option('--interval', type=int, default=0, help='Repeat every N seconds (0 runs once).')
+    def gc_uploads(dry_run, batch_size, batch_pause, min_age, interval):
+        """Delete orphaned files and originals past their retention period"""
+        while True:
+            report = UploadGarbageCollector(
+                dry_run=dry_run,
+                batch_size=batch_size,
+                batch_pause=batch_pause,
+                min_age=min_age
+            ).run()
+            click.echo(
+                f"Scanned {report['scanned']} files, {'would delete' if dry_run else 'deleted'} "
+                f"{report['deleted_files']} ({report['deleted_bytes']} bytes) {report['by_kind']}, "
+                f"released originals of {report['expired_uploads']} expired uploads"
+            )
+            
+            if interval <= 0:
+                break
+            time.sleep(interval)
+    
+    @app.cli.command('compact-items')
+    @click.option('--batch-size', type=int, default=200, help='Uploads converted per commit.')
+    @click.option('--dry-run', is_flag=True, help='Report the size reduction without rewriting rows.')
+    def compact_items(batch_size, dry_run):
+        """Convert items stored as JSON text to the packed format"""
+        if not ItemCodec.available():
+            raise click.UsageError('The packed format needs msgpack and zstandard installed')
+        
+        converted = skipped = json_bytes = packed_bytes = 0
+        last_id = 0
+        while True:
+            batch = UploadRecord.query.filter(
+                UploadRecord.items.isnot(None),
+                UploadRecord.items_packed.is_(None),
+                UploadRecord.id > last_id
+            ).order_by(UploadRecord.id).limit(batch_size).all()
+            if not batch:
+                break
+            
+            last_id = batch[-1].id
+            for upload in batch:
+                try:
+                    packed = ItemCodec.encode(loads(upload.items))
+                except (TypeError, ValueError, OverflowError) as e:
+                    # Same values set_items keeps as JSON, e.g. integers beyond 64 bits
+                    click.echo(f'Skipping upload {upload.id}: items cannot be packed ({e})', err=True)
+                    skipped += 1
+                    continue
+                json_bytes += len(upload.items.encode('utf-8'))
+                packed_bytes += len(packed)
+                converted += 1
+                if not dry_run:
+                    upload.items_packed = packed
+                    upload.items = None
+            
+            if not dry_run:
+                db.session.commit()
+            db.session.expunge_all()
+        
+        ratio = f'{json_bytes / packed_bytes:.1f}x smaller' if packed_bytes else 'nothing to do'
+        click.echo(
+            f"{'Would convert' if dry_run else 'Converted'} {converted} uploads: "
+            f"{json_bytes} bytes of JSON to {packed_bytes} bytes packed ({ratio})"
+            + (f', skipped {skipped} that must stay JSON' if skipped else '')
+        )
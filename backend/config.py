@@ -1,10 +1,110 @@
 import os
+import tempfile
 
 class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'dev-secret-key-change-in-production'
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///packing_list.db'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    
+    # Engine tuning applied in init_db: 'auto' picks 'sqlite' or 'postgresql' from DATABASE_URL, 'none' uses library defaults
+    DB_ENGINE_PROFILE = os.environ.get('DB_ENGINE_PROFILE', 'auto')
+    SQLITE_SYNCHRONOUS = os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL')
+    SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000))  # Wait for the write lock instead of failing at once
+    SQLITE_CACHE_SIZE_KB = int(os.environ.get('SQLITE_CACHE_SIZE_KB', 64 * 1024))  # Page cache per connection
+    SQLITE_MMAP_SIZE = int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 5))  # Per worker process; keep workers * (size + overflow) below max_connections
+    DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 10))
+    DB_POOL_TIMEOUT = int(os.environ.get('DB_POOL_TIMEOUT', 30))  # Seconds to wait for a free connection
+    DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', 1800))  # Reconnect before proxies or the server drop idle connections
+    DB_POOL_PRE_PING = os.environ.get('DB_POOL_PRE_PING', 'true').lower() == 'true'
+    DB_STATEMENT_TIMEOUT_MS = int(os.environ.get('DB_STATEMENT_TIMEOUT_MS', 30000))  # 0 disables
+    
+    # Read replica for routes marked @use_replica (listings, stats, price searches); all writes use the primary
+    SQLALCHEMY_BINDS = {'replica': os.environ['REPLICA_DATABASE_URL']} if os.environ.get('REPLICA_DATABASE_URL') else {}
+    REPLICA_STICKY_SECONDS = float(os.environ.get('REPLICA_STICKY_SECONDS', 5))  # Reads stay on the primary this long after a client's own writes; keep above replication lag
+    
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY') or 'jwt-secret-string'
     JWT_ACCESS_TOKEN_EXPIRES = 3600  # 1 hour
+    REFRESH_TOKEN_EXPIRES = int(os.environ.get('REFRESH_TOKEN_EXPIRES', 30 * 24 * 3600))  # 30 days
+    REFRESH_TOKEN_REUSE_GRACE = int(os.environ.get('REFRESH_TOKEN_REUSE_GRACE', 10))  # Seconds in which a repeated refresh is a retry, not theft
+    PASSWORD_CHECK_WORKERS = int(os.environ.get('PASSWORD_CHECK_WORKERS', 2))  # Concurrent password hash checks per process
+    PASSWORD_CHECK_QUEUE = int(os.environ.get('PASSWORD_CHECK_QUEUE', 8))  # Logins allowed to wait; further ones get 503
+    PASSWORD_CHECK_RETRY_AFTER = int(os.environ.get('PASSWORD_CHECK_RETRY_AFTER', 2))
+    TOKEN_CACHE_SIZE = int(os.environ.get('TOKEN_CACHE_SIZE', 10000))  # Verified tokens kept per process; 0 disables
+    TOKEN_CACHE_TTL = int(os.environ.get('TOKEN_CACHE_TTL', 300))  # Seconds before a cached token is verified again
+    TOKEN_REVOCATION_CHECK_INTERVAL = int(os.environ.get('TOKEN_REVOCATION_CHECK_INTERVAL', 30))  # Seconds before other processes reject the access tokens of a revoked login
+    
+    # Admission control for spreadsheet parsing, in bytes of sheet data (uncompressed XML for xlsx).
+    # The budget is shared by all worker processes of a host; parses beyond it queue, then get 429.
+    ADMISSION_CONTROL = os.environ.get('ADMISSION_CONTROL', 'true').lower() == 'true'
+    ADMISSION_MAX_BYTES = int(os.environ.get('ADMISSION_MAX_BYTES', 512 * 1024 * 1024))  # Larger single files get 413
+    ADMISSION_USER_MAX_BYTES = int(os.environ.get('ADMISSION_USER_MAX_BYTES', 128 * 1024 * 1024))  # Per user; one parse is always allowed
+    ADMISSION_MAX_QUEUED = int(os.environ.get('ADMISSION_MAX_QUEUED', 32))
+    ADMISSION_QUEUE_TIMEOUT = float(os.environ.get('ADMISSION_QUEUE_TIMEOUT', 30))  # Seconds a parse waits for budget
+    ADMISSION_RETRY_AFTER = int(os.environ.get('ADMISSION_RETRY_AFTER', 5))
+    ADMISSION_LEDGER = os.environ.get('ADMISSION_LEDGER', os.path.join(tempfile.gettempdir(), 'packing-list-admission.json'))  # Must be on local disk
+    
+    # Spreadsheets are parsed in child processes so that a hostile file cannot hang or exhaust the API worker
+    PARSE_POOL_WORKERS = int(os.environ.get('PARSE_POOL_WORKERS', 2))  # Parse processes per API worker; 0 parses in-process
+    PARSE_TIMEOUT = float(os.environ.get('PARSE_TIMEOUT', 60))  # Seconds before a parse is killed; keep below GUNICORN_TIMEOUT
+    PARSE_MEMORY_LIMIT_MB = int(os.environ.get('PARSE_MEMORY_LIMIT_MB', 2048))  # RLIMIT_AS of a parse process; 0 disables
+    PARSE_MAX_TASKS_PER_CHILD = int(os.environ.get('PARSE_MAX_TASKS_PER_CHILD', 50))  # Files parsed before a process is replaced
+    
+    IDEMPOTENCY_KEY_TTL = int(os.environ.get('IDEMPOTENCY_KEY_TTL', 24 * 3600))  # Seconds a stored response is replayed for its Idempotency-Key
+    IDEMPOTENCY_WAIT_TIMEOUT = float(os.environ.get('IDEMPOTENCY_WAIT_TIMEOUT', 60))  # Seconds a duplicate waits for the attempt in progress before 409
+    IDEMPOTENCY_LOCK_TIMEOUT = int(os.environ.get('IDEMPOTENCY_LOCK_TIMEOUT', 600))  # Attempts running longer are presumed dead and may be retried
     UPLOAD_FOLDER = os.path.join(os.getcwd(), 'uploads')
-    MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size 
\ No newline at end of file
+    MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
+    FILE_STORE_COMPRESSION = os.environ.get('FILE_STORE_COMPRESSION', 'auto')  # 'zstd', 'none', or 'auto': zstd unless downloads are offloaded
+    FILE_STORE_ZSTD_LEVEL = int(os.environ.get('FILE_STORE_ZSTD_LEVEL', 3))
+    ITEMS_ENCODING = os.environ.get('ITEMS_ENCODING', 'packed')  # 'packed' (msgpack + zstd columns) or 'json'; existing rows are read either way
+
+    # Object storage for file store objects: 'local' keeps them under UPLOAD_FOLDER/objects,
+    # 's3' uses an S3-compatible bucket (AWS, MinIO, ...) so API nodes need no shared disk; needs boto3.
+    # Credentials come from the usual AWS_ACCESS_KEY_ID / AWS_SECRET_ACCESS_KEY environment or instance role.
+    STORAGE_BACKEND = os.environ.get('STORAGE_BACKEND', 'local')
+    S3_BUCKET = os.environ.get('S3_BUCKET')
+    S3_PREFIX = os.environ.get('S3_PREFIX', 'objects/')
+    S3_ENDPOINT_URL = os.environ.get('S3_ENDPOINT_URL')  # e.g. http://localhost:9000 for MinIO
+    S3_REGION = os.environ.get('S3_REGION')
+    S3_MAX_POOL_CONNECTIONS = int(os.environ.get('S3_MAX_POOL_CONNECTIONS', 10))  # Keep >= worker threads
+    S3_MULTIPART_THRESHOLD = int(os.environ.get('S3_MULTIPART_THRESHOLD', 8 * 1024 * 1024))
+    S3_MULTIPART_CHUNKSIZE = int(os.environ.get('S3_MULTIPART_CHUNKSIZE', 8 * 1024 * 1024))
+    FILE_DOWNLOAD_PRESIGNED = os.environ.get('FILE_DOWNLOAD_PRESIGNED', 'false').lower() == 'true'  # Redirect to the bucket; uncompressed objects only
+    PRESIGNED_URL_EXPIRES = int(os.environ.get('PRESIGNED_URL_EXPIRES', 300))
+
+    # File downloads: 'direct' streams from the worker; 'x-accel' (nginx) or 'x-sendfile' (Apache/lighttpd)
+    # hand the transfer to the front proxy after the auth check. Compressed store objects are always
+    # streamed directly, so the default FILE_STORE_COMPRESSION=auto stores new originals uncompressed here.
+    FILE_DOWNLOAD_MODE = os.environ.get('FILE_DOWNLOAD_MODE', 'direct')
+    X_ACCEL_REDIRECT_PREFIX = os.environ.get('X_ACCEL_REDIRECT_PREFIX', '/protected-uploads/')  # nginx internal location aliasing UPLOAD_FOLDER
+    
+    # Per-request SQL accounting: headers are always sent in debug mode
+    QUERY_STATS_HEADERS = os.environ.get('QUERY_STATS_HEADERS', 'false').lower() == 'true'  # X-DB-Query-Count, X-DB-Time-Ms, Server-Timing
+    SLOW_REQUEST_MS = int(os.environ.get('SLOW_REQUEST_MS', 1000))  # Requests slower than this are logged with their top statements
+    SLOW_REQUEST_QUERIES = int(os.environ.get('SLOW_REQUEST_QUERIES', 50))  # ...as are requests running at least this many statements
+    QUERY_BUDGET = int(os.environ.get('QUERY_BUDGET', 0))  # Default per-request statement budget; 0 disables, @query_budget overrides
+    QUERY_BUDGET_ENFORCE = os.environ.get('QUERY_BUDGET_ENFORCE', 'false').lower() == 'true'  # Raise instead of log (always raises when testing)
+    PROFILE_SAMPLE_INTERVAL = float(os.environ.get('PROFILE_SAMPLE_INTERVAL', 0.005))  # Seconds between stack samples of profiled uploads
+    COMPRESS_RESPONSES = os.environ.get('COMPRESS_RESPONSES', 'true').lower() == 'true'  # gzip/br JSON and text bodies; disable if the proxy compresses
+    COMPRESS_MIN_SIZE = int(os.environ.get('COMPRESS_MIN_SIZE', 1024))  # Smaller bodies are sent as is
+    COMPRESS_GZIP_LEVEL = int(os.environ.get('COMPRESS_GZIP_LEVEL', 6))
+    COMPRESS_BR_QUALITY = int(os.environ.get('COMPRESS_BR_QUALITY', 4))  # Brotli needs the brotli package
+    EXPORT_CURSOR_OVERLAP = int(os.environ.get('EXPORT_CURSOR_OVERLAP', 600))  # Seconds X-Export-Generated-At is moved back; keep above the longest price/duty import
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')  # If set, /metrics requires 'Authorization: Bearer <token>'
+    RELOAD_WORKERS_ON_PRICE_UPDATE = os.environ.get('RELOAD_WORKERS_ON_PRICE_UPDATE', 'false').lower() == 'true'  # Under gunicorn, re-warm and replace workers after price imports; off by default, the index picks up new prices within ItemCodeIndex.REFRESH_CHECK_INTERVAL
+    
+    # Auto-approval of pending uploads
+    AUTO_APPROVE_MAX_MISMATCH_PCT = float(os.environ.get('AUTO_APPROVE_MAX_MISMATCH_PCT', 0))  # 0 disables auto-approval
+    AUTO_APPROVE_ALLOW_NOT_FOUND = os.environ.get('AUTO_APPROVE_ALLOW_NOT_FOUND', 'false').lower() == 'true'
+    AUTO_APPROVE_BATCH_SIZE = int(os.environ.get('AUTO_APPROVE_BATCH_SIZE', 200))
+    
+    # Upload folder garbage collection
+    UPLOAD_RETENTION_DAYS = {  # Originals of uploads in these statuses are removed after N days
+        status: int(days) for status, days in (
+            entry.split('=') for entry in os.environ.get('UPLOAD_RETENTION_DAYS', 'rejected=90,failed=30').split(',') if entry
+        )
+    }
+    GC_ORPHAN_MIN_AGE = int(os.environ.get('GC_ORPHAN_MIN_AGE', 3600))  # Seconds before an unreferenced file counts as orphaned
+    GC_BATCH_SIZE = int(os.environ.get('GC_BATCH_SIZE', 100))  # Deletions per batch
+    GC_BATCH_PAUSE = float(os.environ.get('GC_BATCH_PAUSE', 0.5))  # Seconds to sleep between batches
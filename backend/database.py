@@ -1,13 +1,131 @@
+from flask import current_app, g, has_app_context, request
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from functools import wraps
+import math
+import time
 
-db = SQLAlchemy()
+REPLICA_BIND = 'replica'
+PRIMARY_COOKIE = 'db_primary_until'  # Reads of this client go to the primary until this Unix time
+
+class RoutingSession(Session):
+    """Session sending the reads of replica routes to the read replica
+
+    Flushes always use the primary, so a replica route that writes by accident
+    still writes to the right database.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and has_app_context() and g.get('db_use_replica'):
+            return self._db.engines[REPLICA_BIND]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+db = SQLAlchemy(session_options={'class_': RoutingSession})
+
+ENGINE_PROFILES = ('auto', 'sqlite', 'postgresql', 'none')
+
+def _replica_configured() -> bool:
+    return REPLICA_BIND in (current_app.config.get('SQLALCHEMY_BINDS') or {})
+
+def _reads_pinned_to_primary() -> bool:
+    """Whether this client wrote recently enough that the replica may not have its changes"""
+    try:
+        return float(request.cookies.get(PRIMARY_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+def use_replica(f):
+    """Decorator sending the reads of a read-only route to the replica, when one is configured"""
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        if _replica_configured() and not _reads_pinned_to_primary():
+            g.db_use_replica = True
+        return f(*args, **kwargs)
+
+    return decorated
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _record_flush(session, flush_context):
+    if has_app_context():
+        g.db_wrote = True
+
+@event.listens_for(RoutingSession, 'do_orm_execute')
+def _record_bulk_write(orm_execute_state):
+    if (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete) and has_app_context():
+        g.db_wrote = True
+
+def engine_profile(app):
+    """Engine profile for the app's database; 'auto' picks one from the URL's dialect"""
+    profile = app.config.get('DB_ENGINE_PROFILE', 'auto')
+    if profile not in ENGINE_PROFILES:
+        raise ValueError(f'Unknown DB_ENGINE_PROFILE: {profile}')
+    if profile == 'auto':
+        backend = make_url(app.config['SQLALCHEMY_DATABASE_URI']).get_backend_name()
+        profile = backend if backend in ('sqlite', 'postgresql') else 'none'
+    return profile
+
+def _postgresql_engine_options(config):
+    """Pool sizing and connection health settings for PostgreSQL"""
+    options = {
+        'pool_size': config['DB_POOL_SIZE'],
+        'max_overflow': config['DB_MAX_OVERFLOW'],
+        'pool_timeout': config['DB_POOL_TIMEOUT'],
+        'pool_recycle': config['DB_POOL_RECYCLE'],
+        'pool_pre_ping': config['DB_POOL_PRE_PING']
+    }
+    if config['DB_STATEMENT_TIMEOUT_MS']:
+        options['connect_args'] = {'options': f"-c statement_timeout={config['DB_STATEMENT_TIMEOUT_MS']}"}
+    return options
+
+def _sqlite_pragmas(config):
+    """PRAGMAs run on every new SQLite connection"""
+    return [
+        'PRAGMA journal_mode=WAL',  # Readers no longer block on a writer
+        f"PRAGMA synchronous={config['SQLITE_SYNCHRONOUS']}",  # In WAL mode NORMAL never corrupts; power loss may undo the last commits
+        f"PRAGMA busy_timeout={config['SQLITE_BUSY_TIMEOUT_MS']}",
+        f"PRAGMA cache_size=-{config['SQLITE_CACHE_SIZE_KB']}",  # Negative values are KiB, not pages
+        f"PRAGMA mmap_size={config['SQLITE_MMAP_SIZE']}"
+    ]
 
 def init_db(app):
     """Initialize database with Flask app"""
+    profile = engine_profile(app)
+    if profile == 'postgresql':
+        options = _postgresql_engine_options(app.config)
+        options.update(app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {}))
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = options
+
     db.init_app(app)
-    
+
+    if profile == 'sqlite':
+        pragmas = _sqlite_pragmas(app.config)
+
+        def set_sqlite_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            for pragma in pragmas:
+                cursor.execute(pragma)
+            cursor.close()
+
+        with app.app_context():
+            for engine in db.engines.values():
+                if engine.dialect.name == 'sqlite':
+                    event.listen(engine, 'connect', set_sqlite_pragmas)
+
+    @app.after_request
+    def pin_reads_after_write(response):
+        # Read-your-writes: after this client's own writes, skip the replica until it has caught up
+        if g.pop('db_wrote', False) and _replica_configured():
+            window = current_app.config['REPLICA_STICKY_SECONDS']
+            response.set_cookie(
+                PRIMARY_COOKIE, f'{time.time() + window:.3f}', max_age=math.ceil(window),
+                httponly=True, samesite='Lax', secure=request.is_secure
+            )
+        return response
+
     # Create upload folder if it doesn't exist
     import os
     upload_folder = app.config.get('UPLOAD_FOLDER')
     if upload_folder and not os.path.exists(upload_folder):
-        os.makedirs(upload_folder) 
\ No newline at end of file
+        os.makedirs(upload_folder)
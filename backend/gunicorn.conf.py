@@ -0,0 +1,39 @@
+"""gunicorn settings: gunicorn -c gunicorn.conf.py wsgi:app
+
+The app is preloaded in the master, which imports pandas/openpyxl and builds the price
+code index once (see services/warmup.py); workers share them copy-on-write. Sending
+SIGHUP to the master, as price imports do with RELOAD_WORKERS_ON_PRICE_UPDATE, re-warms
+the master and gracefully replaces the workers.
+
+graceful_timeout must not be below timeout: old workers are killed once it runs out, and
+a worst-case upload (ADMISSION_QUEUE_TIMEOUT + PARSE_TIMEOUT + validation + commit) would
+be cut off halfway by every reload.
+"""
+import multiprocessing
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get('GUNICORN_THREADS', 1))  # More than 1 selects the gthread worker
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))  # Large uploads are parsed in the request
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', timeout))  # Keep >= timeout so reloads let in-flight uploads finish
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 0))  # Recycle workers after N requests; 0 disables
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', 0))
+preload_app = True
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG', '-')
+
+def on_starting(server):
+    # Workers compare this with their parent pid before signalling a reload
+    os.environ['GUNICORN_MASTER_PID'] = str(os.getpid())
+
+def on_reload(server):
+    from services.warmup import Warmup
+    from wsgi import app
+
+    Warmup.run(app)
+
+def child_exit(server, worker):
+    from services.metrics import Metrics
+
+    Metrics.mark_process_dead(worker.pid)
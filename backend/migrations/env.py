@@ -13,6 +13,10 @@ from models.upload import UploadRecord
 from models.user import User
 from models.duty import DutyRate
 from models.price import PriceList
+from models.tolerance import ToleranceRule
+from models.stored_file import StoredFile
+from models.refresh_token import RefreshToken
+from models.idempotency_key import IdempotencyKey
 from database import db
 
 # this is the Alembic Config object, which provides
@@ -0,0 +1,30 @@
+"""add users.tokens_valid_after
+
+Revision ID: 5c2e8d41a7f3
+Revises: b66315cb9fd9
+Create Date: 2026-10-19 14:12:40.518204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c2e8d41a7f3'
+down_revision: Union[str, Sequence[str], None] = 'b66315cb9fd9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.add_column(sa.Column('tokens_valid_after', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.drop_column('tokens_valid_after')
@@ -0,0 +1,130 @@
+"""move original files into content-addressed file store
+
+Revision ID: 7c2e4b9d1a03
+Revises: 3f1d0c6a8e52
+Create Date: 2026-10-19 11:20:05.772314
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+import hashlib
+import ntpath
+import os
+import shutil
+from datetime import datetime
+
+from config import Config
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c2e4b9d1a03'
+down_revision: Union[str, Sequence[str], None] = '3f1d0c6a8e52'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _object_path(digest):
+    # Mirrors FileStore.object_key for uncompressed objects under the local storage backend
+    return os.path.join(Config.UPLOAD_FOLDER, 'objects', digest[:2], digest[2:4], digest)
+
+
+def _hash_file(path):
+    sha256 = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def _locate(file_path):
+    # Records may hold absolute paths from another machine (including Windows paths)
+    if os.path.exists(file_path):
+        return file_path
+    fallback = os.path.join(Config.UPLOAD_FOLDER, ntpath.basename(file_path))
+    return fallback if os.path.exists(fallback) else None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('stored_files',
+    sa.Column('digest', sa.String(length=64), nullable=False),
+    sa.Column('size', sa.BigInteger(), nullable=False),
+    sa.Column('stored_size', sa.BigInteger(), nullable=False),
+    sa.Column('compression', sa.String(length=16), nullable=True),
+    sa.Column('ref_count', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('digest')
+    )
+    with op.batch_alter_table('upload_records') as batch_op:
+        batch_op.add_column(sa.Column('file_digest', sa.String(length=64), nullable=True))
+        batch_op.create_index(batch_op.f('ix_upload_records_file_digest'), ['file_digest'], unique=False)
+        batch_op.create_foreign_key('fk_upload_records_file_digest', 'stored_files', ['file_digest'], ['digest'])
+
+    # Move existing originals into the store; duplicates collapse into one object
+    conn = op.get_bind()
+    uploads = sa.table('upload_records', sa.column('id'), sa.column('file_path'), sa.column('file_digest'))
+    stored_files = sa.table('stored_files', sa.column('digest'), sa.column('size'), sa.column('stored_size'),
+                            sa.column('compression'), sa.column('ref_count'), sa.column('created_at'))
+
+    ref_counts = {}
+    rows = conn.execute(sa.select(uploads.c.id, uploads.c.file_path).where(uploads.c.file_path.isnot(None))).fetchall()
+    for upload_id, file_path in rows:
+        file_path = _locate(file_path)
+        if file_path is None:
+            continue
+
+        digest = _hash_file(file_path)
+        target = _object_path(digest)
+        size = os.path.getsize(file_path)
+        if digest not in ref_counts:
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            if os.path.exists(target):
+                os.remove(file_path)
+            else:
+                shutil.move(file_path, target)
+            ref_counts[digest] = [0, size]
+        else:
+            os.remove(file_path)
+        ref_counts[digest][0] += 1
+
+        conn.execute(uploads.update().where(uploads.c.id == upload_id).values(file_digest=digest, file_path=None))
+
+    if ref_counts:
+        op.bulk_insert(stored_files, [
+            {'digest': digest, 'size': size, 'stored_size': size, 'compression': None,
+             'ref_count': count, 'created_at': datetime.utcnow()}
+            for digest, (count, size) in ref_counts.items()
+        ])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Copy stored originals back to flat per-upload files
+    conn = op.get_bind()
+    rows = conn.execute(sa.text(
+        'SELECT u.id, u.filename, s.digest, s.compression FROM upload_records u '
+        'JOIN stored_files s ON s.digest = u.file_digest'
+    )).fetchall()
+    for upload_id, filename, digest, compression in rows:
+        source = _object_path(digest) + ('.zst' if compression == 'zstd' else '')
+        if not os.path.exists(source):
+            continue
+
+        target = os.path.join(Config.UPLOAD_FOLDER, f'{digest[:12]}_{upload_id}_{filename}')
+        with open(source, 'rb') as src, open(target, 'wb') as dst:
+            if compression == 'zstd':
+                import zstandard
+                zstandard.ZstdDecompressor().copy_stream(src, dst)
+            else:
+                shutil.copyfileobj(src, dst)
+        conn.execute(sa.text('UPDATE upload_records SET file_path = :path WHERE id = :id'),
+                     {'path': target, 'id': upload_id})
+
+    with op.batch_alter_table('upload_records') as batch_op:
+        batch_op.drop_constraint('fk_upload_records_file_digest', type_='foreignkey')
+        batch_op.drop_index(batch_op.f('ix_upload_records_file_digest'))
+        batch_op.drop_column('file_digest')
+    op.drop_table('stored_files')
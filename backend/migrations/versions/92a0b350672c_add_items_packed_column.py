@@ -0,0 +1,41 @@
+"""add items_packed column
+
+Revision ID: 92a0b350672c
+Revises: 942b9ab56763
+Create Date: 2026-10-19 00:48:55.795312
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from services.item_codec import ItemCodec
+from utils.json_provider import dumps
+
+
+# revision identifiers, used by Alembic.
+revision: str = '92a0b350672c'
+down_revision: Union[str, Sequence[str], None] = '942b9ab56763'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Existing JSON rows stay as they are; `flask compact-items` converts them
+    with op.batch_alter_table('upload_records') as batch_op:
+        batch_op.add_column(sa.Column('items_packed', sa.LargeBinary(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Turn packed items back into JSON before the column goes away
+    conn = op.get_bind()
+    uploads = sa.table('upload_records', sa.column('id'), sa.column('items'), sa.column('items_packed'))
+    rows = conn.execute(sa.select(uploads.c.id, uploads.c.items_packed).where(uploads.c.items_packed.isnot(None))).fetchall()
+    for upload_id, packed in rows:
+        conn.execute(uploads.update().where(uploads.c.id == upload_id).values(items=dumps(ItemCodec.decode(packed))))
+
+    with op.batch_alter_table('upload_records') as batch_op:
+        batch_op.drop_column('items_packed')
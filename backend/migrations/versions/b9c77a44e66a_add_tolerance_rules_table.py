@@ -0,0 +1,43 @@
+"""add tolerance_rules table
+
+Revision ID: b9c77a44e66a
+Revises: 55b38215b376
+Create Date: 2026-10-19 09:12:41.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b9c77a44e66a'
+down_revision: Union[str, Sequence[str], None] = '55b38215b376'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('tolerance_rules',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.Column('priority', sa.Integer(), nullable=False),
+    sa.Column('item_code_prefix', sa.String(length=100), nullable=True),
+    sa.Column('min_quantity', sa.Float(), nullable=True),
+    sa.Column('max_quantity', sa.Float(), nullable=True),
+    sa.Column('abs_tolerance', sa.Float(), nullable=True),
+    sa.Column('pct_tolerance', sa.Float(), nullable=True),
+    sa.Column('auto_accept_pct', sa.Float(), nullable=True),
+    sa.Column('is_active', sa.Boolean(), nullable=False),
+    sa.Column('created_by', sa.Integer(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['created_by'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('tolerance_rules')
@@ -6,7 +6,7 @@ class DutyRate(db.Model):
     
     item_code = db.Column(db.String(100), primary_key=True)
     rate = db.Column(db.Float, nullable=False)  # Tax rate as percentage
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
     
     def to_dict(self):
         """Convert duty rate item to dictionary"""
@@ -0,0 +1,92 @@
+from database import db
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
+
+class IdempotencyKey(db.Model):
+    __tablename__ = 'idempotency_keys'
+    __table_args__ = (db.UniqueConstraint('user_id', 'key', name='uq_idempotency_keys_user_key'),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    key = db.Column(db.String(255), nullable=False)  # Idempotency-Key header chosen by the client
+    fingerprint = db.Column(db.String(64), nullable=False)  # SHA-256 of method, path and body of the first request
+    status = db.Column(db.String(16), nullable=False, default='in_progress')  # 'in_progress' or 'completed'
+    response_status = db.Column(db.Integer)
+    response_mimetype = db.Column(db.String(128))
+    response_body = db.Column(db.LargeBinary)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    locked_at = db.Column(db.DateTime)  # Start of the attempt in progress; stale attempts can be taken over
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+
+    @classmethod
+    def find(cls, user_id, key):
+        return cls.query.filter_by(user_id=user_id, key=key).first()
+
+    @classmethod
+    def claim(cls, user_id, key, fingerprint):
+        """Record a new attempt for a key and commit; returns (record, claimed)
+
+        When the key is already taken, the existing record (or None if it vanished
+        in the meantime) is returned with claimed False.
+        """
+        now = datetime.utcnow()
+        # Drop this user's expired keys while at it, which also frees an expired copy of this one
+        cls.query.filter(cls.user_id == user_id, cls.expires_at < now).delete(synchronize_session=False)
+
+        record = cls(
+            user_id=user_id,
+            key=key,
+            fingerprint=fingerprint,
+            status='in_progress',
+            created_at=now,
+            locked_at=now,
+            expires_at=now + timedelta(seconds=current_app.config['IDEMPOTENCY_KEY_TTL'])
+        )
+        db.session.add(record)
+        try:
+            db.session.commit()
+            return record, True
+        except IntegrityError:
+            db.session.rollback()
+            return cls.find(user_id, key), False
+
+    def is_stale(self):
+        """Whether the attempt in progress has run so long that its worker is presumed dead"""
+        timeout = timedelta(seconds=current_app.config['IDEMPOTENCY_LOCK_TIMEOUT'])
+        return self.status == 'in_progress' and self.locked_at + timeout <= datetime.utcnow()
+
+    def take_over(self):
+        """Restart a stale attempt; only one of several concurrent callers succeeds"""
+        claimed = IdempotencyKey.query.filter(
+            IdempotencyKey.id == self.id,
+            IdempotencyKey.status == 'in_progress',
+            IdempotencyKey.locked_at == self.locked_at
+        ).update({'locked_at': datetime.utcnow()}, synchronize_session=False)
+        db.session.commit()
+        return bool(claimed)
+
+    @classmethod
+    def complete(cls, record_id, response):
+        """Store the response of a finished attempt for replay"""
+        cls.query.filter_by(id=record_id).update({
+            'status': 'completed',
+            'response_status': response.status_code,
+            'response_mimetype': response.mimetype,
+            'response_body': response.get_data()
+        }, synchronize_session=False)
+        db.session.commit()
+
+    @classmethod
+    def release(cls, record_id):
+        """Forget a failed attempt so that a retry runs again"""
+        cls.query.filter_by(id=record_id).delete(synchronize_session=False)
+        db.session.commit()
+
+    def replay(self):
+        """Response stored by the completed attempt"""
+        response = current_app.response_class(
+            self.response_body, status=self.response_status, mimetype=self.response_mimetype
+        )
+        response.headers['Idempotent-Replayed'] = 'true'
+        return response
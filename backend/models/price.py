@@ -6,7 +6,7 @@ class PriceList(db.Model):
     
     item_code = db.Column(db.String(100), primary_key=True)
     unit_price = db.Column(db.Float, nullable=False)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
     
     def to_dict(self):
         """Convert price list item to dictionary"""
@@ -22,6 +22,17 @@ class PriceList(db.Model):
         item = cls.query.filter_by(item_code=item_code).first()
         return item.unit_price if item else None
     
+    @classmethod
+    def get_prices(cls, item_codes, chunk_size=500):
+        """Get prices for many item codes with one query per chunk"""
+        item_codes = list(set(item_codes))
+        prices = {}
+        for start in range(0, len(item_codes), chunk_size):
+            chunk = item_codes[start:start + chunk_size]
+            rows = db.session.query(cls.item_code, cls.unit_price).filter(cls.item_code.in_(chunk))
+            prices.update(rows)
+        return prices
+    
     @classmethod
     def update_prices(cls, price_data):
         """Bulk update prices from uploaded data"""
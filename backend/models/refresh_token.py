@@ -0,0 +1,100 @@
+from database import db
+from datetime import datetime, timedelta
+from flask import current_app
+from services.token_revocation import TokenRevocation
+import hashlib
+import secrets
+
+class RefreshToken(db.Model):
+    __tablename__ = 'refresh_tokens'
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
+    token_hash = db.Column(db.String(64), unique=True, nullable=False)  # SHA-256 of the token; the token itself is never stored
+    family_id = db.Column(db.String(32), nullable=False, index=True)  # Shared by every token rotated from the same login
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    expires_at = db.Column(db.DateTime, nullable=False)
+    used_at = db.Column(db.DateTime)  # Set when the token is exchanged for a new one
+    revoked_at = db.Column(db.DateTime)
+
+    user = db.relationship('User')
+
+    @staticmethod
+    def hash_token(token):
+        """Digest under which a refresh token is stored"""
+        return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+    @classmethod
+    def issue(cls, user_id, family_id=None):
+        """Create a refresh token for a user and return it; the caller commits"""
+        token = secrets.token_urlsafe(32)
+        now = datetime.utcnow()
+
+        if family_id is None:
+            # A fresh login starts a new family; drop this user's expired tokens while at it
+            family_id = secrets.token_hex(16)
+            cls.query.filter(cls.user_id == user_id, cls.expires_at < now).delete(synchronize_session=False)
+
+        db.session.add(cls(
+            user_id=user_id,
+            token_hash=cls.hash_token(token),
+            family_id=family_id,
+            created_at=now,
+            expires_at=now + timedelta(seconds=current_app.config['REFRESH_TOKEN_EXPIRES'])
+        ))
+        return token
+
+    @classmethod
+    def rotate(cls, token):
+        """Exchange a refresh token for a new one in the same family
+
+        Returns {'token': ..., 'user': ...} or {'error': ...}. Presenting a token
+        that was already exchanged means it leaked, so the whole family is revoked;
+        a second use within the reuse grace period is treated as a client retry instead.
+        """
+        record = cls.query.filter_by(token_hash=cls.hash_token(token)).first()
+        if record is None:
+            return {'error': 'Invalid refresh token'}
+
+        now = datetime.utcnow()
+        if record.revoked_at is not None:
+            return {'error': 'Refresh token has been revoked'}
+        if record.expires_at <= now:
+            return {'error': 'Refresh token has expired'}
+
+        # Conditional update so concurrent requests cannot both exchange the same token
+        claimed = cls.query.filter(cls.id == record.id, cls.used_at.is_(None)).update(
+            {'used_at': now}, synchronize_session=False
+        )
+        if not claimed:
+            db.session.refresh(record)
+            grace = timedelta(seconds=current_app.config['REFRESH_TOKEN_REUSE_GRACE'])
+            if record.used_at is not None and now - record.used_at <= grace:
+                return {'error': 'Refresh token has already been used'}
+
+            cls.revoke_family(record.family_id, record.user_id)
+            db.session.commit()
+            return {'error': 'Refresh token reuse detected; please log in again'}
+
+        new_token = cls.issue(record.user_id, record.family_id)
+        db.session.commit()
+        return {'token': new_token, 'user': record.user}
+
+    @classmethod
+    def revoke_family(cls, family_id, user_id):
+        """Revoke every token descended from the same login, and the user's current access tokens; the caller commits"""
+        now = datetime.utcnow()
+        # Access tokens do not say which login they came from, so all of the user's are cut off;
+        # clients holding a refresh token of another login simply refresh
+        TokenRevocation.revoke_user_tokens(user_id, now)
+        return cls.query.filter(cls.family_id == family_id, cls.revoked_at.is_(None)).update(
+            {'revoked_at': now}, synchronize_session=False
+        )
+
+    @classmethod
+    def revoke_token(cls, token):
+        """Revoke the family a refresh token belongs to (logout); the caller commits"""
+        record = cls.query.filter_by(token_hash=cls.hash_token(token)).first()
+        if record is None:
+            return 0
+        return cls.revoke_family(record.family_id, record.user_id)
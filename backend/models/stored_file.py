@@ -0,0 +1,23 @@
+from database import db
+from datetime import datetime
+
+class StoredFile(db.Model):
+    __tablename__ = 'stored_files'
+    
+    digest = db.Column(db.String(64), primary_key=True)  # SHA-256 of the original content
+    size = db.Column(db.BigInteger, nullable=False)  # Original size in bytes
+    stored_size = db.Column(db.BigInteger, nullable=False)  # Size on disk after compression
+    compression = db.Column(db.String(16))  # None or 'zstd'
+    ref_count = db.Column(db.Integer, default=0, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def to_dict(self):
+        """Convert stored file to dictionary"""
+        return {
+            'digest': self.digest,
+            'size': self.size,
+            'stored_size': self.stored_size,
+            'compression': self.compression,
+            'ref_count': self.ref_count,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
@@ -0,0 +1,59 @@
+from database import db
+from datetime import datetime
+
+class ToleranceRule(db.Model):
+    __tablename__ = 'tolerance_rules'
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False)
+    priority = db.Column(db.Integer, default=0, nullable=False)  # Higher priority wins when rules overlap
+    item_code_prefix = db.Column(db.String(100))  # None matches every item code
+    min_quantity = db.Column(db.Float)  # Inclusive lower bound of the quantity tier
+    max_quantity = db.Column(db.Float)  # Exclusive upper bound of the quantity tier
+    abs_tolerance = db.Column(db.Float)  # Allowed absolute price difference
+    pct_tolerance = db.Column(db.Float)  # Allowed difference as percentage of expected price
+    auto_accept_pct = db.Column(db.Float)  # Mismatches within this percentage are accepted without review
+    is_active = db.Column(db.Boolean, default=True, nullable=False)
+    created_by = db.Column(db.Integer, db.ForeignKey('users.id'))
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    EDITABLE_FIELDS = (
+        'name', 'priority', 'item_code_prefix', 'min_quantity', 'max_quantity',
+        'abs_tolerance', 'pct_tolerance', 'auto_accept_pct', 'is_active'
+    )
+
+    def update_from_dict(self, data):
+        """Apply editable fields from request data"""
+        for field in self.EDITABLE_FIELDS:
+            if field in data:
+                setattr(self, field, data[field])
+
+    def to_dict(self):
+        """Convert tolerance rule to dictionary"""
+        return {
+            'id': self.id,
+            'name': self.name,
+            'priority': self.priority,
+            'item_code_prefix': self.item_code_prefix,
+            'min_quantity': self.min_quantity,
+            'max_quantity': self.max_quantity,
+            'abs_tolerance': self.abs_tolerance,
+            'pct_tolerance': self.pct_tolerance,
+            'auto_accept_pct': self.auto_accept_pct,
+            'is_active': self.is_active,
+            'created_by': self.created_by,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+
+    @classmethod
+    def get_active_rules(cls):
+        """Get active rules ordered from lowest to highest priority"""
+        return cls.query.filter_by(is_active=True).order_by(cls.priority, cls.id).all()
+
+    @classmethod
+    def get_signature(cls):
+        """Cheap fingerprint of the rule table used to invalidate compiled rules"""
+        return tuple(db.session.query(
+            db.func.count(cls.id),
+            db.func.max(cls.updated_at)
+        ).one())
@@ -1,6 +1,10 @@
 from database import db
 from datetime import datetime
-import json
+from flask import current_app, has_app_context
+from services.file_store import FileStore
+from services.item_codec import ItemCodec
+from utils.json_provider import dumps, loads
+import hashlib
 import os
 
 class UploadRecord(db.Model):
@@ -9,28 +13,94 @@ class UploadRecord(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     filename = db.Column(db.String(255), nullable=False)
-    file_path = db.Column(db.String(512))  # Path to stored original file
+    file_path = db.Column(db.String(512))  # Legacy path to original file, superseded by file_digest
+    file_digest = db.Column(db.String(64), db.ForeignKey('stored_files.digest'), index=True)  # Original file in FileStore
     upload_time = db.Column(db.DateTime, default=datetime.utcnow)
     status = db.Column(db.Enum('success', 'pending', 'approved', 'rejected', 'failed', name='upload_status'), 
                       default='pending', nullable=False)
-    items = db.Column(db.Text)  # JSON string of parsed items
+    items = db.Column(db.Text)  # JSON string of parsed items (legacy rows, or ITEMS_ENCODING=json)
+    items_packed = db.Column(db.LargeBinary)  # Parsed items in ItemCodec's compressed columnar format
     review_comment = db.Column(db.Text)
     reviewed_by = db.Column(db.Integer, db.ForeignKey('users.id'))
     reviewed_at = db.Column(db.DateTime)
     
     def set_items(self, items_data):
-        """Set items as JSON string"""
-        self.items = json.dumps(items_data) if items_data else None
+        """Store items packed with ItemCodec, or as JSON string if it is unavailable or disabled"""
+        encoding = current_app.config.get('ITEMS_ENCODING', 'packed') if has_app_context() else 'packed'
+        if items_data and encoding == 'packed' and ItemCodec.available():
+            try:
+                self.items_packed = ItemCodec.encode(items_data)
+                self.items = None
+                return
+            except (TypeError, ValueError, OverflowError):
+                pass  # Values msgpack cannot hold (e.g. integers beyond 64 bits) are kept as JSON
+        self.items = dumps(items_data) if items_data else None
+        self.items_packed = None
     
-    def get_items(self):
-        """Get items as Python object"""
-        return json.loads(self.items) if self.items else []
+    def get_items(self, fields=None):
+        """Get items as Python object; fields limits packed rows to those keys"""
+        if self.items_packed:
+            return ItemCodec.decode(self.items_packed, fields)
+        return loads(self.items) if self.items else []
+    
+    def items_digest(self):
+        """Short hash of the stored items, changing whenever they are updated"""
+        digest = hashlib.sha256()
+        if self.items_packed:
+            digest.update(self.items_packed)
+        else:
+            digest.update((self.items or '').encode('utf-8'))
+        return digest.hexdigest()[:16]
+    
+    @classmethod
+    def bulk_review(cls, query, status, comment, reviewed_by=None):
+        """Review every pending upload matched by query with a single UPDATE"""
+        updated_count = query.filter(cls.status == 'pending').update({
+            'status': status,
+            'review_comment': comment,
+            'reviewed_by': reviewed_by,
+            'reviewed_at': datetime.utcnow()
+        }, synchronize_session=False)
+        
+        db.session.commit()
+        return updated_count
+    
+    def iter_items(self):
+        """Iterate over items one at a time; packed rows are decoded in batches"""
+        if self.items_packed:
+            return ItemCodec.iter_decode(self.items_packed)
+        return iter(self.get_items())
+    
+    def has_file(self):
+        """Whether an original file is recorded for this upload"""
+        return bool(self.file_digest or self.file_path)
+    
+    def local_file_path(self):
+        """Plain filesystem path of the original, if it is stored uncompressed on local disk"""
+        if self.file_digest:
+            stored = FileStore.get(self.file_digest)
+            return FileStore.local_path(stored) if stored else None
+        if self.file_path and os.path.exists(self.file_path):
+            return self.file_path
+        return None
+    
+    def open_file(self):
+        """Open the original file for reading, or return None if it is missing"""
+        if self.file_digest:
+            stored = FileStore.get(self.file_digest)
+            return FileStore.open(stored) if stored else None
+        if self.file_path and os.path.exists(self.file_path):
+            return open(self.file_path, 'rb')
+        return None
     
     def delete_file(self):
-        """Delete the associated file if it exists"""
+        """Release the associated file if it exists"""
+        if self.file_digest:
+            FileStore.release(self.file_digest)
+            self.file_digest = None
         if self.file_path and os.path.exists(self.file_path):
             os.remove(self.file_path)
-            self.file_path = None
+        self.file_path = None
     
     def update_item(self, item_index, updated_data):
         """Update a specific item in the items list"""
@@ -47,7 +117,7 @@ class UploadRecord(db.Model):
             'id': self.id,
             'user_id': self.user_id,
             'filename': self.filename,
-            'has_original_file': bool(self.file_path),
+            'has_original_file': self.has_file(),
             'upload_time': self.upload_time.isoformat(),
             'status': self.status,
             'items': self.get_items(),
@@ -10,6 +10,7 @@ class User(db.Model):
     password_hash = db.Column(db.String(128), nullable=False)
     is_admin = db.Column(db.Boolean, default=False, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    tokens_valid_after = db.Column(db.DateTime)  # Access tokens issued before this are rejected; set when a login is revoked
     
     # Relationship with upload records
     uploads = db.relationship('UploadRecord', backref='user', lazy=True,foreign_keys='UploadRecord.user_id')
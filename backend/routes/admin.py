@@ -1,14 +1,29 @@
-from flask import Blueprint, request, jsonify, current_app, send_file
-from database import db
+from flask import Blueprint, request, jsonify, current_app, Response, stream_with_context
+from database import db, use_replica
 from models.upload import UploadRecord
 from models.price import PriceList
 from models.duty import DutyRate
 from models.user import User
+from models.tolerance import ToleranceRule
 from utils.jwt import token_required, admin_required
+from utils.idempotency import idempotent
 from services.validator import Validator
 from services.file_parser import FileParser
+from services.parse_pool import ParsePool
+from services.item_code_index import ItemCodeIndex
+from services.tolerance_engine import ToleranceEngine
+from services.auto_approver import AutoApprover
+from services.exporter import ResultExporter, TableExporter
+from services.file_store import FileStore
+from services.file_download import FileDownloader
+from services.metrics import Metrics
+from services.price_matcher import PriceMatcher
+from services.upload_profiler import UploadProfiler, ProfilerBusy
+from services.admission import AdmissionController, AdmissionRejected
+from services.warmup import Warmup
 import os
-from datetime import datetime
+import shutil
+from datetime import datetime, timedelta
 
 admin_bp = Blueprint('admin', __name__)
 
@@ -30,25 +45,28 @@ def upload_price_list():
         
         # Save file temporarily
         filename = validation_result['filename']
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        safe_filename = f"pricelist_{timestamp}_{filename}"
-        
-        upload_folder = current_app.config['UPLOAD_FOLDER']
-        file_path = os.path.join(upload_folder, safe_filename)
-        file.save(file_path)
+        file_path = FileStore.temp_path(filename, prefix='pricelist_')
+        with Metrics.stage('price_import', 'save'):
+            file.save(file_path)
         
         try:
             # Parse price list
-            parse_result = FileParser.parse_price_list(file_path)
+            with AdmissionController.admit(request.current_user['user_id'], file_path, 'price_import'):
+                parse_result = ParsePool.parse_price_list(file_path)
             
             if not parse_result['success']:
+                Metrics.FLOW_RESULTS.labels(flow='price_import', result='failed').inc()
                 return jsonify({
                     'error': 'Failed to parse price list',
                     'details': parse_result.get('error', 'Unknown parsing error')
                 }), 400
             
             # Update prices in database
-            updated_count = PriceList.update_prices(parse_result['price_data'])
+            with Metrics.stage('price_import', 'update_prices'):
+                updated_count = PriceList.update_prices(parse_result['price_data'])
+            ItemCodeIndex.invalidate()
+            Warmup.request_reload()
+            Metrics.FLOW_RESULTS.labels(flow='price_import', result='success').inc()
             
             # Clean up temporary file
             os.remove(file_path)
@@ -65,6 +83,8 @@ def upload_price_list():
                 os.remove(file_path)
             raise e
             
+    except AdmissionRejected as e:
+        return e.response()
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': f'Price list upload failed: {str(e)}'}), 500
@@ -87,25 +107,26 @@ def upload_duty_rate():
         
         # Save file temporarily
         filename = validation_result['filename']
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        safe_filename = f"dutyrate_{timestamp}_{filename}"
-        
-        upload_folder = current_app.config['UPLOAD_FOLDER']
-        file_path = os.path.join(upload_folder, safe_filename)
-        file.save(file_path)
+        file_path = FileStore.temp_path(filename, prefix='dutyrate_')
+        with Metrics.stage('duty_import', 'save'):
+            file.save(file_path)
         
         try:
             # Parse duty rates
-            parse_result = FileParser.parse_duty_rates(file_path)
+            with AdmissionController.admit(request.current_user['user_id'], file_path, 'duty_import'):
+                parse_result = ParsePool.parse_duty_rates(file_path)
             
             if not parse_result['success']:
+                Metrics.FLOW_RESULTS.labels(flow='duty_import', result='failed').inc()
                 return jsonify({
                     'error': 'Failed to parse duty rates',
                     'details': parse_result.get('error', 'Unknown parsing error')
                 }), 400
             
             # Update rates in database
-            updated_count = DutyRate.update_rates(parse_result['rate_data'])
+            with Metrics.stage('duty_import', 'update_rates'):
+                updated_count = DutyRate.update_rates(parse_result['rate_data'])
+            Metrics.FLOW_RESULTS.labels(flow='duty_import', result='success').inc()
             
             # Clean up temporary file
             os.remove(file_path)
@@ -122,6 +143,8 @@ def upload_duty_rate():
                 os.remove(file_path)
             raise e
             
+    except AdmissionRejected as e:
+        return e.response()
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': f'Duty rate upload failed: {str(e)}'}), 500
@@ -129,6 +152,7 @@ def upload_duty_rate():
 @admin_bp.route('/uploads', methods=['GET'])
 @token_required
 @admin_required
+@use_replica
 def get_all_uploads():
     """Get all upload records for admin review"""
     try:
@@ -178,10 +202,10 @@ def get_all_uploads():
 @admin_bp.route('/review/<int:upload_id>', methods=['POST'])
 @token_required
 @admin_required
-def review_upload():
+@idempotent
+def review_upload(upload_id):
     """Approve or reject an upload"""
     try:
-        upload_id = request.view_args['upload_id']
         data = request.get_json()
         
         if not data:
@@ -193,7 +217,8 @@ def review_upload():
             return jsonify({'error': validation_result['error']}), 400
         
         # Find upload record
-        upload = UploadRecord.query.get(upload_id)
+        with Metrics.stage('review', 'load'):
+            upload = UploadRecord.query.get(upload_id)
         if not upload:
             return jsonify({'error': 'Upload not found'}), 404
         
@@ -212,7 +237,9 @@ def review_upload():
         upload.reviewed_by = request.current_user['user_id']
         upload.reviewed_at = datetime.utcnow()
         
-        db.session.commit()
+        with Metrics.stage('review', 'commit'):
+            db.session.commit()
+        Metrics.FLOW_RESULTS.labels(flow='review', result=upload.status).inc()
         
         return jsonify({
             'message': f'Upload {action}d successfully',
@@ -224,9 +251,84 @@ def review_upload():
         db.session.rollback()
         return jsonify({'error': f'Review failed: {str(e)}'}), 500
 
+@admin_bp.route('/review/bulk', methods=['POST'])
+@token_required
+@admin_required
+def bulk_review_uploads():
+    """Approve or reject many pending uploads in one transaction"""
+    try:
+        data = request.get_json()
+        
+        if not data:
+            return jsonify({'error': 'No data provided'}), 400
+        
+        validation_result = Validator.validate_bulk_review_data(data)
+        if not validation_result['valid']:
+            return jsonify({'error': validation_result['error']}), 400
+        
+        query = UploadRecord.query
+        
+        if data.get('upload_ids') is not None:
+            query = query.filter(UploadRecord.id.in_(data['upload_ids']))
+        
+        review_filter = data.get('filter') or {}
+        if 'user_id' in review_filter:
+            query = query.filter(UploadRecord.user_id == review_filter['user_id'])
+        if 'uploaded_after' in review_filter:
+            query = query.filter(UploadRecord.upload_time >= datetime.fromisoformat(review_filter['uploaded_after']))
+        if 'uploaded_before' in review_filter:
+            query = query.filter(UploadRecord.upload_time < datetime.fromisoformat(review_filter['uploaded_before']))
+        
+        action = data['action']
+        status = 'approved' if action == 'approve' else 'rejected'
+        with Metrics.stage('bulk_review', 'update'):
+            updated_count = UploadRecord.bulk_review(
+                query,
+                status,
+                data.get('comment', ''),
+                reviewed_by=request.current_user['user_id']
+            )
+        Metrics.FLOW_RESULTS.labels(flow='bulk_review', result=status).inc(updated_count)
+        
+        return jsonify({
+            'message': f'{updated_count} uploads {status}',
+            'updated_count': updated_count,
+            'status': status
+        }), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': f'Bulk review failed: {str(e)}'}), 500
+
+@admin_bp.route('/auto-approve', methods=['POST'])
+@token_required
+@admin_required
+def run_auto_approval():
+    """Run one auto-approval sweep over pending uploads"""
+    try:
+        data = request.get_json(silent=True) or {}
+        max_mismatch_pct = data.get('max_mismatch_pct', current_app.config['AUTO_APPROVE_MAX_MISMATCH_PCT'])
+        
+        if isinstance(max_mismatch_pct, bool) or not isinstance(max_mismatch_pct, (int, float)) or max_mismatch_pct <= 0:
+            return jsonify({'error': 'max_mismatch_pct must be a positive number'}), 400
+        
+        result = AutoApprover.sweep(
+            max_mismatch_pct,
+            allow_not_found=bool(data.get('allow_not_found', current_app.config['AUTO_APPROVE_ALLOW_NOT_FOUND'])),
+            batch_size=current_app.config['AUTO_APPROVE_BATCH_SIZE'],
+            dry_run=bool(data.get('dry_run', False))
+        )
+        
+        return jsonify(result), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': f'Auto-approval failed: {str(e)}'}), 500
+
 @admin_bp.route('/stats', methods=['GET'])
 @token_required
 @admin_required
+@use_replica
 def get_admin_stats():
     """Get admin dashboard statistics"""
     try:
@@ -249,6 +351,7 @@ def get_admin_stats():
 @admin_bp.route('/price-list', methods=['GET'])
 @token_required
 @admin_required
+@use_replica
 def get_price_list():
     """Get all price list entries"""
     try:
@@ -291,6 +394,7 @@ def get_price_list():
 @admin_bp.route('/duty-rates', methods=['GET'])
 @token_required
 @admin_required
+@use_replica
 def get_duty_rates():
     """Get all duty rate entries"""
     try:
@@ -330,6 +434,79 @@ def get_duty_rates():
     except Exception as e:
         return jsonify({'error': f'Failed to retrieve duty rates: {str(e)}'}), 500
 
+@admin_bp.route('/price-list/export', methods=['GET'])
+@token_required
+@admin_required
+def export_price_list():
+    """Stream the full price list (or changes since updated_since) as NDJSON, CSV or XLSX"""
+    try:
+        return _export_table(
+            PriceList,
+            [PriceList.item_code, PriceList.unit_price, PriceList.updated_at],
+            'price_list'
+        )
+    except Exception as e:
+        return jsonify({'error': f'Failed to export price list: {str(e)}'}), 500
+
+@admin_bp.route('/duty-rates/export', methods=['GET'])
+@token_required
+@admin_required
+def export_duty_rates():
+    """Stream the full duty rate table (or changes since updated_since) as NDJSON, CSV or XLSX"""
+    try:
+        return _export_table(
+            DutyRate,
+            [DutyRate.item_code, DutyRate.rate, DutyRate.updated_at],
+            'duty_rates'
+        )
+    except Exception as e:
+        return jsonify({'error': f'Failed to export duty rates: {str(e)}'}), 500
+
+def _export_table(model, columns, name):
+    """Build a streaming export response for a reference table"""
+    export_format = request.args.get('format', 'ndjson').lower()
+    if export_format not in TableExporter.FORMATS:
+        return jsonify({'error': f'Unsupported format. Allowed: {", ".join(TableExporter.FORMATS)}'}), 400
+    
+    # Captured before querying so clients can pass it back as the next updated_since. Exports read from the
+    # primary: rows a lagging replica has not received yet would be missed by this export and the next delta.
+    # Imports stamp updated_at per row but commit once at the end, so rows of an import still running are
+    # invisible now yet older than this instant; the cursor is moved back by EXPORT_CURSOR_OVERLAP so the
+    # next delta sends them (and repeats recent rows, which clients upsert by item_code)
+    generated_at = datetime.utcnow() - timedelta(seconds=current_app.config['EXPORT_CURSOR_OVERLAP'])
+    query = db.session.query(*columns).order_by(model.item_code)
+    
+    updated_since = request.args.get('updated_since')
+    if updated_since:
+        try:
+            query = query.filter(model.updated_at >= datetime.fromisoformat(updated_since))
+        except ValueError:
+            return jsonify({'error': 'updated_since must be an ISO 8601 datetime'}), 400
+    
+    fields = [column.key for column in columns]
+    headers = {
+        'Content-Disposition': f'attachment; filename="{name}.{export_format}"',
+        'X-Export-Generated-At': generated_at.isoformat()
+    }
+    
+    if export_format == 'xlsx':
+        path = TableExporter.write_xlsx(TableExporter.iter_rows(query), fields, name)
+        return Response(ResultExporter.stream_file(path, delete=True),
+                        mimetype=TableExporter.FORMATS[export_format], headers=headers)
+    
+    if export_format == 'csv':
+        body = TableExporter.stream_csv(TableExporter.iter_rows(query), fields)
+    else:
+        body = TableExporter.stream_ndjson(TableExporter.iter_rows(query), fields)
+    
+    # XLSX is already zip-compressed; text formats are gzipped on the fly when accepted
+    if 'gzip' in request.headers.get('Accept-Encoding', ''):
+        body = TableExporter.gzip_stream(body)
+        headers['Content-Encoding'] = 'gzip'
+        headers['Vary'] = 'Accept-Encoding'
+    
+    return Response(stream_with_context(body), mimetype=TableExporter.FORMATS[export_format], headers=headers)
+
 @admin_bp.route('/upload/<int:upload_id>/file', methods=['GET'])
 @token_required
 @admin_required
@@ -341,10 +518,231 @@ def admin_download_file(upload_id):
         if not upload:
             return jsonify({'error': 'Upload not found'}), 404
             
-        if not upload.file_path or not os.path.exists(upload.file_path):
+        response = FileDownloader.send_upload(upload)
+        if response is None:
             return jsonify({'error': 'Original file not found'}), 404
             
-        return send_file(upload.file_path, as_attachment=True, download_name=upload.filename)
+        return response
+        
+    except Exception as e:
+        return jsonify({'error': f'Failed to download file: {str(e)}'}), 500 
+
+@admin_bp.route('/tolerance-rules', methods=['GET'])
+@token_required
+@admin_required
+@use_replica
+def get_tolerance_rules():
+    """Get all price tolerance rules"""
+    try:
+        rules = ToleranceRule.query.order_by(ToleranceRule.priority.desc(), ToleranceRule.id).all()
+        
+        return jsonify({
+            'rules': [rule.to_dict() for rule in rules],
+            'default_abs_tolerance': ToleranceEngine.DEFAULT_ABS_TOLERANCE
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': f'Failed to retrieve tolerance rules: {str(e)}'}), 500
+
+@admin_bp.route('/tolerance-rules', methods=['POST'])
+@token_required
+@admin_required
+def create_tolerance_rule():
+    """Create a price tolerance rule"""
+    try:
+        data = request.get_json()
+        
+        if not data:
+            return jsonify({'error': 'No data provided'}), 400
+        
+        validation_result = Validator.validate_tolerance_rule(data)
+        if not validation_result['valid']:
+            return jsonify({'error': validation_result['error']}), 400
+        
+        rule = ToleranceRule(created_by=request.current_user['user_id'])
+        rule.update_from_dict(data)
+        
+        db.session.add(rule)
+        db.session.commit()
+        
+        return jsonify({
+            'message': 'Tolerance rule created successfully',
+            'rule': rule.to_dict()
+        }), 201
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': f'Failed to create tolerance rule: {str(e)}'}), 500
+
+@admin_bp.route('/tolerance-rules/<int:rule_id>', methods=['PUT'])
+@token_required
+@admin_required
+def update_tolerance_rule(rule_id):
+    """Update a price tolerance rule"""
+    try:
+        rule = ToleranceRule.query.get(rule_id)
+        if not rule:
+            return jsonify({'error': 'Tolerance rule not found'}), 404
+        
+        data = request.get_json()
+        if not data:
+            return jsonify({'error': 'No data provided'}), 400
+        
+        merged = rule.to_dict()
+        merged.update(data)
+        validation_result = Validator.validate_tolerance_rule(merged)
+        if not validation_result['valid']:
+            return jsonify({'error': validation_result['error']}), 400
+        
+        rule.update_from_dict(data)
+        rule.updated_at = datetime.utcnow()
+        db.session.commit()
+        
+        return jsonify({
+            'message': 'Tolerance rule updated successfully',
+            'rule': rule.to_dict()
+        }), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': f'Failed to update tolerance rule: {str(e)}'}), 500
+
+@admin_bp.route('/tolerance-rules/<int:rule_id>', methods=['DELETE'])
+@token_required
+@admin_required
+def delete_tolerance_rule(rule_id):
+    """Delete a price tolerance rule"""
+    try:
+        rule = ToleranceRule.query.get(rule_id)
+        if not rule:
+            return jsonify({'error': 'Tolerance rule not found'}), 404
+        
+        db.session.delete(rule)
+        db.session.commit()
+        
+        return jsonify({'message': 'Tolerance rule deleted successfully'}), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': f'Failed to delete tolerance rule: {str(e)}'}), 500
+
+
+@admin_bp.route('/upload/<int:upload_id>/export', methods=['GET'])
+@token_required
+@admin_required
+def admin_export_upload_results(upload_id):
+    """Export validated items of an upload as CSV or XLSX (admin access)"""
+    try:
+        upload = UploadRecord.query.get(upload_id)
+        
+        if not upload:
+            return jsonify({'error': 'Upload not found'}), 404
+        
+        export_format = request.args.get('format', 'csv').lower()
+        if export_format not in ResultExporter.FORMATS:
+            return jsonify({'error': f'Unsupported format. Allowed: {", ".join(ResultExporter.FORMATS)}'}), 400
+        
+        download_name = f"{os.path.splitext(upload.filename)[0]}_validation.{export_format}"
+        headers = {'Content-Disposition': f'attachment; filename="{download_name}"'}
+        
+        if export_format == 'csv':
+            body = stream_with_context(ResultExporter.stream_csv(upload.iter_items()))
+        else:
+            body = ResultExporter.stream_file(ResultExporter.write_xlsx(upload.iter_items()), delete=True)
+        
+        return Response(body, mimetype=ResultExporter.FORMATS[export_format], headers=headers)
+        
+    except Exception as e:
+        return jsonify({'error': f'Failed to export upload: {str(e)}'}), 500
+
+@admin_bp.route('/upload/<int:upload_id>/annotated', methods=['GET'])
+@token_required
+@admin_required
+def admin_download_annotated_file(upload_id):
+    """Download the original file with mismatched cells highlighted (admin access)"""
+    try:
+        upload = UploadRecord.query.get(upload_id)
+        
+        if not upload:
+            return jsonify({'error': 'Upload not found'}), 404
+        
+        if not upload.has_file():
+            return jsonify({'error': 'Original file not found'}), 404
+        
+        if not upload.filename.lower().endswith('.xlsx'):
+            return jsonify({'error': 'Annotated copies are only available for .xlsx files'}), 400
+        
+        annotated_path = ResultExporter.get_annotated_copy(upload, current_app.config['UPLOAD_FOLDER'])
+        if annotated_path is None:
+            return jsonify({'error': 'Original file not found'}), 404
+        download_name = f"{os.path.splitext(upload.filename)[0]}_annotated.xlsx"
+        
+        return FileDownloader.send_path(annotated_path, download_name)
+        
+    except Exception as e:
+        return jsonify({'error': f'Failed to build annotated file: {str(e)}'}), 500
+
+@admin_bp.route('/upload/<int:upload_id>/profile', methods=['POST'])
+@token_required
+@admin_required
+def profile_upload(upload_id):
+    """Re-run parsing and validation of a stored upload under the profiler"""
+    try:
+        upload = UploadRecord.query.get(upload_id)
+        
+        if not upload:
+            return jsonify({'error': 'Upload not found'}), 404
+        
+        data = request.get_json(silent=True) or {}
+        mode = data.get('mode', 'sample')
+        if mode not in UploadProfiler.MODES:
+            return jsonify({'error': f'Invalid mode. Allowed: {", ".join(UploadProfiler.MODES)}'}), 400
+        
+        source = upload.open_file()
+        if source is None:
+            return jsonify({'error': 'Original file not found'}), 404
+        
+        # The parser reads from disk, so the original is copied out of the file store first
+        file_path = FileStore.temp_path(upload.filename, prefix='profile_')
+        with source, open(file_path, 'wb') as f:
+            shutil.copyfileobj(source, f)
+        
+        try:
+            profiler = UploadProfiler(mode)
+            with AdmissionController.admit(request.current_user['user_id'], file_path, 'profile'), profiler:
+                parse_result = FileParser.parse_packing_list(file_path)
+                if parse_result['success']:
+                    PriceMatcher.validate_items(parse_result['items'])
+        except ProfilerBusy as e:
+            return jsonify({'error': str(e)}), 409
+        except AdmissionRejected as e:
+            return e.response()
+        finally:
+            os.remove(file_path)
+        
+        return jsonify({
+            'message': 'Upload profiled successfully',
+            'profile': profiler.save(upload.id)
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': f'Profiling failed: {str(e)}'}), 500
+
+@admin_bp.route('/upload/<int:upload_id>/profile', methods=['GET'])
+@token_required
+@admin_required
+def download_upload_profile(upload_id):
+    """Download a stored profile artifact (summary, speedscope or pstats)"""
+    try:
+        kind = request.args.get('format', 'summary')
+        if kind not in UploadProfiler.ARTIFACTS:
+            return jsonify({'error': f'Invalid format. Allowed: {", ".join(UploadProfiler.ARTIFACTS)}'}), 400
+        
+        path = UploadProfiler.artifact_path(upload_id, kind)
+        if path is None:
+            return jsonify({'error': 'Profile not found'}), 404
+        
+        return FileDownloader.send_path(path, f'upload_{upload_id}_{UploadProfiler.ARTIFACTS[kind]}')
         
     except Exception as e:
-        return jsonify({'error': f'Failed to download file: {str(e)}'}), 500 
\ No newline at end of file
+        return jsonify({'error': f'Failed to download profile: {str(e)}'}), 500
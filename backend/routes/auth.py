@@ -1,8 +1,10 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from database import db
 from models.user import User
+from models.refresh_token import RefreshToken
 from utils.jwt import generate_token
 from services.validator import Validator
+from services.password_checker import PasswordChecker, PasswordCheckBusy
 
 auth_bp = Blueprint('auth', __name__)
 
@@ -36,6 +38,8 @@ def register():
         user.set_password(password)
         
         db.session.add(user)
+        db.session.flush()
+        refresh_token = RefreshToken.issue(user.id)
         db.session.commit()
         
         # Generate token
@@ -44,6 +48,7 @@ def register():
         return jsonify({
             'message': 'User registered successfully',
             'token': token,
+            'refresh_token': refresh_token,
             'user': user.to_dict()
         }), 201
         
@@ -69,17 +74,70 @@ def login():
         # Find user
         user = User.query.filter_by(username=username).first()
         
-        if not user or not user.check_password(password):
+        if not user or not PasswordChecker.check(user.password_hash, password):
             return jsonify({'error': 'Invalid username or password'}), 401
         
-        # Generate token
+        # Generate tokens
         token = generate_token(user.id, user.is_admin)
+        refresh_token = RefreshToken.issue(user.id)
+        db.session.commit()
         
         return jsonify({
             'message': 'Login successful',
             'token': token,
+            'refresh_token': refresh_token,
             'user': user.to_dict()
         }), 200
         
+    except PasswordCheckBusy:
+        response = jsonify({'error': 'Too many login attempts in progress, please retry shortly'})
+        response.headers['Retry-After'] = str(current_app.config['PASSWORD_CHECK_RETRY_AFTER'])
+        return response, 503
     except Exception as e:
-        return jsonify({'error': f'Login failed: {str(e)}'}), 500 
\ No newline at end of file
+        db.session.rollback()
+        return jsonify({'error': f'Login failed: {str(e)}'}), 500
+
+@auth_bp.route('/refresh', methods=['POST'])
+def refresh():
+    """Exchange a refresh token for a new access token without re-entering the password"""
+    try:
+        data = request.get_json(silent=True) or {}
+        
+        refresh_token = data.get('refresh_token')
+        if not refresh_token:
+            return jsonify({'error': 'Refresh token is required'}), 400
+        
+        result = RefreshToken.rotate(refresh_token)
+        if 'error' in result:
+            return jsonify({'error': result['error']}), 401
+        
+        user = result['user']
+        return jsonify({
+            'message': 'Token refreshed',
+            'token': generate_token(user.id, user.is_admin),
+            'refresh_token': result['token'],
+            'user': user.to_dict()
+        }), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': f'Token refresh failed: {str(e)}'}), 500
+
+@auth_bp.route('/logout', methods=['POST'])
+def logout():
+    """Revoke a refresh token and every token rotated from the same login"""
+    try:
+        data = request.get_json(silent=True) or {}
+        
+        refresh_token = data.get('refresh_token')
+        if not refresh_token:
+            return jsonify({'error': 'Refresh token is required'}), 400
+        
+        RefreshToken.revoke_token(refresh_token)
+        db.session.commit()
+        
+        return jsonify({'message': 'Logged out successfully'}), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': f'Logout failed: {str(e)}'}), 500 
\ No newline at end of file
@@ -0,0 +1,31 @@
+from flask import Blueprint, request, jsonify, current_app, Response
+from services.metrics import Metrics
+from services.warmup import Warmup
+import hmac
+
+ops_bp = Blueprint('ops', __name__)
+
+@ops_bp.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus metrics for every worker of this deployment"""
+    if not Metrics.available():
+        return jsonify({'error': 'Metrics require the prometheus_client package'}), 501
+
+    # Optional shared secret for scrapers when the endpoint is reachable from outside
+    token = current_app.config.get('METRICS_TOKEN')
+    if token and not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        return jsonify({'error': 'Invalid metrics token'}), 401
+
+    body, content_type = Metrics.render()
+    return Response(body, content_type=content_type)
+
+@ops_bp.route('/healthz', methods=['GET'])
+def healthz():
+    """Liveness: the worker is serving requests (never touches the database)"""
+    return jsonify({'status': 'ok'}), 200
+
+@ops_bp.route('/readyz', methods=['GET'])
+def readyz():
+    """Readiness: warmup has finished in this worker (never touches the database)"""
+    state = Warmup.status(current_app)
+    return jsonify({'status': 'ready' if state['ready'] else 'warming', **state}), 200 if state['ready'] else 503
@@ -1,10 +1,20 @@
-from flask import Blueprint, request, jsonify, current_app, send_file
-from database import db
+from flask import Blueprint, request, jsonify, current_app, Response, stream_with_context
+from database import db, use_replica
 from models.upload import UploadRecord
 from utils.jwt import token_required
+from utils.idempotency import idempotent
+from utils.query_stats import query_budget
 from services.validator import Validator
 from services.file_parser import FileParser
+from services.parse_pool import ParsePool
 from services.price_matcher import PriceMatcher
+from services.exporter import ResultExporter
+from services.file_store import FileStore
+from services.file_download import FileDownloader
+from services.metrics import Metrics
+from services.upload_profiler import UploadProfiler, ProfilerBusy
+from services.admission import AdmissionController, AdmissionRejected
+from contextlib import ExitStack
 import os
 from datetime import datetime
 
@@ -12,6 +22,7 @@ user_bp = Blueprint('user', __name__)
 
 @user_bp.route('/upload/packing-list', methods=['POST'])
 @token_required
+@idempotent  # Retried uploads must not be parsed and recorded twice
 def upload_packing_list():
     """Upload and process packing list"""
     try:
@@ -26,46 +37,68 @@ def upload_packing_list():
         if not validation_result['valid']:
             return jsonify({'error': validation_result['error']}), 400
         
-        # Save file
+        # Save file to scratch space until it is parsed and added to the file store
         filename = validation_result['filename']
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        safe_filename = f"{timestamp}_{filename}"
+        file_path = FileStore.temp_path(filename)
+        with Metrics.stage('upload', 'save'):
+            file.save(file_path)
         
-        upload_folder = current_app.config['UPLOAD_FOLDER']
-        file_path = os.path.join(upload_folder, safe_filename)
-        file.save(file_path)
+        # Admins can ask for this upload's parsing and validation to be profiled
+        profiler = UploadProfiler.from_request()
         
         try:
-            # Parse packing list
-            parse_result = FileParser.parse_packing_list(file_path)
-            
-            if not parse_result['success']:
-                status = 'failed'
-            else:
-                # Validate against price list
-                validation_result = PriceMatcher.validate_items(parse_result['items'])
-                status = validation_result['status']
+            # Waits for a share of the host's parse budget, or raises AdmissionRejected
+            with AdmissionController.admit(request.current_user['user_id'], file_path, 'upload'), ExitStack() as stack:
+                if profiler:
+                    try:
+                        stack.enter_context(profiler)
+                    except ProfilerBusy:
+                        # Another upload took the profiler first; never fail the upload itself over it
+                        profiler = None
+                
+                # Parse packing list; profiled uploads are parsed in-process so the profiler sees the parser
+                parser = FileParser if profiler else ParsePool
+                parse_result = parser.parse_packing_list(file_path)
+                
+                if not parse_result['success']:
+                    status = 'failed'
+                else:
+                    # Validate against price list
+                    with Metrics.stage('upload', 'validate'):
+                        validation_result = PriceMatcher.validate_items(parse_result['items'])
+                    status = validation_result['status']
             
             # Create upload record
+            with Metrics.stage('upload', 'store'):
+                file_digest = FileStore.put(file_path)
             upload_record = UploadRecord(
                 user_id=request.current_user['user_id'],
                 filename=filename,
-                file_path=file_path,
+                file_digest=file_digest,
                 status=status
             )
             
             if parse_result['success']:
                 upload_record.set_items(validation_result['items'])
             
-            db.session.add(upload_record)
-            db.session.commit()
+            with Metrics.stage('upload', 'commit'):
+                db.session.add(upload_record)
+                db.session.commit()
+            Metrics.FLOW_RESULTS.labels(flow='upload', result=status).inc()
+            
+            # The file store now holds its own copy
+            os.remove(file_path)
             
-            return jsonify({
+            response = {
                 'message': 'File uploaded and processed successfully',
                 'upload_id': upload_record.id,
                 'status': status,
                 'summary': validation_result.get('summary') if parse_result['success'] else {'error': parse_result.get('error', 'Unknown parsing error')}
-            }), 200
+            }
+            if profiler:
+                response['profile'] = profiler.save(upload_record.id)
+            
+            return jsonify(response), 200
             
         except Exception as e:
             # Clean up file on error
@@ -73,12 +106,16 @@ def upload_packing_list():
                 os.remove(file_path)
             raise e
             
+    except AdmissionRejected as e:
+        return e.response()
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': f'Upload failed: {str(e)}'}), 500
 
 @user_bp.route('/uploads', methods=['GET'])
 @token_required
+@query_budget(3)  # Polled by the dashboard
+@use_replica
 def get_user_uploads():
     """Get user's upload history"""
     try:
@@ -121,6 +158,8 @@ def get_user_uploads():
 
 @user_bp.route('/upload/<int:upload_id>', methods=['GET'])
 @token_required
+@query_budget(2)  # Polled by the dashboard
+@use_replica
 def get_upload_details(upload_id):
     """Get detailed information about a specific upload"""
     try:
@@ -157,10 +196,11 @@ def download_original_file(upload_id):
         if not upload:
             return jsonify({'error': 'Upload not found'}), 404
             
-        if not upload.file_path or not os.path.exists(upload.file_path):
+        response = FileDownloader.send_upload(upload)
+        if response is None:
             return jsonify({'error': 'Original file not found'}), 404
             
-        return send_file(upload.file_path, as_attachment=True, download_name=upload.filename)
+        return response
         
     except Exception as e:
         return jsonify({'error': f'Failed to download file: {str(e)}'}), 500
@@ -181,8 +221,10 @@ def delete_upload(upload_id):
         if upload.status == 'success':
             return jsonify({'error': 'Cannot delete successful uploads'}), 400
             
-        # Delete associated file if it exists
+        # Delete associated file, cached annotated copies and profiles if they exist
         upload.delete_file()
+        ResultExporter.discard_annotated(upload.id, current_app.config['UPLOAD_FOLDER'])
+        UploadProfiler.discard(upload.id)
         
         # Delete record from database
         db.session.delete(upload)
@@ -238,4 +280,64 @@ def update_upload_item(upload_id, item_index):
         
     except Exception as e:
         db.session.rollback()
-        return jsonify({'error': f'Failed to update item: {str(e)}'}), 500 
\ No newline at end of file
+        return jsonify({'error': f'Failed to update item: {str(e)}'}), 500 
+
+
+@user_bp.route('/upload/<int:upload_id>/export', methods=['GET'])
+@token_required
+def export_upload_results(upload_id):
+    """Export validated items of an upload as CSV or XLSX"""
+    try:
+        upload = UploadRecord.query.filter_by(
+            id=upload_id,
+            user_id=request.current_user['user_id']
+        ).first()
+        
+        if not upload:
+            return jsonify({'error': 'Upload not found'}), 404
+        
+        export_format = request.args.get('format', 'csv').lower()
+        if export_format not in ResultExporter.FORMATS:
+            return jsonify({'error': f'Unsupported format. Allowed: {", ".join(ResultExporter.FORMATS)}'}), 400
+        
+        download_name = f"{os.path.splitext(upload.filename)[0]}_validation.{export_format}"
+        headers = {'Content-Disposition': f'attachment; filename="{download_name}"'}
+        
+        if export_format == 'csv':
+            body = stream_with_context(ResultExporter.stream_csv(upload.iter_items()))
+        else:
+            body = ResultExporter.stream_file(ResultExporter.write_xlsx(upload.iter_items()), delete=True)
+        
+        return Response(body, mimetype=ResultExporter.FORMATS[export_format], headers=headers)
+        
+    except Exception as e:
+        return jsonify({'error': f'Failed to export upload: {str(e)}'}), 500
+
+@user_bp.route('/upload/<int:upload_id>/annotated', methods=['GET'])
+@token_required
+def download_annotated_file(upload_id):
+    """Download the original file with mismatched cells highlighted"""
+    try:
+        upload = UploadRecord.query.filter_by(
+            id=upload_id,
+            user_id=request.current_user['user_id']
+        ).first()
+        
+        if not upload:
+            return jsonify({'error': 'Upload not found'}), 404
+        
+        if not upload.has_file():
+            return jsonify({'error': 'Original file not found'}), 404
+        
+        if not upload.filename.lower().endswith('.xlsx'):
+            return jsonify({'error': 'Annotated copies are only available for .xlsx files'}), 400
+        
+        annotated_path = ResultExporter.get_annotated_copy(upload, current_app.config['UPLOAD_FOLDER'])
+        if annotated_path is None:
+            return jsonify({'error': 'Original file not found'}), 404
+        download_name = f"{os.path.splitext(upload.filename)[0]}_annotated.xlsx"
+        
+        return FileDownloader.send_path(annotated_path, download_name)
+        
+    except Exception as e:
+        return jsonify({'error': f'Failed to build annotated file: {str(e)}'}), 500
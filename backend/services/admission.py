@@ -0,0 +1,198 @@
+from contextlib import contextmanager
+from flask import current_app, jsonify
+from services.metrics import Metrics
+from typing import Dict, Any
+import json
+import os
+import threading
+import time
+import uuid
+import zipfile
+
+try:
+    import fcntl
+except ImportError:  # Without flock (Windows) the limits apply per process instead of per host
+    fcntl = None
+
+class AdmissionRejected(Exception):
+    """Raised when a parse cannot be admitted now (429) or ever (413)"""
+
+    def __init__(self, message: str, status: int = 429, retry_after: int = None):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+    def response(self):
+        response = jsonify({'error': str(self)})
+        if self.retry_after:
+            response.headers['Retry-After'] = str(self.retry_after)
+        return response, self.status
+
+class AdmissionController:
+    """Host-wide admission control for spreadsheet parsing, sized by the bytes each parse reads
+
+    Parses run within ADMISSION_MAX_BYTES of estimated input across all worker
+    processes of the host, and within ADMISSION_USER_MAX_BYTES per user. The
+    ledger of running and queued parses is a JSON file guarded by flock, so every
+    gunicorn worker shares it; entries of dead processes are dropped. A parse that
+    does not fit waits in a FIFO queue for up to ADMISSION_QUEUE_TIMEOUT seconds.
+    """
+
+    POLL_INTERVAL = 0.1  # Seconds between checks of a queued parse
+    STALE_AFTER = 10  # Queued entries not checked for this long belong to a vanished request
+
+    _local_state = {}  # Ledger used when fcntl is unavailable
+    _local_lock = threading.Lock()
+
+    @staticmethod
+    def estimate_cost(path: str) -> int:
+        """Bytes a parse of the file reads: the uncompressed sheet XML of an xlsx, else the file size"""
+        try:
+            with zipfile.ZipFile(path) as archive:
+                size = sum(
+                    info.file_size for info in archive.infolist()
+                    if info.filename.startswith('xl/worksheets/') or info.filename == 'xl/sharedStrings.xml'
+                )
+            if size:
+                return size
+        except (zipfile.BadZipFile, OSError):
+            pass
+        return os.path.getsize(path)
+
+    @classmethod
+    @contextmanager
+    def _ledger(cls):
+        """Ledger state, locked against every other process for the duration of the block"""
+        if fcntl is None:
+            with cls._local_lock:
+                yield cls._local_state
+            return
+
+        with open(current_app.config['ADMISSION_LEDGER'], 'a+') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                f.seek(0)
+                try:
+                    state = json.loads(f.read() or '{}')
+                except ValueError:  # Torn write of a killed process; entries are rebuilt by their owners
+                    state = {}
+                try:
+                    yield state
+                finally:
+                    # Saved even when the block raises, e.g. after removing a timed out entry
+                    f.seek(0)
+                    f.truncate()
+                    json.dump(state, f)
+                    f.flush()
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _alive(pid: int) -> bool:
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            pass
+        return True
+
+    @classmethod
+    def _prune(cls, entries: Dict[str, Any], now: float):
+        """Drop entries left behind by crashed processes or abandoned queued requests"""
+        for token, entry in list(entries.items()):
+            if not cls._alive(entry['pid']) or (entry['state'] == 'queued' and now - entry['seen'] > cls.STALE_AFTER):
+                del entries[token]
+
+    @staticmethod
+    def _running_bytes(entries: Dict[str, Any]) -> int:
+        return sum(entry['cost'] for entry in entries.values() if entry['state'] == 'running')
+
+    @classmethod
+    def _acquire(cls, user_id: int, cost: int) -> str:
+        config = current_app.config
+        limit = config['ADMISSION_MAX_BYTES']
+        retry_after = config['ADMISSION_RETRY_AFTER']
+        if cost > limit:
+            Metrics.FLOW_RESULTS.labels(flow='admission', result='too_large').inc()
+            raise AdmissionRejected(
+                f'File is too large to process: about {cost // (1024 * 1024)} MB of sheet data, '
+                f'the limit is {limit // (1024 * 1024)} MB', status=413
+            )
+
+        token = uuid.uuid4().hex
+        now = time.time()
+        with cls._ledger() as state:
+            entries = state.setdefault('entries', {})
+            cls._prune(entries, now)
+
+            user_bytes = sum(entry['cost'] for entry in entries.values() if entry['user_id'] == user_id)
+            if user_bytes and user_bytes + cost > config['ADMISSION_USER_MAX_BYTES']:
+                Metrics.FLOW_RESULTS.labels(flow='admission', result='user_limit').inc()
+                raise AdmissionRejected('Too many of your uploads are being processed, please retry shortly',
+                                        retry_after=retry_after)
+
+            queued = [entry for entry in entries.values() if entry['state'] == 'queued']
+            entry = {'pid': os.getpid(), 'user_id': user_id, 'cost': cost, 'seen': now}
+            if not queued and cls._running_bytes(entries) + cost <= limit:
+                entries[token] = dict(entry, state='running')
+                Metrics.FLOW_RESULTS.labels(flow='admission', result='admitted').inc()
+                return token
+
+            if len(queued) >= config['ADMISSION_MAX_QUEUED']:
+                Metrics.FLOW_RESULTS.labels(flow='admission', result='queue_full').inc()
+                raise AdmissionRejected('The server is busy processing uploads, please retry shortly',
+                                        retry_after=retry_after)
+
+            state['ticket'] = state.get('ticket', 0) + 1
+            entries[token] = dict(entry, state='queued', ticket=state['ticket'])
+
+        deadline = time.monotonic() + config['ADMISSION_QUEUE_TIMEOUT']
+        while True:
+            time.sleep(cls.POLL_INTERVAL)
+            now = time.time()
+            with cls._ledger() as state:
+                entries = state.setdefault('entries', {})
+                cls._prune(entries, now)
+                entry = entries.get(token)
+                if entry is None:  # Pruned while this process was stalled: queue again at the back
+                    state['ticket'] = state.get('ticket', 0) + 1
+                    entry = entries[token] = {'pid': os.getpid(), 'user_id': user_id, 'cost': cost,
+                                              'state': 'queued', 'ticket': state['ticket']}
+                entry['seen'] = now
+
+                first = min(e['ticket'] for e in entries.values() if e['state'] == 'queued')
+                if entry['ticket'] == first and cls._running_bytes(entries) + cost <= limit:
+                    entry['state'] = 'running'
+                    Metrics.FLOW_RESULTS.labels(flow='admission', result='queued').inc()
+                    return token
+
+                if time.monotonic() >= deadline:
+                    del entries[token]
+                    Metrics.FLOW_RESULTS.labels(flow='admission', result='timeout').inc()
+                    raise AdmissionRejected('The server is busy processing uploads, please retry shortly',
+                                            retry_after=retry_after)
+
+    @classmethod
+    def _release(cls, token: str):
+        with cls._ledger() as state:
+            state.setdefault('entries', {}).pop(token, None)
+
+    @classmethod
+    @contextmanager
+    def admit(cls, user_id: int, path: str, flow: str):
+        """Hold a share of the parse budget for the file at path while the block runs
+
+        Raises AdmissionRejected when the user is over their share, the queue is full
+        or the wait times out (429), or the file alone exceeds the budget (413).
+        """
+        if not current_app.config['ADMISSION_CONTROL']:
+            yield
+            return
+
+        with Metrics.stage(flow, 'admission'):
+            token = cls._acquire(user_id, cls.estimate_cost(path))
+        try:
+            yield
+        finally:
+            cls._release(token)
@@ -0,0 +1,82 @@
+from database import db
+from models.upload import UploadRecord
+from sqlalchemy.orm import load_only
+from typing import List, Dict, Any, Optional
+
+class AutoApprover:
+    """Service class for approving pending uploads that meet configured criteria"""
+    
+    ITEM_FIELDS = ('row', 'price_match_status', 'price', 'expected_price')  # Item keys check_items reads
+    
+    @staticmethod
+    def check_items(items: List[Dict[str, Any]], max_mismatch_pct: float, allow_not_found: bool = False) -> Optional[str]:
+        """Return None if the items qualify for auto-approval, otherwise the reason they don't"""
+        if not items:
+            return 'No items'
+        
+        for item in items:
+            status = item.get('price_match_status', 'error')
+            
+            if status == 'error':
+                return f"Row {item.get('row')}: parsing errors"
+            
+            if status == 'not_found' and not allow_not_found:
+                return f"Row {item.get('row')}: item code not found"
+            
+            if status == 'mismatch':
+                expected = item.get('expected_price')
+                if not expected:
+                    return f"Row {item.get('row')}: no expected price"
+                
+                difference_pct = abs(item['price'] - expected) / expected * 100
+                if difference_pct > max_mismatch_pct:
+                    return f"Row {item.get('row')}: price differs by {difference_pct:.2f}%"
+        
+        return None
+    
+    @staticmethod
+    def sweep(max_mismatch_pct: float, allow_not_found: bool = False, batch_size: int = 200,
+              max_batches: Optional[int] = None, dry_run: bool = False) -> Dict[str, Any]:
+        """Scan pending uploads in id order and approve qualifying ones batch by batch"""
+        result = {
+            'scanned': 0,
+            'approved': 0,
+            'approved_ids': [],
+            'batches': 0,
+            'dry_run': dry_run
+        }
+        comment = f'Auto-approved: all price differences within {max_mismatch_pct:g}%'
+        last_id = 0
+        
+        while max_batches is None or result['batches'] < max_batches:
+            # Keyset pagination keeps each batch query cheap regardless of queue depth
+            batch = UploadRecord.query.options(
+                load_only(UploadRecord.id, UploadRecord.items, UploadRecord.items_packed)
+            ).filter(
+                UploadRecord.status == 'pending',
+                UploadRecord.id > last_id
+            ).order_by(UploadRecord.id).limit(batch_size).all()
+            
+            if not batch:
+                break
+            
+            last_id = batch[-1].id
+            eligible_ids = [
+                upload.id for upload in batch
+                if AutoApprover.check_items(upload.get_items(AutoApprover.ITEM_FIELDS), max_mismatch_pct, allow_not_found) is None
+            ]
+            
+            # Release loaded item payloads before the next batch
+            db.session.expunge_all()
+            
+            if eligible_ids and not dry_run:
+                query = UploadRecord.query.filter(UploadRecord.id.in_(eligible_ids))
+                result['approved'] += UploadRecord.bulk_review(query, 'approved', comment)
+            elif eligible_ids:
+                result['approved'] += len(eligible_ids)
+            
+            result['approved_ids'].extend(eligible_ids)
+            result['scanned'] += len(batch)
+            result['batches'] += 1
+        
+        return result
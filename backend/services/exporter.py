@@ -0,0 +1,265 @@
+from services.file_parser import FileParser
+from typing import Dict, Any, Iterable, Iterator, Optional
+import csv
+import glob
+import io
+import json
+import os
+import tempfile
+import zlib
+
+class ResultExporter:
+    """Service class for exporting validation results as files"""
+
+    COLUMNS = [
+        ('row', 'Row'),
+        ('item_code', 'Item Code'),
+        ('original_item_code', 'Original Item Code'),
+        ('quantity', 'Quantity'),
+        ('price', 'Price'),
+        ('expected_price', 'Expected Price'),
+        ('price_match_status', 'Status'),
+        ('tolerance_rule', 'Tolerance Rule'),
+        ('errors', 'Errors'),
+        ('suggestions', 'Suggestions')
+    ]
+
+    CSV_FLUSH_ROWS = 1000  # Rows buffered per chunk sent to the client
+    FILE_CHUNK_SIZE = 64 * 1024
+
+    # Fill colours used to highlight cells in annotated copies
+    HIGHLIGHTS = {
+        'mismatch': 'FFC7CE',
+        'not_found': 'FFEB9C',
+        'error': 'F4B084',
+        'accepted': 'DDEBF7'
+    }
+
+    FORMATS = {
+        'csv': 'text/csv',
+        'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    }
+
+    @staticmethod
+    def _row_values(item: Dict[str, Any]) -> list:
+        """Flatten one validated item into export cell values"""
+        values = []
+        for key, _ in ResultExporter.COLUMNS:
+            if key == 'errors':
+                value = '; '.join(item.get('validation_errors', []) + item.get('price_validation_errors', []))
+            elif key == 'suggestions':
+                value = ', '.join(s['item_code'] for s in item.get('suggestions', []))
+            else:
+                value = item.get(key)
+            values.append('' if value is None else value)
+        return values
+
+    @staticmethod
+    def stream_csv(items: Iterable[Dict[str, Any]]) -> Iterator[str]:
+        """Yield CSV text in chunks without building the whole file in memory"""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow([header for _, header in ResultExporter.COLUMNS])
+
+        for count, item in enumerate(items, 1):
+            writer.writerow(ResultExporter._row_values(item))
+            if count % ResultExporter.CSV_FLUSH_ROWS == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+
+        yield buffer.getvalue()
+
+    @staticmethod
+    def write_xlsx(items: Iterable[Dict[str, Any]]) -> str:
+        """Write items to a temporary xlsx file in write-only mode and return its path"""
+        from openpyxl import Workbook
+
+        workbook = Workbook(write_only=True)
+        worksheet = workbook.create_sheet('Validation Results')
+        worksheet.append([header for _, header in ResultExporter.COLUMNS])
+
+        for item in items:
+            worksheet.append(ResultExporter._row_values(item))
+
+        handle, path = tempfile.mkstemp(suffix='.xlsx')
+        os.close(handle)
+        try:
+            workbook.save(path)
+        except Exception:
+            os.remove(path)
+            raise
+        return path
+
+    @staticmethod
+    def stream_file(path: str, delete: bool = False) -> Iterator[bytes]:
+        """Yield a file in fixed-size chunks, optionally deleting it afterwards"""
+        try:
+            with open(path, 'rb') as f:
+                while True:
+                    chunk = f.read(ResultExporter.FILE_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    yield chunk
+        finally:
+            if delete and os.path.exists(path):
+                os.remove(path)
+
+    @staticmethod
+    def _annotated_dir(upload_folder: str) -> str:
+        path = os.path.join(upload_folder, 'annotated')
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    @staticmethod
+    def get_annotated_copy(upload, upload_folder: str) -> Optional[str]:
+        """Return a cached copy of the original file with problem cells highlighted, or None if the original is missing"""
+        from openpyxl import load_workbook
+        from openpyxl.comments import Comment
+        from openpyxl.styles import PatternFill
+
+        # Cache key changes whenever the stored items change (e.g. after item edits)
+        digest = upload.items_digest()
+        annotated_dir = ResultExporter._annotated_dir(upload_folder)
+        cached_path = os.path.join(annotated_dir, f'{upload.id}_{digest}.xlsx')
+        if os.path.exists(cached_path):
+            return cached_path
+
+        ResultExporter.discard_annotated(upload.id, upload_folder)
+
+        # The stored original may be compressed, and the xlsx reader needs a seekable file
+        f = upload.open_file()
+        if f is None:
+            return None
+        with f:
+            workbook = load_workbook(io.BytesIO(f.read()))
+        worksheet = workbook.worksheets[0]
+
+        # Locate columns the same way the parser does
+        headers = {}
+        for cell in next(worksheet.iter_rows(min_row=1, max_row=1)):
+            if cell.value is not None:
+                headers[str(cell.value).strip().lower()] = cell.column
+        columns = {
+            field: headers.get(FileParser._find_column(list(headers), names))
+            for field, names in FileParser.PACKING_LIST_COLUMNS.items()
+        }
+
+        fills = {
+            status: PatternFill(start_color=color, end_color=color, fill_type='solid')
+            for status, color in ResultExporter.HIGHLIGHTS.items()
+        }
+
+        for item in upload.iter_items():
+            status = item.get('price_match_status')
+            if status not in fills:
+                continue
+
+            # Parsed rows are numbered from the first data row, below the header
+            column = columns['price'] if status in ('mismatch', 'accepted') else columns['item_code']
+            if column is None:
+                continue
+            cell = worksheet.cell(row=item['row'] + 1, column=column)
+            cell.fill = fills[status]
+
+            notes = item.get('validation_errors', []) + item.get('price_validation_errors', [])
+            if status == 'accepted':
+                notes.append(f"Accepted by tolerance rule: {item.get('tolerance_rule')}")
+            if item.get('suggestions'):
+                notes.append('Did you mean: ' + ', '.join(s['item_code'] for s in item['suggestions']))
+            if notes:
+                cell.comment = Comment('\n'.join(notes), 'Validator')
+
+        temp_path = cached_path + '.tmp'
+        workbook.save(temp_path)
+        os.replace(temp_path, cached_path)
+        return cached_path
+
+    @staticmethod
+    def discard_annotated(upload_id: int, upload_folder: str):
+        """Remove cached annotated copies of an upload"""
+        pattern = os.path.join(upload_folder, 'annotated', f'{upload_id}_*.xlsx')
+        for path in glob.glob(pattern):
+            os.remove(path)
+
+class TableExporter:
+    """Service class for streaming reference tables (price list, duty rates) in bulk"""
+
+    FORMATS = {
+        'ndjson': 'application/x-ndjson',
+        'csv': 'text/csv',
+        'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    }
+
+    YIELD_PER = 2000  # Rows fetched per round-trip from the server-side cursor
+    FLUSH_ROWS = 1000
+
+    @staticmethod
+    def iter_rows(query) -> Iterator[tuple]:
+        """Iterate a column query through a server-side cursor in fixed-size batches"""
+        return iter(query.execution_options(stream_results=True).yield_per(TableExporter.YIELD_PER))
+
+    @staticmethod
+    def _cell(value):
+        return value.isoformat() if hasattr(value, 'isoformat') else value
+
+    @staticmethod
+    def stream_ndjson(rows: Iterable[tuple], fields: list) -> Iterator[str]:
+        """Yield one JSON object per line, flushed in batches"""
+        lines = []
+        for row in rows:
+            lines.append(json.dumps({field: TableExporter._cell(value) for field, value in zip(fields, row)}))
+            if len(lines) >= TableExporter.FLUSH_ROWS:
+                yield '\n'.join(lines) + '\n'
+                lines = []
+        if lines:
+            yield '\n'.join(lines) + '\n'
+
+    @staticmethod
+    def stream_csv(rows: Iterable[tuple], fields: list) -> Iterator[str]:
+        """Yield CSV text in batches"""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(fields)
+
+        for count, row in enumerate(rows, 1):
+            writer.writerow([TableExporter._cell(value) for value in row])
+            if count % TableExporter.FLUSH_ROWS == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+
+        yield buffer.getvalue()
+
+    @staticmethod
+    def write_xlsx(rows: Iterable[tuple], fields: list, sheet_name: str) -> str:
+        """Write rows to a temporary xlsx file in write-only mode and return its path"""
+        from openpyxl import Workbook
+
+        workbook = Workbook(write_only=True)
+        worksheet = workbook.create_sheet(sheet_name)
+        worksheet.append(fields)
+
+        for row in rows:
+            worksheet.append(list(row))
+
+        handle, path = tempfile.mkstemp(suffix='.xlsx')
+        os.close(handle)
+        try:
+            workbook.save(path)
+        except Exception:
+            os.remove(path)
+            raise
+        return path
+
+    @staticmethod
+    def gzip_stream(chunks: Iterable) -> Iterator[bytes]:
+        """Compress a stream of text or byte chunks on the fly"""
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31 writes a gzip container
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            compressed = compressor.compress(chunk)
+            if compressed:
+                yield compressed
+        yield compressor.flush()
@@ -0,0 +1,79 @@
+from services.file_store import FileStore
+from flask import current_app, request, send_file, redirect, Response
+from typing import Optional
+import mimetypes
+import os
+
+class FileDownloader:
+    """Builds download responses, offloading the transfer to the front proxy when configured"""
+    
+    @staticmethod
+    def _offload(path: str, download_name: str) -> Optional[Response]:
+        """Response that asks the proxy to send the file, or None to send it directly"""
+        mode = current_app.config.get('FILE_DOWNLOAD_MODE', 'direct')
+        if mode == 'direct':
+            return None
+        
+        headers = {'Content-Disposition': f'attachment; filename="{download_name}"'}
+        
+        if mode == 'x-accel':
+            upload_folder = os.path.realpath(current_app.config['UPLOAD_FOLDER'])
+            real_path = os.path.realpath(path)
+            # nginx can only reach files under the internal location that aliases UPLOAD_FOLDER
+            if os.path.commonpath([upload_folder, real_path]) != upload_folder:
+                return None
+            relative_path = os.path.relpath(real_path, upload_folder).replace(os.sep, '/')
+            headers['X-Accel-Redirect'] = current_app.config['X_ACCEL_REDIRECT_PREFIX'].rstrip('/') + '/' + relative_path
+        elif mode == 'x-sendfile':
+            headers['X-Sendfile'] = os.path.realpath(path)
+        else:
+            raise ValueError(f'Unknown FILE_DOWNLOAD_MODE: {mode}')
+        
+        mimetype = mimetypes.guess_type(download_name)[0] or 'application/octet-stream'
+        return Response(status=200, mimetype=mimetype, headers=headers)
+    
+    @staticmethod
+    def send_path(path: str, download_name: str) -> Response:
+        """Send a file on local disk, supporting conditional and range requests in direct mode"""
+        offloaded = FileDownloader._offload(path, download_name)
+        if offloaded is not None:
+            return offloaded
+        
+        return send_file(path, as_attachment=True, download_name=download_name, conditional=True)
+    
+    @staticmethod
+    def send_upload(upload) -> Optional[Response]:
+        """Send an upload's original file, or None if it is missing"""
+        path = upload.local_file_path()
+        if path:
+            return FileDownloader.send_path(path, upload.filename)
+        
+        if not upload.file_digest:
+            return None
+        
+        stored = FileStore.get(upload.file_digest)
+        if stored is None:
+            return None
+        
+        # Let the client fetch the object straight from the bucket once the auth check has passed
+        if current_app.config.get('FILE_DOWNLOAD_PRESIGNED'):
+            url = FileStore.presigned_url(stored, upload.filename)
+            if url:
+                return redirect(url, code=302)
+        
+        # Compressed objects are decompressed on the fly; the digest doubles as a strong ETag
+        # and the known original size lets range requests skip into the stream. Setting the
+        # length up front keeps make_conditional from buffering the stream to measure it.
+        mimetype = mimetypes.guess_type(upload.filename)[0] or 'application/octet-stream'
+        response = Response(
+            FileStore.iter_chunks(stored),
+            mimetype=mimetype,
+            headers={
+                'Content-Disposition': f'attachment; filename="{upload.filename}"',
+                'Content-Length': str(stored.size)
+            }
+        )
+        response.set_etag(stored.digest)
+        response.last_modified = stored.created_at
+        response.headers['Accept-Ranges'] = 'bytes'
+        return response.make_conditional(request, accept_ranges=True, complete_length=stored.size)
@@ -1,24 +1,37 @@
-import pandas as pd
+from services.metrics import Metrics
 from typing import List, Dict, Any
 import os
 
 class FileParser:
     """Service class for parsing Excel files"""
     
+    # Accepted header names for packing list columns
+    PACKING_LIST_COLUMNS = {
+        'item_code': ['item code', 'item_code', 'code', 'product code'],
+        'quantity': ['quantity', 'qty', 'amount'],
+        'price': ['price', 'unit price', 'unit_price', 'cost']
+    }
+    
     @staticmethod
     def parse_packing_list(file_path: str) -> Dict[str, Any]:
         """Parse packing list Excel file and extract item information"""
+        # pandas is imported on first parse so that startup and light endpoints stay fast
+        import pandas as pd
+        
         try:
             # Read Excel file
-            df = pd.read_excel(file_path, engine='openpyxl')
+            with Metrics.stage('upload', 'read_excel'):
+                df = pd.read_excel(file_path, engine='openpyxl')
+            Metrics.BYTES_READ.labels(flow='upload').inc(os.path.getsize(file_path))
+            Metrics.ROWS_PARSED.labels(flow='upload').inc(len(df))
             
             # Clean column names (remove extra spaces, convert to lowercase)
             df.columns = df.columns.str.strip().str.lower()
             
             # Try to find relevant columns (flexible column matching)
-            item_code_col = FileParser._find_column(df.columns, ['item code', 'item_code', 'code', 'product code'])
-            quantity_col = FileParser._find_column(df.columns, ['quantity', 'qty', 'amount'])
-            price_col = FileParser._find_column(df.columns, ['price', 'unit price', 'unit_price', 'cost'])
+            item_code_col = FileParser._find_column(df.columns, FileParser.PACKING_LIST_COLUMNS['item_code'])
+            quantity_col = FileParser._find_column(df.columns, FileParser.PACKING_LIST_COLUMNS['quantity'])
+            price_col = FileParser._find_column(df.columns, FileParser.PACKING_LIST_COLUMNS['price'])
             
             if not all([item_code_col, quantity_col, price_col]):
                 return {
@@ -30,28 +43,29 @@ class FileParser:
             items = []
             errors = []
             
-            for index, row in df.iterrows():
-                try:
-                    item = {
-                        'row': index + 1,
-                        'item_code': str(row[item_code_col]).strip() if pd.notna(row[item_code_col]) else None,
-                        'quantity': float(row[quantity_col]) if pd.notna(row[quantity_col]) else None,
-                        'price': float(row[price_col]) if pd.notna(row[price_col]) else None,
-                        'validation_errors': []
-                    }
-                    
-                    # Validate required fields
-                    if not item['item_code']:
-                        item['validation_errors'].append('Missing item code')
-                    if item['quantity'] is None or item['quantity'] <= 0:
-                        item['validation_errors'].append('Invalid quantity')
-                    if item['price'] is None or item['price'] <= 0:
-                        item['validation_errors'].append('Invalid price')
-                    
-                    items.append(item)
-                    
-                except Exception as e:
-                    errors.append(f"Row {index + 1}: {str(e)}")
+            with Metrics.stage('upload', 'row_loop'):
+                for index, row in df.iterrows():
+                    try:
+                        item = {
+                            'row': index + 1,
+                            'item_code': str(row[item_code_col]).strip() if pd.notna(row[item_code_col]) else None,
+                            'quantity': float(row[quantity_col]) if pd.notna(row[quantity_col]) else None,
+                            'price': float(row[price_col]) if pd.notna(row[price_col]) else None,
+                            'validation_errors': []
+                        }
+                        
+                        # Validate required fields
+                        if not item['item_code']:
+                            item['validation_errors'].append('Missing item code')
+                        if item['quantity'] is None or item['quantity'] <= 0:
+                            item['validation_errors'].append('Invalid quantity')
+                        if item['price'] is None or item['price'] <= 0:
+                            item['validation_errors'].append('Invalid price')
+                        
+                        items.append(item)
+                        
+                    except Exception as e:
+                        errors.append(f"Row {index + 1}: {str(e)}")
             
             return {
                 'success': len(errors) == 0,
@@ -70,8 +84,13 @@ class FileParser:
     @staticmethod
     def parse_price_list(file_path: str) -> Dict[str, Any]:
         """Parse price list Excel file"""
+        import pandas as pd
+        
         try:
-            df = pd.read_excel(file_path, engine='openpyxl')
+            with Metrics.stage('price_import', 'read_excel'):
+                df = pd.read_excel(file_path, engine='openpyxl')
+            Metrics.BYTES_READ.labels(flow='price_import').inc(os.path.getsize(file_path))
+            Metrics.ROWS_PARSED.labels(flow='price_import').inc(len(df))
             df.columns = df.columns.str.strip().str.lower()
             
             item_code_col = FileParser._find_column(df.columns, ['item code', 'item_code', 'code'])
@@ -86,18 +105,19 @@ class FileParser:
             price_data = {}
             errors = []
             
-            for index, row in df.iterrows():
-                try:
-                    item_code = str(row[item_code_col]).strip() if pd.notna(row[item_code_col]) else None
-                    price = float(row[price_col]) if pd.notna(row[price_col]) else None
-                    
-                    if item_code and price is not None and price > 0:
-                        price_data[item_code] = price
-                    else:
-                        errors.append(f"Row {index + 1}: Invalid item code or price")
+            with Metrics.stage('price_import', 'row_loop'):
+                for index, row in df.iterrows():
+                    try:
+                        item_code = str(row[item_code_col]).strip() if pd.notna(row[item_code_col]) else None
+                        price = float(row[price_col]) if pd.notna(row[price_col]) else None
                         
-                except Exception as e:
-                    errors.append(f"Row {index + 1}: {str(e)}")
+                        if item_code and price is not None and price > 0:
+                            price_data[item_code] = price
+                        else:
+                            errors.append(f"Row {index + 1}: Invalid item code or price")
+                            
+                    except Exception as e:
+                        errors.append(f"Row {index + 1}: {str(e)}")
             
             return {
                 'success': len(errors) == 0,
@@ -115,8 +135,13 @@ class FileParser:
     @staticmethod
     def parse_duty_rates(file_path: str) -> Dict[str, Any]:
         """Parse duty rates Excel file"""
+        import pandas as pd
+        
         try:
-            df = pd.read_excel(file_path, engine='openpyxl')
+            with Metrics.stage('duty_import', 'read_excel'):
+                df = pd.read_excel(file_path, engine='openpyxl')
+            Metrics.BYTES_READ.labels(flow='duty_import').inc(os.path.getsize(file_path))
+            Metrics.ROWS_PARSED.labels(flow='duty_import').inc(len(df))
             df.columns = df.columns.str.strip().str.lower()
             
             item_code_col = FileParser._find_column(df.columns, ['item code', 'item_code', 'code'])
@@ -131,18 +156,19 @@ class FileParser:
             rate_data = {}
             errors = []
             
-            for index, row in df.iterrows():
-                try:
-                    item_code = str(row[item_code_col]).strip() if pd.notna(row[item_code_col]) else None
-                    rate = float(row[rate_col]) if pd.notna(row[rate_col]) else None
-                    
-                    if item_code and rate is not None and rate >= 0:
-                        rate_data[item_code] = rate
-                    else:
-                        errors.append(f"Row {index + 1}: Invalid item code or rate")
+            with Metrics.stage('duty_import', 'row_loop'):
+                for index, row in df.iterrows():
+                    try:
+                        item_code = str(row[item_code_col]).strip() if pd.notna(row[item_code_col]) else None
+                        rate = float(row[rate_col]) if pd.notna(row[rate_col]) else None
                         
-                except Exception as e:
-                    errors.append(f"Row {index + 1}: {str(e)}")
+                        if item_code and rate is not None and rate >= 0:
+                            rate_data[item_code] = rate
+                        else:
+                            errors.append(f"Row {index + 1}: Invalid item code or rate")
+                            
+                    except Exception as e:
+                        errors.append(f"Row {index + 1}: {str(e)}")
             
             return {
                 'success': len(errors) == 0,
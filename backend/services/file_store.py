@@ -0,0 +1,217 @@
+from database import db
+from models.stored_file import StoredFile
+from services.storage import get_storage
+from flask import current_app
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from typing import BinaryIO, Iterator, Optional
+from datetime import datetime
+import hashlib
+import logging
+import os
+import uuid
+
+try:
+    import zstandard
+except ImportError:  # Compression at rest is optional
+    zstandard = None
+
+logger = logging.getLogger('packing_list.file_store')
+
+RELEASED_OBJECTS = 'file_store_released_objects'  # Session.info key of objects to delete on commit
+
+class FileStore:
+    """Content-addressed, deduplicated store for original upload files"""
+    
+    CHUNK_SIZE = 1024 * 1024
+    
+    @staticmethod
+    def object_key(digest: str, compression: Optional[str] = None) -> str:
+        """Storage key of an object, fanned out by the first two byte pairs of its digest"""
+        suffix = '.zst' if compression == 'zstd' else ''
+        return f"{digest[:2]}/{digest[2:4]}/{digest}{suffix}"
+    
+    @staticmethod
+    def local_path(stored: StoredFile) -> Optional[str]:
+        """Filesystem path of an uncompressed object, if the backend keeps objects on local disk"""
+        if stored.compression:
+            return None
+        return get_storage().local_path(FileStore.object_key(stored.digest))
+    
+    @staticmethod
+    def temp_path(filename: str, prefix: str = '') -> str:
+        """Unique scratch path for a file being received or parsed"""
+        temp_dir = os.path.join(current_app.config['UPLOAD_FOLDER'], 'tmp')
+        os.makedirs(temp_dir, exist_ok=True)
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        return os.path.join(temp_dir, f"{prefix}{timestamp}_{uuid.uuid4().hex[:8]}_{filename}")
+    
+    @staticmethod
+    def hash_file(path: str) -> str:
+        """SHA-256 of a file, read in chunks"""
+        sha256 = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(FileStore.CHUNK_SIZE), b''):
+                sha256.update(chunk)
+        return sha256.hexdigest()
+    
+    @staticmethod
+    def _compression() -> Optional[str]:
+        config = current_app.config
+        setting = config.get('FILE_STORE_COMPRESSION', 'auto')
+        if setting == 'auto':
+            # Only uncompressed objects can be handed to the proxy or fetched through a presigned URL
+            offloaded = config.get('FILE_DOWNLOAD_MODE', 'direct') != 'direct' or config.get('FILE_DOWNLOAD_PRESIGNED')
+            setting = 'none' if offloaded else 'zstd'
+        if setting == 'zstd' and zstandard is not None:
+            return 'zstd'
+        return None
+    
+    @staticmethod
+    def _write_object(source_path: str, digest: str, compression: Optional[str]) -> int:
+        """Stream an object into storage and return its stored size"""
+        with open(source_path, 'rb') as src:
+            if compression == 'zstd':
+                level = current_app.config.get('FILE_STORE_ZSTD_LEVEL', 3)
+                # Compressed on the fly, so large files go out as a multipart upload without a temp copy
+                with zstandard.ZstdCompressor(level=level).stream_reader(
+                    src, read_size=FileStore.CHUNK_SIZE, closefd=False
+                ) as reader:
+                    return get_storage().put(FileStore.object_key(digest, compression), reader)
+            return get_storage().put(FileStore.object_key(digest, compression), src)
+    
+    @staticmethod
+    def _insert_if_absent(values: dict) -> bool:
+        """Insert a stored_files row within the caller's transaction; False if the digest already exists"""
+        dialect = db.engine.dialect.name
+        if dialect in ('sqlite', 'postgresql'):
+            # No savepoint: pysqlite commits the outer transaction when one is released
+            if dialect == 'sqlite':
+                from sqlalchemy.dialects.sqlite import insert
+            else:
+                from sqlalchemy.dialects.postgresql import insert
+            result = db.session.execute(
+                insert(StoredFile).values(**values).on_conflict_do_nothing(index_elements=['digest'])
+            )
+            return result.rowcount == 1
+        
+        try:
+            with db.session.begin_nested():
+                db.session.add(StoredFile(**values))
+            return True
+        except IntegrityError:
+            return False
+    
+    @staticmethod
+    def put(source_path: str) -> str:
+        """Add a reference to the file's content, storing it only if it is new
+        
+        The reference count change joins the caller's transaction; an object
+        written for a transaction that is later rolled back is left for the
+        orphan collector.
+        """
+        digest = FileStore.hash_file(source_path)
+        
+        for _ in range(2):
+            stored = StoredFile.query.filter_by(digest=digest).first()
+            if stored is not None:
+                StoredFile.query.filter_by(digest=digest).update(
+                    {'ref_count': StoredFile.ref_count + 1}, synchronize_session=False
+                )
+                # Restore content lost from storage while its metadata survived
+                if not get_storage().exists(FileStore.object_key(digest, stored.compression)):
+                    FileStore._write_object(source_path, digest, stored.compression)
+                return digest
+            
+            compression = FileStore._compression()
+            stored_size = FileStore._write_object(source_path, digest, compression)
+            if FileStore._insert_if_absent({
+                'digest': digest,
+                'size': os.path.getsize(source_path),
+                'stored_size': stored_size,
+                'compression': compression,
+                'ref_count': 1
+            }):
+                return digest
+            # Another request stored the same content first; take a reference to it instead
+        
+        raise RuntimeError(f'Could not store file {digest}')
+    
+    @staticmethod
+    def release(digest: str):
+        """Drop one reference; the object is deleted once nothing refers to it and the transaction commits"""
+        StoredFile.query.filter_by(digest=digest).update(
+            {'ref_count': StoredFile.ref_count - 1}, synchronize_session=False
+        )
+        # The bulk UPDATE bypassed the identity map, so reload the row rather than trusting a cached copy
+        stored = StoredFile.query.filter_by(digest=digest).populate_existing().first()
+        if stored is not None and stored.ref_count <= 0:
+            db.session.delete(stored)
+            db.session.info.setdefault(RELEASED_OBJECTS, []).append(FileStore.object_key(digest, stored.compression))
+    
+    @staticmethod
+    def get(digest: str) -> Optional[StoredFile]:
+        """Stored file metadata if the object exists in storage"""
+        stored = StoredFile.query.filter_by(digest=digest).first()
+        if stored is None or not get_storage().exists(FileStore.object_key(digest, stored.compression)):
+            return None
+        return stored
+    
+    @staticmethod
+    def open(stored: StoredFile) -> BinaryIO:
+        """Open an object for reading, decompressing on the fly if needed"""
+        return FileStore._open(get_storage(), FileStore.object_key(stored.digest, stored.compression), stored.compression)
+    
+    @staticmethod
+    def _open(storage, key: str, compression: Optional[str]) -> BinaryIO:
+        f = storage.open(key)
+        if compression == 'zstd':
+            return zstandard.ZstdDecompressor().stream_reader(f, read_size=FileStore.CHUNK_SIZE, closefd=True)
+        return f
+    
+    @staticmethod
+    def presigned_url(stored: StoredFile, download_name: str) -> Optional[str]:
+        """Direct download URL for an uncompressed object, if the backend supports one"""
+        if stored.compression:
+            return None
+        return get_storage().presigned_url(
+            FileStore.object_key(stored.digest), download_name,
+            current_app.config.get('PRESIGNED_URL_EXPIRES', 300)
+        )
+    
+    @staticmethod
+    def iter_chunks(stored: StoredFile) -> Iterator[bytes]:
+        """Yield an object's original content in chunks
+        
+        The backend and key are resolved immediately so the returned generator can
+        be consumed after the request context is gone (e.g. by a streamed response).
+        The object is opened on the first chunk, so a response that is never sent
+        (e.g. a 304) leaves nothing open.
+        """
+        storage = get_storage()
+        key = FileStore.object_key(stored.digest, stored.compression)
+        compression = stored.compression
+        
+        def generate():
+            with FileStore._open(storage, key, compression) as f:
+                for chunk in iter(lambda: f.read(FileStore.CHUNK_SIZE), b''):
+                    yield chunk
+        
+        return generate()
+
+@event.listens_for(Session, 'after_commit')
+def _delete_released_objects(session):
+    """Delete the objects released in the committed transaction"""
+    for key in session.info.pop(RELEASED_OBJECTS, ()):
+        try:
+            get_storage().delete(key)
+        except Exception as e:
+            # The row is gone, so the orphan collector removes the object later
+            logger.warning('Could not delete released object %s: %s', key, e)
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _forget_released_objects(session, previous_transaction):
+    """Keep the objects of a rolled back transaction, whose references survive"""
+    if not previous_transaction.nested:
+        session.info.pop(RELEASED_OBJECTS, None)
@@ -0,0 +1,143 @@
+from database import db
+from models.price import PriceList
+from services.metrics import Metrics
+from collections import Counter, defaultdict
+from array import array
+from typing import List, Dict, Any, Optional
+import heapq
+import re
+import threading
+import time
+
+class ItemCodeIndex:
+    """In-memory trigram index over price list item codes"""
+
+    NGRAM_SIZE = 3
+    DEFAULT_TOP_K = 5
+    MIN_SIMILARITY = 0.3
+    MAX_POSTINGS = 1000  # Grams shared by more codes than this are skipped when rarer ones exist
+    CANDIDATE_FACTOR = 10  # Candidates scored exactly per requested suggestion
+    REFRESH_CHECK_INTERVAL = 30  # Seconds between staleness checks against the database
+
+    _FLOAT_CODE = re.compile(r'^(\d+)\.0+$')
+    _SEPARATORS = re.compile(r'[-_./]')
+
+    _current = None
+    _signature = None
+    _checked_at = 0.0
+    _lock = threading.Lock()
+
+    def __init__(self, item_codes):
+        self.codes = list(item_codes)
+        self.keys = {}  # normalized key -> list of item codes
+        self.gram_keys = [self._gram_key(code) for code in self.codes]
+        self.postings = defaultdict(lambda: array('I'))
+
+        for code_id, code in enumerate(self.codes):
+            self.keys.setdefault(self.normalize(code), []).append(code)
+            for gram in self._grams(self.gram_keys[code_id]):
+                self.postings[gram].append(code_id)
+
+        self.postings = dict(self.postings)
+
+    @classmethod
+    def normalize(cls, item_code) -> str:
+        """Normalize an item code for case, whitespace and Excel number mangling"""
+        key = ''.join(str(item_code).split()).upper()
+
+        # Excel stores numeric codes as floats, e.g. "00123" comes back as "123.0"
+        match = cls._FLOAT_CODE.match(key)
+        if match:
+            key = match.group(1)
+
+        if key.isdigit():
+            key = key.lstrip('0') or '0'
+
+        return key
+
+    @classmethod
+    def _gram_key(cls, item_code) -> str:
+        """Key used for similarity, which also ignores separator differences"""
+        return cls._SEPARATORS.sub('', cls.normalize(item_code))
+
+    @classmethod
+    def _grams(cls, key: str) -> set:
+        """Split a normalized key into padded character n-grams"""
+        padded = ' ' * (cls.NGRAM_SIZE - 1) + key + ' '
+        return {padded[i:i + cls.NGRAM_SIZE] for i in range(len(padded) - cls.NGRAM_SIZE + 1)}
+
+    def resolve(self, item_code) -> Optional[str]:
+        """Return the single price list code sharing the normalized key, if unambiguous"""
+        candidates = self.keys.get(self.normalize(item_code))
+        if candidates and len(candidates) == 1:
+            return candidates[0]
+        return None
+
+    def suggest(self, item_code, top_k: int = None) -> List[Dict[str, Any]]:
+        """Return the top-k most similar price list codes by trigram similarity"""
+        top_k = top_k or self.DEFAULT_TOP_K
+        grams = self._grams(self._gram_key(item_code))
+
+        postings = sorted(
+            (self.postings[gram] for gram in grams if gram in self.postings),
+            key=len
+        )
+        if not postings:
+            return []
+
+        # Very common grams (shared prefixes) add little signal but dominate the cost,
+        # so candidates come from the selective grams and are then scored exactly
+        selective = [p for p in postings if len(p) <= self.MAX_POSTINGS] or postings[:1]
+
+        shared = Counter()
+        for posting in selective:
+            shared.update(posting)
+
+        scored = []
+        for code_id, _ in shared.most_common(self.CANDIDATE_FACTOR * top_k):
+            candidate_grams = self._grams(self.gram_keys[code_id])
+            common = len(grams & candidate_grams)
+            similarity = common / (len(grams) + len(candidate_grams) - common)
+            if similarity >= self.MIN_SIMILARITY:
+                scored.append((similarity, code_id))
+
+        return [
+            {'item_code': self.codes[code_id], 'score': round(similarity, 3)}
+            for similarity, code_id in heapq.nlargest(top_k, scored)
+        ]
+
+    @classmethod
+    def get(cls) -> 'ItemCodeIndex':
+        """Get the current index, rebuilding it if the price list has changed"""
+        now = time.monotonic()
+        if cls._current is not None and now - cls._checked_at < cls.REFRESH_CHECK_INTERVAL:
+            Metrics.cache_lookup('item_code_index', True)
+            return cls._current
+
+        with cls._lock:
+            if cls._current is not None and now - cls._checked_at < cls.REFRESH_CHECK_INTERVAL:
+                return cls._current
+
+            # Cheap aggregate lets other processes' price imports invalidate this copy
+            signature = tuple(db.session.query(
+                db.func.count(PriceList.item_code),
+                db.func.max(PriceList.updated_at)
+            ).one())
+
+            stale = cls._current is None or signature != cls._signature
+            Metrics.cache_lookup('item_code_index', not stale)
+            if stale:
+                item_codes = [row[0] for row in db.session.query(PriceList.item_code)]
+                cls._current = cls(item_codes)
+                cls._signature = signature
+
+            cls._checked_at = now
+            return cls._current
+
+    @classmethod
+    def invalidate(cls):
+        """Force a rebuild on next access (call after price list updates)"""
+        with cls._lock:
+            cls._current = None
+            cls._signature = None
+            cls._checked_at = 0.0
@@ -0,0 +1,188 @@
+from array import array
+from bisect import bisect_left
+from itertools import repeat
+from operator import itemgetter
+from typing import List, Dict, Any, Iterable, Iterator, Optional
+
+try:
+    import msgpack
+    import zstandard
+except ImportError:  # Without them items are stored as JSON text
+    msgpack = None
+
+class ItemCodec:
+    """Versioned columnar encoding of upload items: msgpack columns compressed with zstd
+
+    Every key becomes one column. String columns (item codes, match statuses) are
+    dictionary-encoded into integer codes, float and integer columns are packed
+    into machine arrays, and anything else (error lists, suggestions) is kept as a
+    plain value list. Keys missing from some rows are recorded, so decoding returns
+    exactly the items that were encoded.
+    """
+
+    MAGIC = b'PLI'
+    VERSION = 1
+    ZSTD_LEVEL = 3
+    ITER_BATCH_SIZE = 1000  # Rows turned into dicts at a time by iter_decode
+
+    @staticmethod
+    def available() -> bool:
+        return msgpack is not None
+
+    @staticmethod
+    def is_encoded(data) -> bool:
+        return isinstance(data, (bytes, bytearray, memoryview)) and bytes(data[:3]) == ItemCodec.MAGIC
+
+    @staticmethod
+    def _encode_column(values: list) -> Dict[str, Any]:
+        if all(value is None or type(value) is str for value in values):
+            dictionary = {}
+            codes = array('I', [dictionary.setdefault(value, len(dictionary)) for value in values])
+            return {'t': 'd', 'dict': list(dictionary), 'codes': codes.tobytes()}
+
+        if all(type(value) is float for value in values):
+            return {'t': 'f', 'data': array('d', values).tobytes()}
+
+        if all(type(value) is float or value is None for value in values):
+            nulls = [i for i, value in enumerate(values) if value is None]
+            data = array('d', [0.0 if value is None else value for value in values])
+            return {'t': 'f', 'data': data.tobytes(), 'nulls': nulls}
+
+        if all(type(value) is int and -2 ** 63 <= value < 2 ** 63 for value in values):
+            return {'t': 'i', 'data': array('q', values).tobytes()}
+
+        return {'t': 'v', 'values': values}
+
+    @staticmethod
+    def _decode_column(column: Dict[str, Any]) -> list:
+        kind = column['t']
+        if kind == 'd':
+            codes = array('I')
+            codes.frombytes(column['codes'])
+            dictionary = column['dict']
+            return [dictionary[code] for code in codes]
+
+        if kind in ('f', 'i'):
+            data = array('d' if kind == 'f' else 'q')
+            data.frombytes(column['data'])
+            values = data.tolist()
+            for i in column.get('nulls', ()):
+                values[i] = None
+            return values
+
+        return column['values']
+
+    @staticmethod
+    def _slice_column(column: Dict[str, Any], start: int, stop: int) -> list:
+        """Decode positions start:stop of a column without decoding the rest"""
+        kind = column['t']
+        if kind == 'd':
+            codes = array('I')
+            codes.frombytes(column['codes'][start * codes.itemsize:stop * codes.itemsize])
+            dictionary = column['dict']
+            return [dictionary[code] for code in codes]
+
+        if kind in ('f', 'i'):
+            data = array('d' if kind == 'f' else 'q')
+            data.frombytes(column['data'][start * data.itemsize:stop * data.itemsize])
+            values = data.tolist()
+            nulls = column.get('nulls', ())
+            for i in nulls[bisect_left(nulls, start):bisect_left(nulls, stop)]:
+                values[i - start] = None
+            return values
+
+        return column['values'][start:stop]
+
+    @staticmethod
+    def _load(data: bytes, fields: Optional[Iterable[str]]):
+        """Row count, selected keys and their columns of an encoded payload"""
+        data = bytes(data)
+        version = data[3]
+        if version != ItemCodec.VERSION:
+            raise ValueError(f'Unsupported item encoding version: {version}')
+
+        payload = msgpack.unpackb(zstandard.ZstdDecompressor().decompress(data[4:]), raw=False)
+        keys = payload['keys']
+        if fields is not None:
+            fields = set(fields)
+            keys = [key for key in keys if key in fields]
+        return payload['n'], keys, [payload['columns'][key] for key in keys]
+
+    @staticmethod
+    def encode(items: List[Dict[str, Any]]) -> bytes:
+        """Encode a list of item dicts"""
+        first = items[0].keys() if items else {}
+        if all(item.keys() == first for item in items):
+            # Usual case: every item has the same keys
+            columns = {key: ItemCodec._encode_column(list(map(itemgetter(key), items))) for key in first}
+        else:
+            keys = {}
+            for item in items:
+                keys.update(dict.fromkeys(item))
+            columns = {}
+            for key in keys:
+                present = [i for i, item in enumerate(items) if key in item]
+                column = ItemCodec._encode_column([items[i][key] for i in present])
+                if len(present) != len(items):
+                    column['rows'] = present
+                columns[key] = column
+
+        payload = msgpack.packb({'n': len(items), 'keys': list(columns), 'columns': columns}, use_bin_type=True)
+        compressed = zstandard.ZstdCompressor(level=ItemCodec.ZSTD_LEVEL).compress(payload)
+        return ItemCodec.MAGIC + bytes([ItemCodec.VERSION]) + compressed
+
+    @staticmethod
+    def decode(data: bytes, fields: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
+        """Decode items written by encode; with fields, only those columns are decoded"""
+        count, keys, columns = ItemCodec._load(data, fields)
+
+        if all('rows' not in column for column in columns):
+            # Every key on every row: build the dicts in one pass
+            values = [ItemCodec._decode_column(column) for column in columns]
+            return list(map(dict, map(zip, repeat(keys), zip(*values)))) if keys else [{} for _ in range(count)]
+
+        items = [{} for _ in range(count)]
+        for key, column in zip(keys, columns):
+            values = ItemCodec._decode_column(column)
+            rows = column.get('rows')
+            if rows is None:
+                for item, value in zip(items, values):
+                    item[key] = value
+            else:
+                for i, value in zip(rows, values):
+                    items[i][key] = value
+        return items
+
+    @staticmethod
+    def iter_decode(data: bytes, fields: Optional[Iterable[str]] = None,
+                    batch_size: int = None) -> Iterator[Dict[str, Any]]:
+        """Yield the items written by encode, building only batch_size dicts at a time"""
+        count, keys, columns = ItemCodec._load(data, fields)
+        batch_size = batch_size or ItemCodec.ITER_BATCH_SIZE
+        dense = all('rows' not in column for column in columns)
+        # Columns missing from some rows keep their own position in the rows they list
+        positions = [0] * len(columns)
+
+        for start in range(0, count, batch_size):
+            stop = min(start + batch_size, count)
+            if dense:
+                values = [ItemCodec._slice_column(column, start, stop) for column in columns]
+                if keys:
+                    yield from map(dict, map(zip, repeat(keys), zip(*values)))
+                else:
+                    yield from ({} for _ in range(start, stop))
+                continue
+
+            items = [{} for _ in range(start, stop)]
+            for n, (key, column) in enumerate(zip(keys, columns)):
+                rows = column.get('rows')
+                if rows is None:
+                    for item, value in zip(items, ItemCodec._slice_column(column, start, stop)):
+                        item[key] = value
+                    continue
+                first = positions[n]
+                last = bisect_left(rows, stop, first)
+                for i, value in zip(rows[first:last], ItemCodec._slice_column(column, first, last)):
+                    items[i - start][key] = value
+                positions[n] = last
+            yield from items
@@ -0,0 +1,120 @@
+from contextlib import contextmanager
+import os
+import time
+
+try:
+    from prometheus_client import (
+        Counter, Histogram, CollectorRegistry, REGISTRY, generate_latest, CONTENT_TYPE_LATEST, multiprocess
+    )
+except ImportError:  # Metrics are optional; without prometheus_client every call is a no-op
+    Counter = Histogram = None
+
+class _NoopMetric:
+    """Stand-in accepting the same calls as a prometheus_client metric"""
+
+    def labels(self, *args, **kwargs):
+        return self
+
+    def inc(self, amount=1):
+        pass
+
+    def observe(self, amount):
+        pass
+
+class _RecordingMetric:
+    """Stand-in that keeps samples for replay in another process"""
+
+    def __init__(self, name, samples, labels=None):
+        self.name = name
+        self.samples = samples
+        self.labelvalues = labels or {}
+
+    def labels(self, **kwargs):
+        return _RecordingMetric(self.name, self.samples, kwargs)
+
+    def inc(self, amount=1):
+        self.samples.append((self.name, self.labelvalues, 'inc', amount))
+
+    def observe(self, amount):
+        self.samples.append((self.name, self.labelvalues, 'observe', amount))
+
+def _metric(cls, *args, **kwargs):
+    return cls(*args, **kwargs) if cls is not None else _NoopMetric()
+
+class Metrics:
+    """Prometheus metrics for the upload, price import and review flows
+
+    When gunicorn runs several workers, set PROMETHEUS_MULTIPROC_DIR to an empty
+    directory before the app is imported so that every worker writes its samples
+    there and /metrics aggregates them.
+    """
+
+    STAGE_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+    STAGE_SECONDS = _metric(
+        Histogram, 'packing_list_stage_duration_seconds',
+        'Time spent in one stage of a request flow', ['flow', 'stage'], buckets=STAGE_BUCKETS
+    )
+    ROWS_PARSED = _metric(Counter, 'packing_list_rows_parsed_total', 'Spreadsheet rows parsed', ['flow'])
+    BYTES_READ = _metric(Counter, 'packing_list_file_bytes_read_total', 'Bytes of uploaded files read', ['flow'])
+    PRICE_LOOKUPS = _metric(
+        Counter, 'packing_list_price_lookups_total',
+        'Item code lookups against the price list by result (found, resolved, not_found)', ['result']
+    )
+    CACHE_REQUESTS = _metric(
+        Counter, 'packing_list_cache_requests_total', 'In-process cache lookups by outcome', ['cache', 'result']
+    )
+    FLOW_RESULTS = _metric(Counter, 'packing_list_flow_results_total', 'Completed flows by outcome', ['flow', 'result'])
+
+    @staticmethod
+    @contextmanager
+    def stage(flow: str, name: str):
+        """Time a block as one stage of a flow (stages may nest, e.g. parse within upload)"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            Metrics.STAGE_SECONDS.labels(flow=flow, stage=name).observe(time.perf_counter() - start)
+
+    @classmethod
+    def record_samples(cls) -> list:
+        """Keep this process's samples in the returned list instead of exporting them
+
+        For child processes that cannot be scraped: they pass the samples to their
+        parent, which applies them with replay_samples.
+        """
+        samples = []
+        for name, value in list(vars(cls).items()):
+            if name.isupper() and hasattr(value, 'labels'):
+                setattr(cls, name, _RecordingMetric(name, samples))
+        return samples
+
+    @classmethod
+    def replay_samples(cls, samples: list):
+        """Apply samples recorded by record_samples in another process"""
+        for name, labels, method, amount in samples:
+            getattr(getattr(cls, name).labels(**labels), method)(amount)
+
+    @staticmethod
+    def cache_lookup(cache: str, hit: bool):
+        Metrics.CACHE_REQUESTS.labels(cache=cache, result='hit' if hit else 'miss').inc()
+
+    @staticmethod
+    def available() -> bool:
+        return Counter is not None
+
+    @staticmethod
+    def render():
+        """Exposition text and content type, aggregated over all workers in multiprocess mode"""
+        if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+            registry = CollectorRegistry()
+            multiprocess.MultiProcessCollector(registry)
+        else:
+            registry = REGISTRY
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+
+    @staticmethod
+    def mark_process_dead(pid: int):
+        """Drop a dead worker's live gauges (call from gunicorn's child_exit hook)"""
+        if Counter is not None and os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+            multiprocess.mark_process_dead(pid)
@@ -0,0 +1,195 @@
+from flask import current_app
+from services.file_parser import FileParser
+from services.metrics import Metrics
+from services.warmup import Warmup
+from typing import Dict, Any, Tuple
+import logging
+import multiprocessing
+import os
+import threading
+
+try:
+    import resource
+except ImportError:  # No RLIMIT_AS outside Unix; parse processes then run without a memory cap
+    resource = None
+
+logger = logging.getLogger('packing_list.parse_pool')
+
+PARSERS = {
+    'packing_list': FileParser.parse_packing_list,
+    'price_list': FileParser.parse_price_list,
+    'duty_rates': FileParser.parse_duty_rates
+}
+FLOWS = {'packing_list': 'upload', 'price_list': 'price_import', 'duty_rates': 'duty_import'}
+
+class ParseFailed(Exception):
+    """Raised when a parse process timed out or died"""
+
+    def __init__(self, message: str, reason: str):
+        super().__init__(message)
+        self.reason = reason
+
+def _child_main(conn, memory_limit: int, max_tasks: int):
+    """Entry point of a parse process: parse files until max_tasks is reached or the pipe closes"""
+    if resource is not None and memory_limit:
+        resource.setrlimit(resource.RLIMIT_AS, (memory_limit, memory_limit))
+    # Nothing scrapes this process, so its parse metrics go back to the parent with each result
+    samples = Metrics.record_samples()
+
+    for _ in range(max_tasks):
+        try:
+            kind, file_path = conn.recv()
+        except EOFError:
+            break
+        try:
+            result = PARSERS[kind](file_path)
+        except MemoryError:  # Raised outside the parser's own error handling, e.g. while building the result
+            result = {'success': False, 'error': 'Failed to parse file: out of memory'}
+        conn.send((result, samples[:]))
+        samples.clear()
+    conn.close()
+
+class _ParseProcess:
+    """One child process and the pipe to it"""
+
+    def __init__(self, context, memory_limit: int, max_tasks: int):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(
+            target=_child_main, args=(child_conn, memory_limit, max_tasks), name='parse-worker', daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+        self.tasks_left = max_tasks
+
+    def run(self, kind: str, file_path: str, timeout: float) -> Tuple[Dict[str, Any], list]:
+        """Parse result and the metric samples recorded while parsing"""
+        try:
+            self.conn.send((kind, file_path))
+            self.tasks_left -= 1
+            if not self.conn.poll(timeout):
+                self.stop()
+                raise ParseFailed(f'Parsing took longer than {timeout:g} seconds and was stopped', 'timeout')
+            return self.conn.recv()
+        except (EOFError, OSError):
+            self.stop()
+            raise ParseFailed(f'Parsing process died (exit code {self.process.exitcode})', 'died')
+
+    def usable(self) -> bool:
+        return self.tasks_left > 0 and self.process.is_alive()
+
+    def stop(self):
+        """Kill the process (a no-op if it already exited) and reap it"""
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join()
+        self.conn.close()
+        Metrics.mark_process_dead(self.process.pid)
+
+    def retire(self):
+        """Let a process that finished its last task exit on its own"""
+        self.conn.close()
+        self.process.join(timeout=5)
+        self.stop()
+
+class ParsePool:
+    """Runs spreadsheet parsing in child processes so that a hostile file cannot take the API worker down
+
+    Each API worker process keeps up to PARSE_POOL_WORKERS children, started on
+    demand from a forkserver with the data stack preloaded. A child parses
+    PARSE_MAX_TASKS_PER_CHILD files before it is replaced, runs under an
+    RLIMIT_AS cap of PARSE_MEMORY_LIMIT_MB and is killed after PARSE_TIMEOUT
+    seconds. A parse that times out or dies returns a failed parse result like
+    any unreadable file. Results come back pickled over a pipe, together with
+    the child's metric samples, which are recorded in the API worker.
+    """
+
+    _cond = threading.Condition()
+    _idle = []
+    _size = 0
+    _pid = None
+    _context = None
+
+    @classmethod
+    def _get_context(cls):
+        if cls._context is None:
+            if 'forkserver' in multiprocessing.get_all_start_methods():
+                # Children fork from a clean single-threaded server rather than the threaded API worker
+                cls._context = multiprocessing.get_context('forkserver')
+                cls._context.set_forkserver_preload([*Warmup.MODULES, __name__])
+            else:
+                cls._context = multiprocessing.get_context('spawn')
+        return cls._context
+
+    @classmethod
+    def _checkout(cls, config) -> _ParseProcess:
+        with cls._cond:
+            if cls._pid != os.getpid():
+                # Children of the parent process (e.g. the gunicorn master) are not ours to use
+                cls._idle, cls._size, cls._pid = [], 0, os.getpid()
+
+            while not cls._idle and cls._size >= config['PARSE_POOL_WORKERS']:
+                cls._cond.wait()
+            while cls._idle:
+                worker = cls._idle.pop()
+                if worker.usable():
+                    return worker
+                cls._size -= 1
+                worker.stop()
+            cls._size += 1
+
+        try:
+            return _ParseProcess(
+                cls._get_context(), config['PARSE_MEMORY_LIMIT_MB'] * 1024 * 1024, config['PARSE_MAX_TASKS_PER_CHILD']
+            )
+        except Exception:
+            with cls._cond:
+                cls._size -= 1
+                cls._cond.notify()
+            raise
+
+    @classmethod
+    def _checkin(cls, worker: _ParseProcess):
+        usable = worker.usable()
+        with cls._cond:
+            if usable:
+                cls._idle.append(worker)
+            else:
+                cls._size -= 1
+            cls._cond.notify()
+        if not usable:
+            worker.retire()
+
+    @classmethod
+    def parse(cls, kind: str, file_path: str) -> Dict[str, Any]:
+        """Result of the FileParser method for kind, computed in a child process"""
+        config = current_app.config
+        if config['PARSE_POOL_WORKERS'] <= 0:
+            return PARSERS[kind](file_path)
+
+        with Metrics.stage(FLOWS[kind], 'parse_process'):
+            worker = cls._checkout(config)
+            try:
+                result, samples = worker.run(kind, os.path.abspath(file_path), config['PARSE_TIMEOUT'])
+                Metrics.replay_samples(samples)
+                return result
+            except ParseFailed as e:
+                logger.warning('Parsing %s (%s) failed: %s', file_path, kind, e)
+                Metrics.FLOW_RESULTS.labels(flow='parse_pool', result=e.reason).inc()
+                result = {'success': False, 'error': str(e)}
+                if kind == 'packing_list':
+                    result['items'] = []
+                return result
+            finally:
+                cls._checkin(worker)
+
+    @classmethod
+    def parse_packing_list(cls, file_path: str) -> Dict[str, Any]:
+        return cls.parse('packing_list', file_path)
+
+    @classmethod
+    def parse_price_list(cls, file_path: str) -> Dict[str, Any]:
+        return cls.parse('price_list', file_path)
+
+    @classmethod
+    def parse_duty_rates(cls, file_path: str) -> Dict[str, Any]:
+        return cls.parse('duty_rates', file_path)
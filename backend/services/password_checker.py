@@ -0,0 +1,45 @@
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app
+from werkzeug.security import check_password_hash
+import threading
+
+class PasswordCheckBusy(Exception):
+    """Raised when too many password checks are already running or queued"""
+
+class PasswordChecker:
+    """Runs slow password hash checks on a small, bounded thread pool
+
+    Login bursts then occupy at most PASSWORD_CHECK_WORKERS threads of CPU;
+    requests beyond the queue limit are turned away immediately instead of
+    tying up request threads needed for uploads.
+    """
+
+    _executor = None
+    _slots = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def _get_executor(cls):
+        if cls._executor is None:
+            with cls._lock:
+                if cls._executor is None:
+                    config = current_app.config
+                    workers = config['PASSWORD_CHECK_WORKERS']
+                    cls._slots = threading.BoundedSemaphore(workers + config['PASSWORD_CHECK_QUEUE'])
+                    cls._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-check')
+        return cls._executor
+
+    @classmethod
+    def check(cls, password_hash: str, password: str) -> bool:
+        """Verify a password against its hash, raising PasswordCheckBusy when saturated"""
+        executor = cls._get_executor()
+        if not cls._slots.acquire(blocking=False):
+            raise PasswordCheckBusy()
+
+        try:
+            future = executor.submit(check_password_hash, password_hash, password)
+        except Exception:
+            cls._slots.release()
+            raise
+        future.add_done_callback(lambda _: cls._slots.release())
+        return future.result()
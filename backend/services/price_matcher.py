@@ -1,4 +1,7 @@
 from models.price import PriceList
+from services.item_code_index import ItemCodeIndex
+from services.tolerance_engine import ToleranceEngine, CompiledTolerance
+from services.metrics import Metrics
 from typing import List, Dict, Any
 
 class PriceMatcher:
@@ -13,53 +16,112 @@ class PriceMatcher:
             'total_items': len(items),
             'valid_items': 0,
             'invalid_items': 0,
+            'auto_resolved_items': 0,
+            'auto_accepted_items': 0,
             'validation_errors': []
         }
+        index = None
         
+        # Look up all expected prices in bulk instead of one query per line
+        with Metrics.stage('validation', 'price_lookup'):
+            expected_prices = PriceList.get_prices(
+                item['item_code'] for item in items if not item.get('validation_errors')
+            )
+            
+            # Codes missing verbatim are resolved once per distinct code and priced in one more query
+            missing_codes = {
+                item['item_code'] for item in items
+                if not item.get('validation_errors') and item['item_code'] not in expected_prices
+            }
+            resolved_codes = {}
+            if missing_codes:
+                index = ItemCodeIndex.get()
+                resolved_codes = {code: index.resolve(code) for code in missing_codes}
+                expected_prices.update(PriceList.get_prices(
+                    code for code in resolved_codes.values() if code is not None
+                ))
+        not_found_count = 0
+        suggestions = {}
+        
+        priced_lines = []
         for item in items:
             validated_item = item.copy()
-            price_validation_errors = []
+            validated_item.pop('suggestions', None)
+            validated_item.pop('tolerance_rule', None)
             
             # Skip items that already have parsing errors
             if item.get('validation_errors'):
                 validated_item['price_match_status'] = 'error'
                 validated_item['price_validation_errors'] = ['Item has parsing errors']
-                has_errors = True
-                validation_summary['invalid_items'] += 1
             else:
-                # Get expected price from database
-                expected_price = PriceList.get_price(item['item_code'])
+                expected_price = expected_prices.get(item['item_code'])
                 
                 if expected_price is None:
-                    price_validation_errors.append('Item code not found in price list')
-                    validated_item['price_match_status'] = 'not_found'
-                    has_errors = True
-                else:
-                    # Compare prices (allow small floating point differences)
-                    price_difference = abs(item['price'] - expected_price)
-                    tolerance = 0.01  # 1 cent tolerance
-                    
-                    if price_difference <= tolerance:
-                        validated_item['price_match_status'] = 'match'
-                        validation_summary['valid_items'] += 1
-                    else:
-                        price_validation_errors.append(
-                            f'Price mismatch: Expected {expected_price:.2f}, got {item["price"]:.2f}'
-                        )
-                        validated_item['price_match_status'] = 'mismatch'
-                        has_errors = True
-                        validation_summary['invalid_items'] += 1
+                    # Fall back to the normalized code (case, spaces, Excel-mangled numbers)
+                    resolved_code = resolved_codes.get(item['item_code'])
+                    if resolved_code is not None:
+                        expected_price = expected_prices.get(resolved_code)
+                        if expected_price is not None:
+                            validated_item['original_item_code'] = item['item_code']
+                            validated_item['item_code'] = resolved_code
+                            validation_summary['auto_resolved_items'] += 1
                 
                 validated_item['expected_price'] = expected_price
-                validated_item['price_validation_errors'] = price_validation_errors
                 
-                if price_validation_errors:
-                    validation_summary['validation_errors'].extend(
-                        [f"Row {item['row']}: {error}" for error in price_validation_errors]
-                    )
+                if expected_price is None:
+                    validated_item['price_match_status'] = 'not_found'
+                    validated_item['price_validation_errors'] = ['Item code not found in price list']
+                    if item['item_code'] not in suggestions:
+                        suggestions[item['item_code']] = index.suggest(item['item_code'])
+                    validated_item['suggestions'] = list(suggestions[item['item_code']])
+                    not_found_count += 1
+                else:
+                    priced_lines.append(validated_item)
             
             validated_items.append(validated_item)
         
+        # Compare prices for the whole upload at once using the configured tolerance rules
+        if priced_lines:
+            compiled = ToleranceEngine.get_compiled()
+            with Metrics.stage('validation', 'tolerance'):
+                result = compiled.evaluate(
+                    [line['item_code'] for line in priced_lines],
+                    [line['quantity'] for line in priced_lines],
+                    [line['expected_price'] for line in priced_lines],
+                    [line['price'] for line in priced_lines]
+                )
+            
+            for line, status, rule_index in zip(priced_lines, result['status'].tolist(), result['rule_index'].tolist()):
+                line['price_match_status'] = CompiledTolerance.STATUS_NAMES[status]
+                if status == CompiledTolerance.MISMATCH:
+                    line['price_validation_errors'] = [
+                        f'Price mismatch: Expected {line["expected_price"]:.2f}, got {line["price"]:.2f}'
+                    ]
+                else:
+                    line['price_validation_errors'] = []
+                    if status == CompiledTolerance.ACCEPTED:
+                        line['tolerance_rule'] = compiled.rule_name(rule_index)
+        
+        for validated_item in validated_items:
+            status = validated_item['price_match_status']
+            
+            if status in ('match', 'accepted'):
+                validation_summary['valid_items'] += 1
+                if status == 'accepted':
+                    validation_summary['auto_accepted_items'] += 1
+            else:
+                has_errors = True
+                if status != 'not_found':
+                    validation_summary['invalid_items'] += 1
+                if status != 'error':
+                    validation_summary['validation_errors'].extend(
+                        [f"Row {validated_item['row']}: {error}" for error in validated_item['price_validation_errors']]
+                    )
+        
+        Metrics.PRICE_LOOKUPS.labels(result='found').inc(len(priced_lines) - validation_summary['auto_resolved_items'])
+        Metrics.PRICE_LOOKUPS.labels(result='resolved').inc(validation_summary['auto_resolved_items'])
+        Metrics.PRICE_LOOKUPS.labels(result='not_found').inc(not_found_count)
+        
         # Determine overall status
         if not has_errors and validation_summary['valid_items'] > 0:
             overall_status = 'success'
@@ -79,6 +141,7 @@ class PriceMatcher:
         summary = {
             'total_items': len(validated_items),
             'successful_matches': 0,
+            'auto_accepted': 0,
             'price_mismatches': 0,
             'items_not_found': 0,
             'parsing_errors': 0,
@@ -90,6 +153,16 @@ class PriceMatcher:
             
             if status == 'match':
                 summary['successful_matches'] += 1
+            elif status == 'accepted':
+                summary['auto_accepted'] += 1
+                summary['details'].append({
+                    'row': item['row'],
+                    'item_code': item['item_code'],
+                    'issue': 'Price difference accepted by tolerance rule',
+                    'rule': item.get('tolerance_rule'),
+                    'expected': item.get('expected_price'),
+                    'actual': item['price']
+                })
             elif status == 'mismatch':
                 summary['price_mismatches'] += 1
                 summary['details'].append({
@@ -104,7 +177,8 @@ class PriceMatcher:
                 summary['details'].append({
                     'row': item['row'],
                     'item_code': item['item_code'],
-                    'issue': 'Item not found in price list'
+                    'issue': 'Item not found in price list',
+                    'suggestions': item.get('suggestions', [])
                 })
             else:  # error
                 summary['parsing_errors'] += 1
@@ -0,0 +1,211 @@
+from abc import ABC, abstractmethod
+from flask import current_app
+from typing import BinaryIO, Iterator, NamedTuple, Optional
+import os
+import shutil
+import threading
+import uuid
+
+class StoredObject(NamedTuple):
+    key: str
+    size: int
+    modified: float  # Unix timestamp
+
+class StorageBackend(ABC):
+    """Interface for storing file store objects under string keys"""
+
+    CHUNK_SIZE = 1024 * 1024
+
+    @abstractmethod
+    def put(self, key: str, fileobj: BinaryIO) -> int:
+        """Store the contents of a readable stream under key and return the bytes written"""
+
+    @abstractmethod
+    def open(self, key: str) -> BinaryIO:
+        """Open an object for streaming reads"""
+
+    @abstractmethod
+    def exists(self, key: str) -> bool:
+        """Whether an object is stored under key"""
+
+    @abstractmethod
+    def delete(self, key: str):
+        """Delete an object, ignoring keys that do not exist"""
+
+    @abstractmethod
+    def iter_objects(self) -> Iterator[StoredObject]:
+        """Stream every stored object without listing them all into memory"""
+
+    def local_path(self, key: str) -> Optional[str]:
+        """Filesystem path of an object, if the backend keeps objects on local disk"""
+        return None
+
+    def presigned_url(self, key: str, download_name: str, expires_in: int) -> Optional[str]:
+        """Time-limited URL that lets clients fetch an object without going through the API"""
+        return None
+
+class LocalStorageBackend(StorageBackend):
+    """Objects kept as files under a local (or shared) directory"""
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, *key.split('/'))
+
+    def put(self, key: str, fileobj: BinaryIO) -> int:
+        final_path = self._path(key)
+        os.makedirs(os.path.dirname(final_path), exist_ok=True)
+        partial_path = f"{final_path}.{uuid.uuid4().hex[:8]}.partial"
+
+        # Readers never see a half-written object
+        try:
+            with open(partial_path, 'wb') as dst:
+                shutil.copyfileobj(fileobj, dst, self.CHUNK_SIZE)
+            os.replace(partial_path, final_path)
+        finally:
+            if os.path.exists(partial_path):
+                os.remove(partial_path)
+
+        return os.path.getsize(final_path)
+
+    def open(self, key: str) -> BinaryIO:
+        return open(self._path(key), 'rb')
+
+    def exists(self, key: str) -> bool:
+        return os.path.exists(self._path(key))
+
+    def delete(self, key: str):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def iter_objects(self) -> Iterator[StoredObject]:
+        for directory, _, filenames in os.walk(self.root):
+            for filename in filenames:
+                path = os.path.join(directory, filename)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                key = os.path.relpath(path, self.root).replace(os.sep, '/')
+                yield StoredObject(key, stat.st_size, stat.st_mtime)
+
+    def local_path(self, key: str) -> Optional[str]:
+        return self._path(key)
+
+class S3StorageBackend(StorageBackend):
+    """Objects kept in an S3-compatible bucket (AWS S3, MinIO, Ceph RGW, ...)"""
+
+    def __init__(self, bucket: str, prefix: str = '', endpoint_url: str = None, region: str = None,
+                 max_pool_connections: int = 10, multipart_threshold: int = 8 * 1024 * 1024,
+                 multipart_chunksize: int = 8 * 1024 * 1024, **client_kwargs):
+        # Imported here so processes using local storage never pay for loading boto3
+        try:
+            import boto3
+            from boto3.s3.transfer import TransferConfig
+            from botocore.config import Config as BotoConfig
+        except ImportError:
+            raise RuntimeError('STORAGE_BACKEND=s3 requires the boto3 package')
+
+        self.bucket = bucket
+        self.prefix = prefix.strip('/') + '/' if prefix.strip('/') else ''
+
+        # One client per backend; its connection pool is shared by all threads of the worker
+        self.client = boto3.session.Session().client(
+            's3',
+            endpoint_url=endpoint_url,
+            region_name=region,
+            config=BotoConfig(max_pool_connections=max_pool_connections, retries={'mode': 'standard'}),
+            **client_kwargs
+        )
+        # Larger files are sent as a multipart upload, streamed part by part
+        self.transfer_config = TransferConfig(
+            multipart_threshold=multipart_threshold,
+            multipart_chunksize=multipart_chunksize,
+            max_concurrency=4
+        )
+
+    def _key(self, key: str) -> str:
+        return self.prefix + key
+
+    def put(self, key: str, fileobj: BinaryIO) -> int:
+        written = [0]
+
+        def count(transferred):
+            written[0] += transferred
+
+        self.client.upload_fileobj(
+            fileobj, self.bucket, self._key(key), Config=self.transfer_config, Callback=count
+        )
+        return written[0]
+
+    def open(self, key: str) -> BinaryIO:
+        return self.client.get_object(Bucket=self.bucket, Key=self._key(key))['Body']
+
+    def exists(self, key: str) -> bool:
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self._key(key))
+            return True
+        except self.client.exceptions.ClientError as e:
+            if e.response['Error']['Code'] in ('404', 'NoSuchKey', 'NotFound'):
+                return False
+            raise
+
+    def delete(self, key: str):
+        self.client.delete_object(Bucket=self.bucket, Key=self._key(key))
+
+    def iter_objects(self) -> Iterator[StoredObject]:
+        paginator = self.client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self.prefix):
+            for entry in page.get('Contents', []):
+                yield StoredObject(
+                    entry['Key'][len(self.prefix):],
+                    entry['Size'],
+                    entry['LastModified'].timestamp()
+                )
+
+    def presigned_url(self, key: str, download_name: str, expires_in: int) -> Optional[str]:
+        return self.client.generate_presigned_url(
+            'get_object',
+            Params={
+                'Bucket': self.bucket,
+                'Key': self._key(key),
+                'ResponseContentDisposition': f'attachment; filename="{download_name}"'
+            },
+            ExpiresIn=expires_in
+        )
+
+_backends = {}
+_backends_lock = threading.Lock()
+
+def get_storage() -> StorageBackend:
+    """Storage backend configured for the current app, created once per process"""
+    config = current_app.config
+    kind = config.get('STORAGE_BACKEND', 'local')
+    cache_key = (kind, config['UPLOAD_FOLDER'], config.get('S3_BUCKET'), config.get('S3_ENDPOINT_URL'))
+
+    backend = _backends.get(cache_key)
+    if backend is not None:
+        return backend
+
+    with _backends_lock:
+        if cache_key not in _backends:
+            if kind == 'local':
+                _backends[cache_key] = LocalStorageBackend(os.path.join(config['UPLOAD_FOLDER'], 'objects'))
+            elif kind == 's3':
+                if not config.get('S3_BUCKET'):
+                    raise ValueError('STORAGE_BACKEND=s3 requires S3_BUCKET')
+                _backends[cache_key] = S3StorageBackend(
+                    config['S3_BUCKET'],
+                    prefix=config.get('S3_PREFIX', 'objects/'),
+                    endpoint_url=config.get('S3_ENDPOINT_URL'),
+                    region=config.get('S3_REGION'),
+                    max_pool_connections=config.get('S3_MAX_POOL_CONNECTIONS', 10),
+                    multipart_threshold=config.get('S3_MULTIPART_THRESHOLD', 8 * 1024 * 1024),
+                    multipart_chunksize=config.get('S3_MULTIPART_CHUNKSIZE', 8 * 1024 * 1024)
+                )
+            else:
+                raise ValueError(f'Unknown STORAGE_BACKEND: {kind}')
+        return _backends[cache_key]
@@ -0,0 +1,65 @@
+from database import db
+from datetime import datetime, timedelta, timezone
+from flask import current_app
+from models.user import User
+from utils.query_stats import untracked_queries
+import threading
+import time
+
+class TokenRevocation:
+    """Per-user cutoffs rejecting access tokens issued before a login was revoked
+
+    Revoking a refresh token family sets users.tokens_valid_after. Every process keeps
+    the recent cutoffs in memory and reloads them at most every
+    TOKEN_REVOCATION_CHECK_INTERVAL seconds, so checking a token costs a dict lookup.
+    """
+
+    _cutoffs = {}  # user_id -> Unix time; tokens with an earlier iat are revoked
+    _checked_at = 0.0
+    _lock = threading.Lock()
+
+    @staticmethod
+    def _timestamp(value: datetime) -> float:
+        return value.replace(tzinfo=timezone.utc).timestamp()
+
+    @classmethod
+    def revoke_user_tokens(cls, user_id, when: datetime = None):
+        """Reject the user's access tokens issued before when (default now); the caller commits"""
+        when = when or datetime.utcnow()
+        User.query.filter(User.id == user_id).update({'tokens_valid_after': when}, synchronize_session=False)
+        # This process rejects them at once; the others on their next refresh
+        with cls._lock:
+            cls._cutoffs[user_id] = max(cls._cutoffs.get(user_id, 0), cls._timestamp(when))
+
+    @classmethod
+    def _refresh(cls):
+        now = time.monotonic()
+        if now - cls._checked_at < current_app.config['TOKEN_REVOCATION_CHECK_INTERVAL']:
+            return
+
+        with cls._lock:
+            if now - cls._checked_at < current_app.config['TOKEN_REVOCATION_CHECK_INTERVAL']:
+                return
+
+            # Cutoffs older than the access token lifetime cannot reject a token that is still valid
+            since = datetime.utcnow() - timedelta(seconds=current_app.config['JWT_ACCESS_TOKEN_EXPIRES'])
+            query = db.select(User.id, User.tokens_valid_after).where(User.tokens_valid_after > since)
+            with untracked_queries(), db.engine.connect() as conn:
+                rows = conn.execute(query).all()
+
+            cls._cutoffs = {user_id: cls._timestamp(cutoff) for user_id, cutoff in rows}
+            cls._checked_at = now
+
+    @classmethod
+    def is_revoked(cls, claims) -> bool:
+        """Whether the token was issued before its user's cutoff"""
+        cls._refresh()
+        cutoff = cls._cutoffs.get(claims.get('user_id'))
+        return cutoff is not None and claims.get('iat', 0) < cutoff
+
+    @classmethod
+    def invalidate(cls):
+        """Reload the cutoffs on next check"""
+        with cls._lock:
+            cls._cutoffs = {}
+            cls._checked_at = 0.0
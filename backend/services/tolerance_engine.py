@@ -0,0 +1,113 @@
+from models.tolerance import ToleranceRule
+from services.metrics import Metrics
+from typing import List, Dict, Any, TYPE_CHECKING
+import threading
+
+if TYPE_CHECKING:
+    import numpy as np
+
+class CompiledTolerance:
+    """Tolerance rules compiled into arrays for batch evaluation"""
+
+    MATCH = 0
+    ACCEPTED = 1
+    MISMATCH = 2
+
+    STATUS_NAMES = ('match', 'accepted', 'mismatch')
+
+    def __init__(self, rules: List[Dict[str, Any]], default_abs_tolerance: float):
+        self.rules = rules
+        self.default_abs_tolerance = default_abs_tolerance
+
+    def evaluate(self, item_codes, quantities, expected_prices, prices) -> Dict[str, 'np.ndarray']:
+        """Evaluate all lines of an upload at once and return per-line status codes"""
+        import numpy as np
+
+        codes = np.asarray(item_codes, dtype=str)
+        quantities = np.asarray(quantities, dtype=float)
+        expected = np.asarray(expected_prices, dtype=float)
+        difference = np.abs(np.asarray(prices, dtype=float) - expected)
+
+        tolerance = np.full(len(codes), self.default_abs_tolerance)
+        accept_limit = np.zeros(len(codes))
+        rule_index = np.full(len(codes), -1)
+
+        # Rules are ordered by ascending priority, so later assignments win
+        for position, rule in enumerate(self.rules):
+            mask = np.ones(len(codes), dtype=bool)
+            if rule['item_code_prefix']:
+                mask &= np.char.startswith(codes, rule['item_code_prefix'])
+            if rule['min_quantity'] is not None:
+                mask &= quantities >= rule['min_quantity']
+            if rule['max_quantity'] is not None:
+                mask &= quantities < rule['max_quantity']
+            if not mask.any():
+                continue
+
+            # A rule without abs_tolerance or pct_tolerance (e.g. only auto_accept_pct) keeps the tolerance it inherits
+            if rule['abs_tolerance'] is not None or rule['pct_tolerance'] is not None:
+                rule_tolerance = np.maximum(
+                    rule['abs_tolerance'] or 0.0,
+                    np.abs(expected) * (rule['pct_tolerance'] or 0.0) / 100
+                )
+                tolerance = np.where(mask, rule_tolerance, tolerance)
+            accept_limit = np.where(mask, np.abs(expected) * (rule['auto_accept_pct'] or 0.0) / 100, accept_limit)
+            rule_index = np.where(mask, position, rule_index)
+
+        status = np.full(len(codes), self.MISMATCH, dtype=np.int8)
+        status[difference <= accept_limit] = self.ACCEPTED
+        status[difference <= tolerance] = self.MATCH
+
+        return {
+            'status': status,
+            'difference': difference,
+            'tolerance': tolerance,
+            'rule_index': rule_index
+        }
+
+    def rule_name(self, position: int):
+        """Name of the rule at a compiled position, or None for the default tolerance"""
+        return self.rules[position]['name'] if position >= 0 else None
+
+class ToleranceEngine:
+    """Service class for compiling and caching price tolerance rules"""
+
+    DEFAULT_ABS_TOLERANCE = 0.01  # 1 cent, used when no rule applies
+
+    _compiled = None
+    _signature = None
+    _lock = threading.Lock()
+
+    @staticmethod
+    def compile(rules: List[ToleranceRule], default_abs_tolerance: float = None) -> CompiledTolerance:
+        """Compile rule rows into a batch evaluator"""
+        if default_abs_tolerance is None:
+            default_abs_tolerance = ToleranceEngine.DEFAULT_ABS_TOLERANCE
+
+        return CompiledTolerance(
+            [{
+                'name': rule.name,
+                'item_code_prefix': rule.item_code_prefix,
+                'min_quantity': rule.min_quantity,
+                'max_quantity': rule.max_quantity,
+                'abs_tolerance': rule.abs_tolerance,
+                'pct_tolerance': rule.pct_tolerance,
+                'auto_accept_pct': rule.auto_accept_pct
+            } for rule in rules],
+            default_abs_tolerance
+        )
+
+    @classmethod
+    def get_compiled(cls) -> CompiledTolerance:
+        """Get compiled active rules, recompiling only when the rule table changed"""
+        signature = ToleranceRule.get_signature()
+        if cls._compiled is not None and signature == cls._signature:
+            Metrics.cache_lookup('tolerance_rules', True)
+            return cls._compiled
+
+        Metrics.cache_lookup('tolerance_rules', False)
+        with cls._lock:
+            if cls._compiled is None or signature != cls._signature:
+                cls._compiled = cls.compile(ToleranceRule.get_active_rules())
+                cls._signature = signature
+            return cls._compiled
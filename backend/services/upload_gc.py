@@ -0,0 +1,222 @@
+from database import db
+from models.upload import UploadRecord
+from models.stored_file import StoredFile
+from services.storage import get_storage, StoredObject
+from flask import current_app
+from datetime import datetime, timedelta
+from typing import Dict, Any, Callable, Iterator, List
+from itertools import islice
+import os
+import re
+import shutil
+import time
+
+class UploadGarbageCollector:
+    """Finds and removes orphaned or expired files under UPLOAD_FOLDER and in object storage"""
+
+    SCAN_CHUNK_SIZE = 500  # Directory entries checked against the database per query
+    LIKE_CHUNK_SIZE = 50
+
+    _DIGEST = re.compile(r'^([0-9a-f]{64})(\.zst)?$')
+    _ANNOTATED = re.compile(r'^(\d+)_[0-9a-f]+\.xlsx$')
+
+    def __init__(self, dry_run: bool = False, batch_size: int = None, batch_pause: float = None,
+                 min_age: int = None, retention_days: Dict[str, int] = None):
+        config = current_app.config
+        self.upload_folder = config['UPLOAD_FOLDER']
+        self.dry_run = dry_run
+        self.batch_size = batch_size or config['GC_BATCH_SIZE']
+        self.batch_pause = config['GC_BATCH_PAUSE'] if batch_pause is None else batch_pause
+        self.min_age = config['GC_ORPHAN_MIN_AGE'] if min_age is None else min_age
+        self.retention_days = config['UPLOAD_RETENTION_DAYS'] if retention_days is None else retention_days
+        self.started_at = time.time()
+        self.report = {
+            'dry_run': dry_run,
+            'scanned': 0,
+            'deleted_files': 0,
+            'deleted_bytes': 0,
+            'expired_uploads': 0,
+            'by_kind': {}
+        }
+        self._pending_in_batch = 0
+
+    def run(self) -> Dict[str, Any]:
+        """Run every collection pass and return a report"""
+        self.apply_retention()
+        self.collect_temp()
+        self.collect_legacy()
+        self.collect_objects()
+        self.collect_annotated()
+        self.collect_profiles()
+        return self.report
+
+    def _old_enough(self, entry) -> bool:
+        # Files younger than the grace period may belong to requests still in flight
+        modified = entry.modified if isinstance(entry, StoredObject) else entry.stat().st_mtime
+        return self.started_at - modified >= self.min_age
+
+    def _delete(self, path: str, kind: str, size: int = 0, remove: Callable[[str], None] = os.remove):
+        """Delete one file, pausing between batches to bound I/O pressure"""
+        if not self.dry_run:
+            try:
+                remove(path)
+            except FileNotFoundError:
+                return
+
+        self.report['deleted_files'] += 1
+        self.report['deleted_bytes'] += size
+        self.report['by_kind'][kind] = self.report['by_kind'].get(kind, 0) + 1
+
+        self._pending_in_batch += 1
+        if self._pending_in_batch >= self.batch_size:
+            self._pending_in_batch = 0
+            if not self.dry_run and self.batch_pause:
+                time.sleep(self.batch_pause)
+
+    @staticmethod
+    def _chunks(entries: Iterator, size: int) -> Iterator[List]:
+        while True:
+            chunk = list(islice(entries, size))
+            if not chunk:
+                return
+            yield chunk
+
+    def _scan_files(self, directory: str) -> Iterator[os.DirEntry]:
+        """Stream regular files of one directory without listing it into memory"""
+        if not os.path.isdir(directory):
+            return
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.is_file(follow_symlinks=False):
+                    self.report['scanned'] += 1
+                    yield entry
+
+    def apply_retention(self):
+        """Release originals of uploads whose status has outlived its retention period"""
+        for status, days in self.retention_days.items():
+            cutoff = datetime.utcnow() - timedelta(days=days)
+            last_id = 0
+
+            while True:
+                batch = UploadRecord.query.filter(
+                    UploadRecord.status == status,
+                    UploadRecord.upload_time < cutoff,
+                    (UploadRecord.file_digest.isnot(None)) | (UploadRecord.file_path.isnot(None)),
+                    UploadRecord.id > last_id
+                ).order_by(UploadRecord.id).limit(self.batch_size).all()
+
+                if not batch:
+                    break
+
+                last_id = batch[-1].id
+                for upload in batch:
+                    if not self.dry_run:
+                        upload.delete_file()
+                    self.report['expired_uploads'] += 1
+
+                if not self.dry_run:
+                    db.session.commit()
+                    if self.batch_pause:
+                        time.sleep(self.batch_pause)
+
+    def collect_temp(self):
+        """Remove scratch files left behind by requests that crashed mid-upload"""
+        for entry in self._scan_files(os.path.join(self.upload_folder, 'tmp')):
+            if self._old_enough(entry):
+                self._delete(entry.path, 'temp', entry.stat().st_size)
+
+    def collect_legacy(self):
+        """Remove flat files in UPLOAD_FOLDER that no upload_records.file_path refers to"""
+        candidates = (entry for entry in self._scan_files(self.upload_folder) if self._old_enough(entry))
+
+        for chunk in self._chunks(candidates, self.LIKE_CHUNK_SIZE):
+            # Match on the file name since stored paths may come from another machine
+            conditions = [UploadRecord.file_path.like(f'%{entry.name}') for entry in chunk]
+            referenced = {
+                path.replace('\\', '/').rsplit('/', 1)[-1]
+                for (path,) in db.session.query(UploadRecord.file_path).filter(db.or_(*conditions))
+            }
+            for entry in chunk:
+                if entry.name not in referenced:
+                    self._delete(entry.path, 'legacy', entry.stat().st_size)
+
+    def _scan_objects(self) -> Iterator[StoredObject]:
+        """Stream objects from the configured storage backend"""
+        for stored_object in get_storage().iter_objects():
+            self.report['scanned'] += 1
+            yield stored_object
+
+    def collect_objects(self):
+        """Remove store objects with no live stored_files row, and stale partial writes"""
+        storage = get_storage()
+        for chunk in self._chunks(self._scan_objects(), self.SCAN_CHUNK_SIZE):
+            digests = {}
+            for entry in chunk:
+                name = entry.key.rsplit('/', 1)[-1]
+                match = self._DIGEST.match(name)
+                if match:
+                    digests.setdefault(match.group(1), []).append(entry)
+                elif name.endswith('.partial') and self._old_enough(entry):
+                    self._delete(entry.key, 'partial', entry.size, storage.delete)
+
+            if not digests:
+                continue
+
+            live = {
+                (digest, compression) for digest, compression in db.session.query(
+                    StoredFile.digest, StoredFile.compression
+                ).filter(StoredFile.digest.in_(list(digests)), StoredFile.ref_count > 0)
+            }
+            for digest, entries in digests.items():
+                for entry in entries:
+                    compression = 'zstd' if entry.key.endswith('.zst') else None
+                    if (digest, compression) not in live and self._old_enough(entry):
+                        self._delete(entry.key, 'object', entry.size, storage.delete)
+
+    def collect_annotated(self):
+        """Remove cached annotated copies of deleted uploads or outdated item revisions"""
+        candidates = (
+            entry for entry in self._scan_files(os.path.join(self.upload_folder, 'annotated'))
+            if self._old_enough(entry)
+        )
+
+        for chunk in self._chunks(candidates, self.SCAN_CHUNK_SIZE):
+            upload_ids = {}
+            for entry in chunk:
+                match = self._ANNOTATED.match(entry.name)
+                if match:
+                    upload_ids.setdefault(int(match.group(1)), []).append(entry)
+                else:
+                    self._delete(entry.path, 'annotated', entry.stat().st_size)
+
+            existing = {
+                upload_id for (upload_id,) in db.session.query(UploadRecord.id).filter(
+                    UploadRecord.id.in_(list(upload_ids))
+                )
+            }
+            for upload_id, entries in upload_ids.items():
+                # Newer revisions replace older copies, so only the latest file is kept
+                entries.sort(key=lambda entry: entry.stat().st_mtime, reverse=True)
+                stale = entries if upload_id not in existing else entries[1:]
+                for entry in stale:
+                    self._delete(entry.path, 'annotated', entry.stat().st_size)
+
+    def collect_profiles(self):
+        """Remove stored profiles of uploads that no longer exist"""
+        root = os.path.join(self.upload_folder, 'profiles')
+        if not os.path.isdir(root):
+            return
+
+        with os.scandir(root) as entries:
+            candidates = [entry for entry in entries if entry.is_dir(follow_symlinks=False) and entry.name.isdigit()]
+
+        for chunk in self._chunks(iter(candidates), self.SCAN_CHUNK_SIZE):
+            existing = {
+                upload_id for (upload_id,) in db.session.query(UploadRecord.id).filter(
+                    UploadRecord.id.in_([int(entry.name) for entry in chunk])
+                )
+            }
+            for entry in chunk:
+                self.report['scanned'] += 1
+                if int(entry.name) not in existing and self._old_enough(entry):
+                    self._delete(entry.path, 'profile', 0, shutil.rmtree)
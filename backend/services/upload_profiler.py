@@ -0,0 +1,196 @@
+from flask import current_app, request
+from datetime import datetime
+from typing import Dict, Any, Optional
+import cProfile
+import json
+import os
+import shutil
+import sys
+import threading
+import time
+import tracemalloc
+
+class ProfilerBusy(Exception):
+    """Raised when another profile is already running in this process"""
+
+class StackSampler:
+    """Samples one thread's Python stack on a timer, like py-spy but in-process"""
+
+    def __init__(self, interval: float, thread_id: int = None):
+        self.interval = interval
+        self.thread_id = thread_id or threading.get_ident()
+        self.frames = []  # Unique (name, file, line) entries
+        self._frame_ids = {}
+        self.samples = []  # Stacks as lists of frame ids, outermost first
+        self.weights = []  # Seconds represented by each sample
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _frame_id(self, code) -> int:
+        key = (code.co_name, code.co_filename, code.co_firstlineno)
+        frame_id = self._frame_ids.get(key)
+        if frame_id is None:
+            frame_id = self._frame_ids[key] = len(self.frames)
+            self.frames.append({'name': code.co_name, 'file': code.co_filename, 'line': code.co_firstlineno})
+        return frame_id
+
+    def _run(self):
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            now = time.perf_counter()
+            if frame is None:
+                break
+            stack = []
+            while frame is not None:
+                stack.append(self._frame_id(frame.f_code))
+                frame = frame.f_back
+            stack.reverse()
+            self.samples.append(stack)
+            self.weights.append(now - last)
+            last = now
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='upload-profiler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def to_speedscope(self, name: str) -> Dict[str, Any]:
+        """Profile in speedscope's file format (https://www.speedscope.app)"""
+        return {
+            '$schema': 'https://www.speedscope.app/file-format-schema.json',
+            'name': name,
+            'exporter': 'packing-list-profiler',
+            'shared': {'frames': self.frames},
+            'profiles': [{
+                'type': 'sampled',
+                'name': name,
+                'unit': 'seconds',
+                'startValue': 0,
+                'endValue': sum(self.weights),
+                'samples': self.samples,
+                'weights': self.weights
+            }]
+        }
+
+class UploadProfiler:
+    """Profiles parsing and validation of one upload and stores the artifacts next to it
+
+    Only one profile runs per process at a time, since tracemalloc is process-wide.
+    """
+
+    HEADER = 'X-Profile-Upload'
+    MODES = ('sample', 'cprofile')
+    ARTIFACTS = {
+        'summary': 'summary.json',
+        'speedscope': 'profile.speedscope.json',
+        'pstats': 'profile.pstats'
+    }
+    TOP_ALLOCATIONS = 10
+
+    _busy = threading.Lock()
+
+    def __init__(self, mode: str = 'sample', interval: float = None):
+        if mode not in self.MODES:
+            raise ValueError(f'Unknown profile mode: {mode}')
+        self.mode = mode
+        self.interval = interval or current_app.config.get('PROFILE_SAMPLE_INTERVAL', 0.005)
+        self.sampler = None
+        self.profile = None
+        self.summary = None
+        self._started_tracemalloc = False
+
+    @classmethod
+    def from_request(cls) -> Optional['UploadProfiler']:
+        """Profiler requested through the profiling header by an admin, otherwise None"""
+        mode = request.headers.get(cls.HEADER)
+        if not mode or not request.current_user.get('is_admin'):
+            return None
+        if cls._busy.locked():
+            # Never fail or delay the upload itself because profiling is unavailable
+            return None
+        return cls(mode if mode in cls.MODES else 'sample')
+
+    def __enter__(self):
+        if not self._busy.acquire(blocking=False):
+            raise ProfilerBusy('Another profile is already running in this process')
+
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        tracemalloc.reset_peak()
+
+        self._started_at = datetime.utcnow()
+        self._start = time.perf_counter()
+        if self.mode == 'sample':
+            self.sampler = StackSampler(self.interval)
+            self.sampler.start()
+        else:
+            self.profile = cProfile.Profile()
+            self.profile.enable()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if self.sampler is not None:
+                self.sampler.stop()
+            if self.profile is not None:
+                self.profile.disable()
+            duration = time.perf_counter() - self._start
+
+            _, peak = tracemalloc.get_traced_memory()
+            top = tracemalloc.take_snapshot().statistics('lineno')[:self.TOP_ALLOCATIONS]
+            self.summary = {
+                'mode': self.mode,
+                'started_at': self._started_at.isoformat(),
+                'duration_ms': round(duration * 1000, 1),
+                'peak_memory_bytes': peak,
+                'top_allocations': [
+                    {'location': str(stat.traceback), 'size_bytes': stat.size, 'count': stat.count}
+                    for stat in top
+                ],
+                'samples': len(self.sampler.samples) if self.sampler is not None else None,
+                'failed': exc_type is not None
+            }
+        finally:
+            if self._started_tracemalloc:
+                tracemalloc.stop()
+            self._busy.release()
+        return False
+
+    @staticmethod
+    def profile_dir(upload_id: int) -> str:
+        return os.path.join(current_app.config['UPLOAD_FOLDER'], 'profiles', str(upload_id))
+
+    @staticmethod
+    def artifact_path(upload_id: int, kind: str) -> Optional[str]:
+        """Path of a stored artifact, or None if it does not exist"""
+        path = os.path.join(UploadProfiler.profile_dir(upload_id), UploadProfiler.ARTIFACTS[kind])
+        return path if os.path.exists(path) else None
+
+    def save(self, upload_id: int) -> Dict[str, Any]:
+        """Write the profile for an upload, replacing earlier ones, and return the summary"""
+        directory = self.profile_dir(upload_id)
+        shutil.rmtree(directory, ignore_errors=True)
+        os.makedirs(directory)
+
+        if self.sampler is not None:
+            with open(os.path.join(directory, self.ARTIFACTS['speedscope']), 'w') as f:
+                json.dump(self.sampler.to_speedscope(f'upload {upload_id}'), f)
+            artifacts = ['summary', 'speedscope']
+        else:
+            self.profile.dump_stats(os.path.join(directory, self.ARTIFACTS['pstats']))
+            artifacts = ['summary', 'pstats']
+
+        self.summary.update({'upload_id': upload_id, 'artifacts': artifacts})
+        with open(os.path.join(directory, self.ARTIFACTS['summary']), 'w') as f:
+            json.dump(self.summary, f, indent=2)
+        return self.summary
+
+    @staticmethod
+    def discard(upload_id: int):
+        """Remove stored profiles of an upload"""
+        shutil.rmtree(UploadProfiler.profile_dir(upload_id), ignore_errors=True)
@@ -1,12 +1,14 @@
 import os
 from werkzeug.utils import secure_filename
 from typing import List, Optional
+from datetime import datetime
 
 class Validator:
     """General validation service"""
     
     ALLOWED_EXCEL_EXTENSIONS = {'xlsx', 'xls'}
     MAX_FILE_SIZE = 16 * 1024 * 1024  # 16MB
+    MAX_BULK_REVIEW_IDS = 1000
     
     @staticmethod
     def validate_file_upload(file) -> dict:
@@ -84,6 +86,86 @@ class Validator:
         
         return {'valid': True}
     
+    @staticmethod
+    def validate_bulk_review_data(data: dict) -> dict:
+        """Validate admin bulk review data"""
+        review_validation = Validator.validate_review_data(data)
+        if not review_validation['valid']:
+            return review_validation
+        
+        upload_ids = data.get('upload_ids')
+        review_filter = data.get('filter')
+        
+        if upload_ids is None and review_filter is None:
+            return {'valid': False, 'error': 'Either upload_ids or filter is required'}
+        
+        if upload_ids is not None:
+            if not isinstance(upload_ids, list) or not upload_ids:
+                return {'valid': False, 'error': 'upload_ids must be a non-empty list'}
+            if len(upload_ids) > Validator.MAX_BULK_REVIEW_IDS:
+                return {'valid': False, 'error': f'At most {Validator.MAX_BULK_REVIEW_IDS} upload_ids per request'}
+            if not all(isinstance(upload_id, int) and not isinstance(upload_id, bool) for upload_id in upload_ids):
+                return {'valid': False, 'error': 'upload_ids must contain integers'}
+        
+        if review_filter is not None:
+            if not isinstance(review_filter, dict):
+                return {'valid': False, 'error': 'filter must be an object'}
+            unknown = set(review_filter) - {'user_id', 'uploaded_after', 'uploaded_before', 'all'}
+            if unknown:
+                return {'valid': False, 'error': f'Unsupported filter fields: {", ".join(sorted(unknown))}'}
+            if 'all' in review_filter and review_filter['all'] is not True:
+                return {'valid': False, 'error': 'filter.all must be true when given'}
+            # An empty filter would review the whole pending queue; that has to be asked for explicitly
+            if not review_filter:
+                return {'valid': False, 'error': 'filter needs at least one criterion, or "all": true to review every pending upload'}
+            if 'user_id' in review_filter and (
+                isinstance(review_filter['user_id'], bool) or not isinstance(review_filter['user_id'], int)
+            ):
+                return {'valid': False, 'error': 'filter.user_id must be an integer'}
+            for field in ('uploaded_after', 'uploaded_before'):
+                if field in review_filter:
+                    try:
+                        datetime.fromisoformat(review_filter[field])
+                    except (TypeError, ValueError):
+                        return {'valid': False, 'error': f'{field} must be an ISO 8601 datetime'}
+        
+        return {'valid': True}
+    
+    @staticmethod
+    def validate_tolerance_rule(data: dict) -> dict:
+        """Validate tolerance rule definition"""
+        if not isinstance(data.get('name'), str) or not data['name'].strip():
+            return {'valid': False, 'error': 'Rule name is required'}
+        
+        if len(data['name']) > 100:
+            return {'valid': False, 'error': 'Rule name must be less than 100 characters'}
+        
+        if 'priority' in data and (isinstance(data['priority'], bool) or not isinstance(data['priority'], int)):
+            return {'valid': False, 'error': 'Priority must be an integer'}
+        
+        prefix = data.get('item_code_prefix')
+        if prefix is not None and (not isinstance(prefix, str) or len(prefix) > 100):
+            return {'valid': False, 'error': 'item_code_prefix must be a string of at most 100 characters'}
+        
+        for field in ('min_quantity', 'max_quantity', 'abs_tolerance', 'pct_tolerance', 'auto_accept_pct'):
+            value = data.get(field)
+            if value is None:
+                continue
+            if isinstance(value, bool) or not isinstance(value, (int, float)) or value < 0:
+                return {'valid': False, 'error': f'{field} must be a non-negative number'}
+        
+        if data.get('min_quantity') is not None and data.get('max_quantity') is not None:
+            if data['min_quantity'] >= data['max_quantity']:
+                return {'valid': False, 'error': 'min_quantity must be less than max_quantity'}
+        
+        if all(data.get(field) is None for field in ('abs_tolerance', 'pct_tolerance', 'auto_accept_pct')):
+            return {'valid': False, 'error': 'At least one of abs_tolerance, pct_tolerance or auto_accept_pct is required'}
+        
+        if 'is_active' in data and not isinstance(data['is_active'], bool):
+            return {'valid': False, 'error': 'is_active must be a boolean'}
+        
+        return {'valid': True}
+    
     @staticmethod
     def _allowed_file(filename: str) -> bool:
         """Check if file extension is allowed"""
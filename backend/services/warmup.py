@@ -0,0 +1,71 @@
+from flask import current_app
+from database import db
+from services.item_code_index import ItemCodeIndex
+from services.tolerance_engine import ToleranceEngine
+from datetime import datetime
+from typing import Dict, Any
+import importlib
+import logging
+import os
+import signal
+import time
+
+logger = logging.getLogger('packing_list.warmup')
+
+class Warmup:
+    """Loads heavy modules and builds in-memory snapshots before workers fork
+
+    Under gunicorn with preload_app, this runs once in the master so that every worker
+    starts with the data stack imported and shares the snapshots copy-on-write.
+    """
+
+    MODULES = ('numpy', 'pandas', 'openpyxl', 'pandas.io.excel._openpyxl')
+    MASTER_PID_ENV = 'GUNICORN_MASTER_PID'  # Set by gunicorn.conf.py in the master
+
+    @staticmethod
+    def run(app) -> Dict[str, Any]:
+        """Import the data stack and build the price code index and tolerance rules"""
+        state = app.extensions.setdefault('warmup', {})
+        state['ready'] = False
+        start = time.perf_counter()
+
+        for module in Warmup.MODULES:
+            importlib.import_module(module)
+
+        with app.app_context():
+            # Drop snapshots from an earlier warmup so a reload picks up new prices
+            ItemCodeIndex.invalidate()
+            index = ItemCodeIndex.get()
+            ToleranceEngine.get_compiled()
+            db.session.remove()
+            # Connections must not be shared with forked workers
+            for engine in db.engines.values():
+                engine.dispose()
+
+        state.update({
+            'ready': True,
+            'warmed_at': datetime.utcnow().isoformat(),
+            'duration_ms': round((time.perf_counter() - start) * 1000, 1),
+            'item_codes': len(index.codes),
+            'pid': os.getpid()
+        })
+        logger.info('Warmup finished in %.1f ms with %d item codes', state['duration_ms'], state['item_codes'])
+        return state
+
+    @staticmethod
+    def status(app) -> Dict[str, Any]:
+        """Warmup state of this process; apps started without a warmup are always ready"""
+        return app.extensions.get('warmup', {'ready': True})
+
+    @staticmethod
+    def request_reload() -> bool:
+        """Ask the gunicorn master to re-warm and gracefully replace its workers"""
+        if not current_app.config.get('RELOAD_WORKERS_ON_PRICE_UPDATE'):
+            return False
+
+        master_pid = os.environ.get(Warmup.MASTER_PID_ENV)
+        if not master_pid or int(master_pid) != os.getppid():
+            return False
+
+        os.kill(int(master_pid), signal.SIGHUP)
+        return True
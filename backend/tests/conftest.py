@@ -0,0 +1,44 @@
+"""Fixtures for the backend test suite: a throwaway app on a temporary SQLite database.
+
+Run from the backend directory: python -m pytest tests
+"""
+import os
+import sys
+import uuid
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+@pytest.fixture(scope='session')
+def app(tmp_path_factory):
+    from config import Config
+
+    workdir = tmp_path_factory.mktemp('app')
+    Config.SQLALCHEMY_DATABASE_URI = f"sqlite:///{workdir / 'test.db'}"
+    Config.UPLOAD_FOLDER = str(workdir / 'uploads')
+
+    from app import create_app
+    from database import db
+
+    app = create_app()
+    app.testing = True
+    with app.app_context():
+        db.create_all()
+    return app
+
+@pytest.fixture
+def app_context(app):
+    from database import db
+
+    with app.app_context():
+        yield
+        db.session.rollback()
+
+@pytest.fixture
+def source_file(tmp_path):
+    """A file with content no other test uses, so each test gets its own stored object"""
+    path = tmp_path / 'original.xlsx'
+    path.write_bytes(f'packing list {uuid.uuid4()}\n'.encode('utf-8') * 1000)
+    return str(path)
@@ -0,0 +1,48 @@
+from database import db
+from models.stored_file import StoredFile
+from services.file_store import FileStore
+from services.storage import get_storage
+
+def _stored(digest):
+    return StoredFile.query.filter_by(digest=digest).populate_existing().first()
+
+def test_put_is_undone_by_rollback(app_context, source_file):
+    digest = FileStore.put(source_file)
+    db.session.rollback()
+
+    assert _stored(digest) is None
+
+def test_put_existing_content_adds_a_reference(app_context, source_file):
+    digest = FileStore.put(source_file)
+    db.session.commit()
+
+    assert FileStore.put(source_file) == digest
+    db.session.commit()
+    assert _stored(digest).ref_count == 2
+
+    FileStore.put(source_file)
+    db.session.rollback()
+    assert _stored(digest).ref_count == 2
+
+def test_insert_if_absent_reports_a_digest_stored_by_another_request(app_context, source_file):
+    values = {'digest': FileStore.hash_file(source_file), 'size': 1, 'stored_size': 1, 'compression': None, 'ref_count': 1}
+
+    assert FileStore._insert_if_absent(values)
+    assert not FileStore._insert_if_absent(values)
+    assert _stored(values['digest']).ref_count == 1
+
+def test_release_deletes_the_object_only_after_commit(app_context, source_file):
+    digest = FileStore.put(source_file)
+    db.session.commit()
+    key = FileStore.object_key(digest, _stored(digest).compression)
+
+    FileStore.release(digest)
+    db.session.rollback()
+    assert _stored(digest).ref_count == 1
+    assert get_storage().exists(key)
+
+    FileStore.release(digest)
+    assert get_storage().exists(key)
+    db.session.commit()
+    assert _stored(digest) is None
+    assert not get_storage().exists(key)
@@ -0,0 +1,26 @@
+import pytest
+from services.item_codec import ItemCodec
+
+pytestmark = pytest.mark.skipif(not ItemCodec.available(), reason='needs msgpack and zstandard')
+
+def _items(count):
+    items = []
+    for i in range(count):
+        item = {'item_code': f'IC{i % 7}', 'quantity': i, 'unit_price': None if i % 5 == 0 else i * 1.5, 'errors': [i] if i % 3 else []}
+        if i % 4 == 0:
+            item['suggestions'] = [f'IC{i}']
+        items.append(item)
+    return items
+
+@pytest.mark.parametrize('items', [_items(25), [{'a': i, 'b': str(i)} for i in range(25)], [{}] * 3, []])
+@pytest.mark.parametrize('batch_size', [1, 4, 1000])
+def test_iter_decode_matches_decode(items, batch_size):
+    data = ItemCodec.encode(items)
+
+    assert list(ItemCodec.iter_decode(data, batch_size=batch_size)) == ItemCodec.decode(data) == items
+
+def test_iter_decode_selects_fields():
+    data = ItemCodec.encode(_items(10))
+
+    assert list(ItemCodec.iter_decode(data, fields=['item_code', 'suggestions'], batch_size=3)) == \
+        ItemCodec.decode(data, fields=['item_code', 'suggestions'])
@@ -0,0 +1,64 @@
+import io
+import os
+import pytest
+
+moto = pytest.importorskip('moto')
+pytest.importorskip('boto3')
+
+from services.storage import S3StorageBackend
+
+BUCKET = 'packing-list-test'
+MIB = 1024 * 1024
+
+@pytest.fixture
+def backend(monkeypatch):
+    monkeypatch.setenv('AWS_ACCESS_KEY_ID', 'testing')
+    monkeypatch.setenv('AWS_SECRET_ACCESS_KEY', 'testing')
+    with moto.mock_aws():
+        # S3 rejects multipart parts below 5 MiB, other than the last
+        backend = S3StorageBackend(BUCKET, prefix='objects', region='us-east-1',
+                                   multipart_threshold=5 * MIB, multipart_chunksize=5 * MIB)
+        backend.client.create_bucket(Bucket=BUCKET)
+        yield backend
+
+def test_put_and_open(backend):
+    assert backend.put('ab/small', io.BytesIO(b'hello')) == 5
+    assert backend.open('ab/small').read() == b'hello'
+    assert backend.client.head_object(Bucket=BUCKET, Key='objects/ab/small')['ContentLength'] == 5
+
+def test_put_above_threshold_uses_multipart(backend):
+    data = os.urandom(11 * MIB)
+
+    assert backend.put('ab/large', io.BytesIO(data)) == len(data)
+    head = backend.client.head_object(Bucket=BUCKET, Key='objects/ab/large')
+    assert head['ETag'].strip('"').endswith('-3')  # Multipart ETags carry the part count
+    assert backend.open('ab/large').read() == data
+
+def test_iter_objects_strips_prefix(backend):
+    backend.client.put_object(Bucket=BUCKET, Key='other/x', Body=b'x')
+    backend.put('ab/one', io.BytesIO(b'1'))
+    backend.put('cd/two', io.BytesIO(b'22'))
+
+    objects = sorted(backend.iter_objects())
+    assert [(o.key, o.size) for o in objects] == [('ab/one', 1), ('cd/two', 2)]
+    assert all(o.modified > 0 for o in objects)
+
+def test_exists_and_delete(backend):
+    backend.put('ab/gone', io.BytesIO(b'x'))
+    assert backend.exists('ab/gone')
+
+    backend.delete('ab/gone')
+    assert not backend.exists('ab/gone')
+    backend.delete('ab/gone')  # Deleting a missing key is not an error
+
+def test_presigned_url(backend):
+    requests = pytest.importorskip('requests')
+    backend.put('ab/file', io.BytesIO(b'contents'))
+
+    url = backend.presigned_url('ab/file', 'report.xlsx', 60)
+    assert 'objects/ab/file' in url
+
+    response = requests.get(url)
+    assert response.status_code == 200
+    assert response.content == b'contents'
+    assert response.headers['Content-Disposition'] == 'attachment; filename="report.xlsx"'
@@ -0,0 +1,48 @@
+import uuid
+
+import pytest
+
+from services.token_revocation import TokenRevocation
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+def _register(client):
+    response = client.post('/api/auth/register', json={'username': f'user_{uuid.uuid4().hex[:8]}', 'password': 'secret1'})
+    assert response.status_code == 201
+    return response.get_json()
+
+def _uploads(client, token):
+    return client.get('/api/user/uploads', headers={'Authorization': f'Bearer {token}'})
+
+def test_logout_rejects_access_tokens_issued_before_it(client):
+    session = _register(client)
+    assert _uploads(client, session['token']).status_code == 200
+
+    assert client.post('/api/auth/logout', json={'refresh_token': session['refresh_token']}).status_code == 200
+    response = _uploads(client, session['token'])
+    assert response.status_code == 401
+    assert response.get_json()['error'] == 'Token has been revoked'
+
+    login = client.post('/api/auth/login', json={'username': session['user']['username'], 'password': 'secret1'})
+    assert _uploads(client, login.get_json()['token']).status_code == 200
+
+def test_refresh_token_reuse_rejects_access_tokens(client, app):
+    app.config['REFRESH_TOKEN_REUSE_GRACE'] = 0
+    try:
+        session = _register(client)
+        assert client.post('/api/auth/refresh', json={'refresh_token': session['refresh_token']}).status_code == 200
+        assert client.post('/api/auth/refresh', json={'refresh_token': session['refresh_token']}).status_code == 401
+    finally:
+        app.config['REFRESH_TOKEN_REUSE_GRACE'] = 10
+
+    assert _uploads(client, session['token']).status_code == 401
+
+def test_other_processes_load_cutoffs_from_the_database(client):
+    session = _register(client)
+    client.post('/api/auth/logout', json={'refresh_token': session['refresh_token']})
+
+    # As in a process that did not handle the logout
+    TokenRevocation.invalidate()
+    assert _uploads(client, session['token']).status_code == 401
@@ -0,0 +1,69 @@
+from flask import request, current_app
+import gzip
+
+try:
+    import brotli
+except ImportError:  # Brotli is optional; gzip is always available
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = {'application/json', 'text/csv', 'text/plain', 'text/html'}
+
+def _accepted_encodings(header: str) -> dict:
+    """Encodings from an Accept-Encoding header with their q-values"""
+    accepted = {}
+    for part in header.split(','):
+        name, _, params = part.strip().partition(';')
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            accepted[name.strip().lower()] = quality
+    return accepted
+
+def choose_encoding(header: str):
+    """Best supported encoding the client accepts: br, then gzip, or None"""
+    accepted = _accepted_encodings(header or '')
+    for encoding in ('br', 'gzip'):
+        if encoding == 'br' and brotli is None:
+            continue
+        if accepted.get(encoding, accepted.get('*', 0)) > 0:
+            return encoding
+    return None
+
+def compress(data: bytes, encoding: str, config) -> bytes:
+    if encoding == 'br':
+        return brotli.compress(data, quality=config['COMPRESS_BR_QUALITY'])
+    return gzip.compress(data, compresslevel=config['COMPRESS_GZIP_LEVEL'], mtime=0)
+
+def init_compression(app):
+    """Compress large JSON and text responses when the client allows it"""
+
+    @app.after_request
+    def compress_response(response):
+        config = current_app.config
+        if (
+            not config.get('COMPRESS_RESPONSES')
+            or response.direct_passthrough  # Files and other streamed bodies are left alone
+            or response.is_streamed
+            or response.status_code < 200 or response.status_code in (204, 206, 304)
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES
+        ):
+            return response
+
+        response.vary.add('Accept-Encoding')
+        data = response.get_data()
+        if len(data) < config['COMPRESS_MIN_SIZE']:
+            return response
+
+        encoding = choose_encoding(request.headers.get('Accept-Encoding'))
+        if encoding is None:
+            return response
+
+        response.set_data(compress(data, encoding, config))
+        response.headers['Content-Encoding'] = encoding
+        return response
@@ -0,0 +1,101 @@
+from flask import request, jsonify, current_app
+from functools import wraps
+from database import db
+from models.idempotency_key import IdempotencyKey
+from services.metrics import Metrics
+import hashlib
+import math
+import time
+
+HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+POLL_INTERVAL = 0.2  # Seconds between checks on an attempt in progress
+CHUNK_SIZE = 1024 * 1024
+
+def request_fingerprint():
+    """SHA-256 of the method, path and body, so a key cannot be reused for a different request"""
+    digest = hashlib.sha256(f'{request.method} {request.full_path}\n'.encode('utf-8'))
+    if request.mimetype in ('multipart/form-data', 'application/x-www-form-urlencoded'):
+        for name, value in sorted(request.form.items(multi=True)):
+            digest.update(f'{name}={value}\n'.encode('utf-8'))
+        for name, file in sorted(request.files.items(multi=True), key=lambda entry: entry[0]):
+            digest.update(f'{name}:{file.filename}\n'.encode('utf-8'))
+            for chunk in iter(lambda: file.stream.read(CHUNK_SIZE), b''):
+                digest.update(chunk)
+            file.stream.seek(0)
+    else:
+        digest.update(request.get_data())
+    return digest.hexdigest()
+
+def _wait_for_attempt(user_id, key, fingerprint):
+    """Claim the key, or wait for the attempt holding it; returns (record_id, None) or (None, response)"""
+    deadline = time.monotonic() + current_app.config['IDEMPOTENCY_WAIT_TIMEOUT']
+    waited = False
+    while True:
+        record, claimed = IdempotencyKey.claim(user_id, key, fingerprint)
+        while not claimed and record is not None:
+            if record.fingerprint != fingerprint:
+                Metrics.FLOW_RESULTS.labels(flow='idempotency', result='mismatch').inc()
+                return None, (jsonify({'error': f'{HEADER} was already used for a different request'}), 422)
+
+            if record.status == 'completed':
+                Metrics.FLOW_RESULTS.labels(flow='idempotency', result='waited' if waited else 'replayed').inc()
+                return None, record.replay()
+
+            if record.is_stale() and record.take_over():
+                return record.id, None
+
+            if time.monotonic() >= deadline:
+                Metrics.FLOW_RESULTS.labels(flow='idempotency', result='conflict').inc()
+                response = jsonify({'error': f'A request with this {HEADER} is still in progress'})
+                response.headers['Retry-After'] = str(math.ceil(current_app.config['IDEMPOTENCY_WAIT_TIMEOUT']))
+                return None, (response, 409)
+
+            waited = True
+            time.sleep(POLL_INTERVAL)
+            db.session.rollback()  # End the read transaction so the next check sees the other attempt's commit
+            record = IdempotencyKey.find(user_id, key)
+
+        if claimed:
+            return record.id, None
+        # The other attempt failed and released the key: try to claim it again
+
+def idempotent(f):
+    """Decorator replaying the stored response of a request repeated with the same Idempotency-Key
+
+    Requests without the header run as usual. A duplicate arriving while the first
+    attempt is still running waits for it (up to IDEMPOTENCY_WAIT_TIMEOUT) instead of
+    running in parallel. Failed attempts (exceptions, 5xx and 429) are not stored, so
+    a retry runs again. Use after token_required: keys are scoped per user.
+    """
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        key = request.headers.get(HEADER)
+        if not key:
+            return f(*args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            return jsonify({'error': f'{HEADER} must be at most {MAX_KEY_LENGTH} characters'}), 400
+
+        record_id, response = _wait_for_attempt(request.current_user['user_id'], key, request_fingerprint())
+        if response is not None:
+            return response
+
+        try:
+            response = current_app.make_response(f(*args, **kwargs))
+        except Exception:
+            db.session.rollback()
+            IdempotencyKey.release(record_id)
+            raise
+
+        try:
+            if response.status_code >= 500 or response.status_code == 429 or response.is_streamed:
+                IdempotencyKey.release(record_id)
+            else:
+                IdempotencyKey.complete(record_id, response)
+        except Exception as e:
+            # The request itself succeeded; a retry waits for the lock to go stale and runs again
+            db.session.rollback()
+            current_app.logger.warning('Could not store response for %s %s: %s', HEADER, key, e)
+        return response
+
+    return decorated
@@ -1,8 +1,94 @@
 import jwt
+from collections import OrderedDict
 from datetime import datetime, timedelta
 from flask import current_app
 from functools import wraps
 from flask import request, jsonify
+from services.metrics import Metrics
+import hashlib
+import threading
+import time
+
+class TokenCache:
+    """Bounded LRU cache of verified token claims, keyed by a digest of the token"""
+    
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()  # digest -> (claims, valid_until)
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def _digest(token):
+        # Raw tokens are never kept in memory as keys
+        return hashlib.sha256(token.encode('utf-8')).digest()
+    
+    def get(self, token):
+        """Cached claims of a previously verified token, or None if absent or expired"""
+        key = self._digest(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if time.time() >= entry[1]:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+    
+    def put(self, token, claims):
+        """Cache claims until the token's exp or the cache TTL, whichever comes first"""
+        valid_until = time.time() + self.ttl
+        if 'exp' in claims:
+            valid_until = min(valid_until, claims['exp'])
+        
+        key = self._digest(token)
+        with self._lock:
+            self._entries[key] = (claims, valid_until)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+    
+    def discard(self, token):
+        """Drop a token from the cache"""
+        with self._lock:
+            self._entries.pop(self._digest(token), None)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+_revocation_checks = []
+
+def token_revocation_check(callback):
+    """Register a callback(claims) -> bool that reports revoked tokens
+    
+    Checks run on every authenticated request, including cache hits, so they
+    must be cheap (e.g. an in-memory denylist or a per-user cutoff lookup).
+    Registering the same callback again has no effect.
+    """
+    if callback not in _revocation_checks:
+        _revocation_checks.append(callback)
+    return callback
+
+def is_token_revoked(claims):
+    """Whether any registered revocation check rejects these claims"""
+    return any(check(claims) for check in _revocation_checks)
+
+def get_token_cache():
+    """Verified-token cache of the current app, or None when disabled"""
+    cache = current_app.extensions.get('token_cache')
+    if cache is None:
+        max_size = current_app.config.get('TOKEN_CACHE_SIZE', 0)
+        cache = TokenCache(max_size, current_app.config.get('TOKEN_CACHE_TTL', 300)) if max_size > 0 else False
+        current_app.extensions['token_cache'] = cache
+    return cache or None
+
+def revoke_token(token):
+    """Evict a token from this process's cache; pair with a revocation check to reject it everywhere"""
+    cache = get_token_cache()
+    if cache is not None:
+        cache.discard(token)
 
 def generate_token(user_id, is_admin=False):
     """Generate JWT token for user"""
@@ -10,7 +96,7 @@ def generate_token(user_id, is_admin=False):
         'user_id': user_id,
         'is_admin': is_admin,
         'exp': datetime.utcnow() + timedelta(seconds=current_app.config['JWT_ACCESS_TOKEN_EXPIRES']),
-        'iat': datetime.utcnow()
+        'iat': time.time()  # Fractional, so a revocation cutoff separates tokens issued in the same second
     }
     
     return jwt.encode(
@@ -33,6 +119,23 @@ def decode_token(token):
     except jwt.InvalidTokenError:
         return {'error': 'Invalid token'}
 
+def verify_token(token):
+    """Decode a token, skipping signature verification for recently verified tokens"""
+    cache = get_token_cache()
+    if cache is None:
+        return decode_token(token)
+    
+    claims = cache.get(token)
+    Metrics.cache_lookup('verified_tokens', claims is not None)
+    if claims is None:
+        claims = decode_token(token)
+        if 'error' in claims:
+            return claims
+        cache.put(token, claims)
+    
+    # Callers may modify the claims they get, the cached copy must stay intact
+    return dict(claims)
+
 def token_required(f):
     """Decorator to require valid JWT token"""
     @wraps(f)
@@ -45,10 +148,13 @@ def token_required(f):
         if token.startswith('Bearer '):
             token = token[7:]
         
-        payload = decode_token(token)
+        payload = verify_token(token)
         if 'error' in payload:
             return jsonify(payload), 401
         
+        if is_token_revoked(payload):
+            return jsonify({'error': 'Token has been revoked'}), 401
+        
         request.current_user = payload
         return f(*args, **kwargs)
     
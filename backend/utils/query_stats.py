@@ -0,0 +1,175 @@
+from collections import Counter
+from contextlib import contextmanager
+from flask import g, request, current_app, has_app_context
+from functools import wraps
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+import json
+import logging
+import re
+import time
+
+logger = logging.getLogger('packing_list.slow_requests')
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised when a request runs more SQL statements than its budget allows"""
+
+class RequestQueryStats:
+    """SQL statements executed while handling one request"""
+
+    _PARAM = r'\s*(?:\?|%s|%\(\w+\)s|:\w+)\s*'  # qmark, format, pyformat and named placeholders
+    _IN_LIST = re.compile(rf'\((?:{_PARAM},)+{_PARAM}\)')
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.count = 0
+        self.db_time = 0.0
+        self.statements = Counter()
+        self.statement_time = Counter()
+        self.budget = None
+        self.committed = False
+
+    @classmethod
+    def normalize(cls, statement: str) -> str:
+        """Collapse whitespace and expanded IN lists so repeated statements group together"""
+        return cls._IN_LIST.sub('(?...)', ' '.join(statement.split()))
+
+    def record(self, statement: str, duration: float):
+        key = self.normalize(statement)
+        self.count += 1
+        self.db_time += duration
+        self.statements[key] += 1
+        self.statement_time[key] += duration
+
+    def top_statements(self, limit: int = 5):
+        """Most repeated statements, the usual sign of an N+1 pattern"""
+        return [
+            {
+                'statement': statement[:300],
+                'count': count,
+                'total_ms': round(self.statement_time[statement] * 1000, 2)
+            }
+            for statement, count in self.statements.most_common(limit)
+        ]
+
+def _current_stats():
+    if has_app_context():
+        return g.get('query_stats')
+    return None
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_stats() is not None:
+        conn.info.setdefault('query_start_time', []).append(time.perf_counter())
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current_stats()
+    if stats is not None and conn.info.get('query_start_time'):
+        stats.record(statement, time.perf_counter() - conn.info['query_start_time'].pop())
+
+def _budget_exceeded(stats: RequestQueryStats):
+    """Message describing a budget overrun, or None while the request is within its budget"""
+    budget = stats.budget if stats.budget is not None else current_app.config.get('QUERY_BUDGET')
+    if budget and stats.count > budget:
+        return (
+            f'{request.endpoint} ran {stats.count} SQL statements, over its budget of {budget}: '
+            f'{json.dumps(stats.top_statements(3))}'
+        )
+    return None
+
+def _enforce_budget() -> bool:
+    # Tests fail loudly; production only logs unless QUERY_BUDGET_ENFORCE is set
+    return current_app.testing or current_app.config.get('QUERY_BUDGET_ENFORCE')
+
+@event.listens_for(Session, 'before_commit')
+def _check_budget_before_commit(session):
+    """Enforce the budget before a write persists, so a failed request leaves no changes behind"""
+    stats = _current_stats()
+    if stats is None or not _enforce_budget():
+        return
+    message = _budget_exceeded(stats)
+    if message:
+        raise QueryBudgetExceeded(message)
+
+@event.listens_for(Session, 'after_commit')
+def _record_commit(session):
+    stats = _current_stats()
+    if stats is not None:
+        stats.committed = True
+
+@contextmanager
+def untracked_queries():
+    """Leave statements run in the block out of the request's stats and budget
+
+    For process-wide bookkeeping (cache refreshes) that some request has to run,
+    but which is not part of that request's own work.
+    """
+    stats = g.pop('query_stats', None) if has_app_context() else None
+    try:
+        yield
+    finally:
+        if stats is not None:
+            g.query_stats = stats
+
+def query_budget(max_queries: int):
+    """Decorator setting the maximum number of SQL statements an endpoint may run"""
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            stats = _current_stats()
+            if stats is not None:
+                stats.budget = max_queries
+            return f(*args, **kwargs)
+
+        return decorated
+
+    return decorator
+
+def init_query_stats(app):
+    """Count SQL statements and database time for every request of the app"""
+
+    @app.before_request
+    def start_query_stats():
+        g.query_stats = RequestQueryStats()
+
+    @app.after_request
+    def report_query_stats(response):
+        stats = g.pop('query_stats', None)
+        if stats is None:
+            return response
+
+        config = current_app.config
+        duration = time.perf_counter() - stats.started_at
+        db_ms = stats.db_time * 1000
+
+        if current_app.debug or config.get('QUERY_STATS_HEADERS'):
+            response.headers['X-DB-Query-Count'] = str(stats.count)
+            response.headers['X-DB-Time-Ms'] = f'{db_ms:.1f}'
+            response.headers.add('Server-Timing', f'db;dur={db_ms:.1f};desc="{stats.count} queries"')
+
+        slow_ms = config.get('SLOW_REQUEST_MS')
+        slow_queries = config.get('SLOW_REQUEST_QUERIES')
+        if (slow_ms and duration * 1000 >= slow_ms) or (slow_queries and stats.count >= slow_queries):
+            logger.warning(json.dumps({
+                'event': 'slow_request',
+                'method': request.method,
+                'path': request.path,
+                'endpoint': request.endpoint,
+                'status': response.status_code,
+                'duration_ms': round(duration * 1000, 1),
+                'query_count': stats.count,
+                'db_ms': round(db_ms, 1),
+                'top_statements': stats.top_statements()
+            }))
+
+        message = _budget_exceeded(stats)
+        if message:
+            # Once the request committed, a production error would report a failed write that persisted,
+            # so overruns after the commit only fail tests
+            if current_app.testing or (_enforce_budget() and not stats.committed):
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+
+        return response
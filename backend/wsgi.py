@@ -0,0 +1,9 @@
+"""Production WSGI entry point: gunicorn -c gunicorn.conf.py wsgi:app
+
+Unlike app.py this does not create tables; run `alembic upgrade head` on deploy.
+"""
+from app import create_app
+from services.warmup import Warmup
+
+app = create_app()
+Warmup.run(app)
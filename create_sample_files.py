@@ -1,93 +1,246 @@
+"""Sample and synthetic Excel files for the packing list system.
+
+Without arguments, writes the five-row templates to sample_files/. With --rows, writes
+deterministic synthetic packing lists, price lists and duty tables of any size
+(1k to 1M rows) for load tests and benchmarks:
+
+    python create_sample_files.py --rows 100000 --seed 7 --mismatch-rate 0.05 --missing-rate 0.01
+
+The same arguments always produce the same rows.
+"""
+from openpyxl import Workbook
 import pandas as pd
+import argparse
 import os
+import random
+
+def write_templates(output_dir='sample_files'):
+    """Write the five-row templates shown to users"""
+    # 创建示例文件夹
+    if not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+
+    # 价格列表数据
+    price_data = {
+        'Item Code': ['A001', 'A002', 'A003', 'B001', 'B002'],
+        'Description': [
+            'Product A - Standard',
+            'Product A - Premium',
+            'Product A - Deluxe',
+            'Product B - Basic',
+            'Product B - Premium'
+        ],
+        'Unit Price (USD)': [100.50, 150.75, 200.25, 80.00, 120.00],
+        'Effective Date': ['2024-01-01', '2024-01-01', '2024-01-01', '2024-01-01', '2024-01-01'],
+        'Category': ['Category A', 'Category A', 'Category A', 'Category B', 'Category B']
+    }
+
+    # 创建价格列表 Excel 文件
+    df_price = pd.DataFrame(price_data)
+    df_price.to_excel(os.path.join(output_dir, 'price_list_template.xlsx'), index=False, sheet_name='Price List')
+
+    # 关税率数据
+    duty_data = {
+        'HS Code': ['8471.30.00', '8471.41.00', '8471.49.00', '8471.50.00', '8471.60.00'],
+        'Description': [
+            'Portable computers',
+            'Processing units',
+            'System units',
+            'Processing units',
+            'Input/output units'
+        ],
+        'Duty Rate (%)': [0.00, 5.00, 7.50, 10.00, 2.50],
+        'VAT Rate (%)': [13.00, 13.00, 13.00, 13.00, 13.00],
+        'Notes': [
+            'Duty free for educational use',
+            'Standard rate applies',
+            'Special rate for assembled units',
+            'Higher rate for standalone units',
+            'Reduced rate for peripherals'
+        ]
+    }
+
+    # 创建关税率 Excel 文件
+    df_duty = pd.DataFrame(duty_data)
+    df_duty.to_excel(os.path.join(output_dir, 'duty_rates_template.xlsx'), index=False, sheet_name='Duty Rates')
+
+    # 装箱单数据 - 简化版本，确保符合file_parser.py的要求
+    packing_list_data = {
+        'Item Code': ['A001', 'A002', 'B001', 'A003', 'B002'],
+        'Description': [
+            'Product A - Standard',
+            'Product A - Premium',
+            'Product B - Basic',
+            'Product A - Deluxe',
+            'Product B - Premium'
+        ],
+        'Quantity': [100, 50, 75, 25, 40],
+        'Unit Price': [100.50, 150.75, 80.00, 200.25, 120.00],  # 确保与价格列表匹配
+    }
+
+    # 创建装箱单 Excel 文件
+    df_packing = pd.DataFrame(packing_list_data)
+
+    # 创建一个 Excel writer 对象
+    with pd.ExcelWriter(os.path.join(output_dir, 'packing_list_template.xlsx'), engine='openpyxl') as writer:
+        # 写入主数据
+        df_packing.to_excel(writer, index=False, sheet_name='Packing List')
+
+        # 获取工作表对象
+        worksheet = writer.sheets['Packing List']
+
+        # 设置列宽
+        for column in worksheet.columns:
+            max_length = 0
+            column = [cell for cell in column]
+            for cell in column:
+                try:
+                    if len(str(cell.value)) > max_length:
+                        max_length = len(str(cell.value))
+                except:
+                    pass
+            adjusted_width = (max_length + 2)
+            worksheet.column_dimensions[column[0].column_letter].width = adjusted_width
+
+    print(f"示例文件已创建在 '{output_dir}' 文件夹中：")
+    print("1. price_list_template.xlsx")
+    print("2. duty_rates_template.xlsx")
+    print("3. packing_list_template.xlsx")
+
+def item_code(index):
+    """Code of the index-th item in generated price lists and duty tables"""
+    return f'SKU{index:07d}'
+
+def catalogue_prices(seed, size):
+    """Prices of the first `size` items; a larger catalogue extends a smaller one of the same seed"""
+    rng = random.Random(f'{seed}:prices')
+    return [round(rng.uniform(1, 500), 2) for _ in range(size)]
+
+def _write_rows(path, sheet_name, header, rows):
+    # write_only 模式逐行写入，百万行时内存占用保持平稳
+    workbook = Workbook(write_only=True)
+    worksheet = workbook.create_sheet(sheet_name)
+    worksheet.append(header)
+    for row in rows:
+        worksheet.append(row)
+    workbook.save(path)
+
+def generate_price_list(path, rows, seed=0, bad_cell_rate=0.0):
+    """Price list of `rows` items; bad cells make the import report row errors"""
+    rng = random.Random(f'{seed}:price_list')
+    stats = {'rows': rows, 'bad_cells': 0}
+    prices = catalogue_prices(seed, rows)
+
+    def produce():
+        for index, price in enumerate(prices):
+            if rng.random() < bad_cell_rate:
+                stats['bad_cells'] += 1
+                price = None
+            yield [item_code(index), f'Product {index}', price, 'Category ' + 'ABCDE'[index % 5]]
+
+    _write_rows(path, 'Price List', ['Item Code', 'Description', 'Unit Price (USD)', 'Category'], produce())
+    return stats
+
+def generate_duty_rates(path, rows, seed=0, bad_cell_rate=0.0):
+    """Duty table of `rows` items; bad cells make the import report row errors"""
+    rng = random.Random(f'{seed}:duty_rates')
+    stats = {'rows': rows, 'bad_cells': 0}
+
+    def produce():
+        for index in range(rows):
+            rate = rng.choice((0.0, 2.5, 5.0, 7.5, 10.0, 15.0))
+            if rng.random() < bad_cell_rate:
+                stats['bad_cells'] += 1
+                rate = -1.0
+            yield [item_code(index), f'Product {index}', rate]
+
+    _write_rows(path, 'Duty Rates', ['Item Code', 'Description', 'Duty Rate (%)'], produce())
+    return stats
+
+def generate_packing_list(path, rows, seed=0, catalogue_size=None, mismatch_rate=0.0, missing_rate=0.0, bad_cell_rate=0.0):
+    """Packing list of `rows` lines drawn from a generated price list of `catalogue_size` items
+
+    Missing lines use codes absent from the price list, mismatched lines are priced 5-50% off
+    the catalogue price, and bad cells (blank code, zero quantity or blank price) show up as
+    row validation errors. The rates are probabilities per line.
+    """
+    rng = random.Random(f'{seed}:packing_list')
+    catalogue_size = catalogue_size or rows
+    stats = {'rows': rows, 'mismatches': 0, 'missing': 0, 'bad_cells': 0}
+    prices = catalogue_prices(seed, catalogue_size)
+
+    def produce():
+        for line in range(rows):
+            index = rng.randrange(catalogue_size)
+            code = item_code(index)
+            quantity = rng.randint(1, 500)
+            price = prices[index]
+
+            roll = rng.random()
+            if roll < missing_rate:
+                stats['missing'] += 1
+                code = f'NEW{line:07d}'
+            elif roll < missing_rate + mismatch_rate:
+                stats['mismatches'] += 1
+                price = round(price * (1 + rng.choice((-1, 1)) * rng.uniform(0.05, 0.5)), 2)
+
+            if rng.random() < bad_cell_rate:
+                stats['bad_cells'] += 1
+                column = rng.randrange(3)
+                if column == 0:
+                    code = None
+                elif column == 1:
+                    quantity = 0
+                else:
+                    price = None
+
+            yield [code, f'Product {index}', quantity, price]
+
+    _write_rows(path, 'Packing List', ['Item Code', 'Description', 'Quantity', 'Unit Price'], produce())
+    return stats
+
+def generate_all(output_dir, rows, seed=0, catalogue_size=None, mismatch_rate=0.0, missing_rate=0.0, bad_cell_rate=0.0, kinds=('packing', 'price', 'duty')):
+    """Write a consistent set of synthetic files and return their paths and stats"""
+    os.makedirs(output_dir, exist_ok=True)
+    catalogue_size = catalogue_size or rows
+    results = {}
+    if 'price' in kinds:
+        path = os.path.join(output_dir, f'price_list_{catalogue_size}.xlsx')
+        results['price'] = (path, generate_price_list(path, catalogue_size, seed))
+    if 'duty' in kinds:
+        path = os.path.join(output_dir, f'duty_rates_{catalogue_size}.xlsx')
+        results['duty'] = (path, generate_duty_rates(path, catalogue_size, seed))
+    if 'packing' in kinds:
+        path = os.path.join(output_dir, f'packing_list_{rows}.xlsx')
+        results['packing'] = (path, generate_packing_list(
+            path, rows, seed, catalogue_size, mismatch_rate, missing_rate, bad_cell_rate
+        ))
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, help='Packing list lines; omit to write the templates')
+    parser.add_argument('--catalogue-size', type=int, help='Price list and duty table rows (default: --rows)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--mismatch-rate', type=float, default=0.05)
+    parser.add_argument('--missing-rate', type=float, default=0.01)
+    parser.add_argument('--bad-cell-rate', type=float, default=0.001)
+    parser.add_argument('--kind', choices=['packing', 'price', 'duty'], action='append',
+                        help='Only write these files (repeatable)')
+    parser.add_argument('--output-dir', default='sample_files')
+    args = parser.parse_args()
+
+    if args.rows is None:
+        write_templates(args.output_dir)
+        return
+
+    results = generate_all(
+        args.output_dir, args.rows, args.seed, args.catalogue_size,
+        args.mismatch_rate, args.missing_rate, args.bad_cell_rate,
+        kinds=args.kind or ('packing', 'price', 'duty')
+    )
+    for path, stats in results.values():
+        print(f"{path}: {', '.join(f'{key}={value}' for key, value in stats.items())}")
 
-# 创建示例文件夹
-if not os.path.exists('sample_files'):
-    os.makedirs('sample_files')
-
-# 价格列表数据
-price_data = {
-    'Item Code': ['A001', 'A002', 'A003', 'B001', 'B002'],
-    'Description': [
-        'Product A - Standard',
-        'Product A - Premium',
-        'Product A - Deluxe',
-        'Product B - Basic',
-        'Product B - Premium'
-    ],
-    'Unit Price (USD)': [100.50, 150.75, 200.25, 80.00, 120.00],
-    'Effective Date': ['2024-01-01', '2024-01-01', '2024-01-01', '2024-01-01', '2024-01-01'],
-    'Category': ['Category A', 'Category A', 'Category A', 'Category B', 'Category B']
-}
-
-# 创建价格列表 Excel 文件
-df_price = pd.DataFrame(price_data)
-df_price.to_excel('sample_files/price_list_template.xlsx', index=False, sheet_name='Price List')
-
-# 关税率数据
-duty_data = {
-    'HS Code': ['8471.30.00', '8471.41.00', '8471.49.00', '8471.50.00', '8471.60.00'],
-    'Description': [
-        'Portable computers',
-        'Processing units',
-        'System units',
-        'Processing units',
-        'Input/output units'
-    ],
-    'Duty Rate (%)': [0.00, 5.00, 7.50, 10.00, 2.50],
-    'VAT Rate (%)': [13.00, 13.00, 13.00, 13.00, 13.00],
-    'Notes': [
-        'Duty free for educational use',
-        'Standard rate applies',
-        'Special rate for assembled units',
-        'Higher rate for standalone units',
-        'Reduced rate for peripherals'
-    ]
-}
-
-# 创建关税率 Excel 文件
-df_duty = pd.DataFrame(duty_data)
-df_duty.to_excel('sample_files/duty_rates_template.xlsx', index=False, sheet_name='Duty Rates')
-
-# 装箱单数据 - 简化版本，确保符合file_parser.py的要求
-packing_list_data = {
-    'Item Code': ['A001', 'A002', 'B001', 'A003', 'B002'],
-    'Description': [
-        'Product A - Standard',
-        'Product A - Premium',
-        'Product B - Basic',
-        'Product A - Deluxe',
-        'Product B - Premium'
-    ],
-    'Quantity': [100, 50, 75, 25, 40],
-    'Unit Price': [100.50, 150.75, 80.00, 200.25, 120.00],  # 确保与价格列表匹配
-}
-
-# 创建装箱单 Excel 文件
-df_packing = pd.DataFrame(packing_list_data)
-
-# 创建一个 Excel writer 对象
-with pd.ExcelWriter('sample_files/packing_list_template.xlsx', engine='openpyxl') as writer:
-    # 写入主数据
-    df_packing.to_excel(writer, index=False, sheet_name='Packing List')
-    
-    # 获取工作表对象
-    worksheet = writer.sheets['Packing List']
-    
-    # 设置列宽
-    for column in worksheet.columns:
-        max_length = 0
-        column = [cell for cell in column]
-        for cell in column:
-            try:
-                if len(str(cell.value)) > max_length:
-                    max_length = len(str(cell.value))
-            except:
-                pass
-        adjusted_width = (max_length + 2)
-        worksheet.column_dimensions[column[0].column_letter].width = adjusted_width
-
-print("示例文件已创建在 'sample_files' 文件夹中：")
-print("1. price_list_template.xlsx")
-print("2. duty_rates_template.xlsx")
-print("3. packing_list_template.xlsx") 
\ No newline at end of file
+if __name__ == '__main__':
+    main()
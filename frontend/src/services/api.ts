@@ -1,8 +1,19 @@
 import axios, { AxiosInstance, AxiosResponse } from 'axios';
-import { getToken, removeToken } from '../utils/token';
+import { getToken, getRefreshToken, setToken, setRefreshToken, setUser, removeToken } from '../utils/token';
+
+// Random key for the Idempotency-Key header; crypto.randomUUID is missing outside secure contexts
+export function newIdempotencyKey(): string {
+  if (typeof crypto.randomUUID === 'function') {
+    return crypto.randomUUID();
+  }
+  return Array.from(crypto.getRandomValues(new Uint8Array(16)), (b) => b.toString(16).padStart(2, '0')).join('');
+}
+
+const NETWORK_RETRIES = 2;
 
 class ApiService {
   private api: AxiosInstance;
+  private refreshing: Promise<string> | null = null;
 
   constructor() {
     this.api = axios.create({
@@ -24,8 +35,30 @@ class ApiService {
     // Response interceptor to handle auth errors
     this.api.interceptors.response.use(
       (response) => response,
-      (error) => {
-        if (error.response?.status === 401) {
+      async (error) => {
+        const original = error.config;
+        const isAuthCall = original?.url?.startsWith('/auth/');
+
+        if (!error.response && original?.headers?.['Idempotency-Key'] && (original._networkRetries ?? 0) < NETWORK_RETRIES) {
+          // Lost connection: the server replays its stored response if the first attempt got through
+          original._networkRetries = (original._networkRetries ?? 0) + 1;
+          await new Promise((resolve) => setTimeout(resolve, 1000 * original._networkRetries));
+          return this.api(original);
+        }
+
+        if (error.response?.status === 401 && original && !original._retry && !isAuthCall && getRefreshToken()) {
+          // Access token expired: get a new one with the refresh token and replay the request once
+          original._retry = true;
+          try {
+            const token = await this.refreshAccessToken();
+            original.headers.Authorization = `Bearer ${token}`;
+            return this.api(original);
+          } catch {
+            // Fall through to the login redirect below
+          }
+        }
+
+        if (error.response?.status === 401 && !isAuthCall) {
           // Token expired or invalid
           removeToken();
           window.location.href = '/login';
@@ -35,6 +68,33 @@ class ApiService {
     );
   }
 
+  // Concurrent 401s share a single refresh request
+  private refreshAccessToken(): Promise<string> {
+    if (!this.refreshing) {
+      const refreshToken = getRefreshToken();
+      this.refreshing = axios
+        .post('/api/auth/refresh', { refresh_token: refreshToken })
+        .then((response) => {
+          setToken(response.data.token);
+          setRefreshToken(response.data.refresh_token);
+          setUser(response.data.user);
+          return response.data.token as string;
+        })
+        .catch((error) => {
+          // Another tab may have rotated the shared refresh token first
+          const latest = getRefreshToken();
+          if (latest && latest !== refreshToken && getToken()) {
+            return getToken() as string;
+          }
+          throw error;
+        })
+        .finally(() => {
+          this.refreshing = null;
+        });
+    }
+    return this.refreshing;
+  }
+
   // Generic request methods
   async get<T>(url: string, params?: any): Promise<T> {
     const { responseType, ...restParams } = params || {};
@@ -45,8 +105,9 @@ class ApiService {
     return response.data;
   }
 
-  async post<T>(url: string, data?: any): Promise<T> {
-    const response: AxiosResponse<T> = await this.api.post(url, data);
+  async post<T>(url: string, data?: any, idempotencyKey?: string): Promise<T> {
+    const headers = idempotencyKey ? { 'Idempotency-Key': idempotencyKey } : undefined;
+    const response: AxiosResponse<T> = await this.api.post(url, data, { headers });
     return response.data;
   }
 
@@ -61,13 +122,14 @@ class ApiService {
   }
 
   // File upload method
-  async uploadFile<T>(url: string, file: File, onProgress?: (progress: number) => void): Promise<T> {
+  async uploadFile<T>(url: string, file: File, onProgress?: (progress: number) => void, idempotencyKey?: string): Promise<T> {
     const formData = new FormData();
     formData.append('file', file);
 
     const response: AxiosResponse<T> = await this.api.post(url, formData, {
       headers: {
         'Content-Type': 'multipart/form-data',
+        ...(idempotencyKey ? { 'Idempotency-Key': idempotencyKey } : {}),
       },
       onUploadProgress: (progressEvent) => {
         if (onProgress && progressEvent.total) {
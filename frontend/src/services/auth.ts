@@ -1,5 +1,5 @@
-import apiService from './api';
-import { setToken, setUser, removeToken, getUser, User } from '../utils/token';
+import apiService, { newIdempotencyKey } from './api';
+import { setToken, setRefreshToken, getRefreshToken, setUser, removeToken, getUser, User } from '../utils/token';
 
 export interface LoginRequest {
   username: string;
@@ -14,6 +14,7 @@ export interface RegisterRequest {
 export interface AuthResponse {
   message: string;
   token: string;
+  refresh_token: string;
   user: User;
 }
 
@@ -99,6 +100,7 @@ class AuthService {
       
       // Store token and user data
       setToken(response.token);
+      setRefreshToken(response.refresh_token);
       setUser(response.user);
       
       return response;
@@ -113,6 +115,7 @@ class AuthService {
       
       // Store token and user data
       setToken(response.token);
+      setRefreshToken(response.refresh_token);
       setUser(response.user);
       
       return response;
@@ -122,6 +125,11 @@ class AuthService {
   }
 
   logout(): void {
+    const refreshToken = getRefreshToken();
+    if (refreshToken) {
+      // Best effort: revoke the refresh token so it cannot be reused
+      apiService.post('/auth/logout', { refresh_token: refreshToken }).catch(() => undefined);
+    }
     removeToken();
     window.location.href = '/login';
   }
@@ -129,7 +137,7 @@ class AuthService {
   // User operations
   async uploadPackingList(file: File, onProgress?: (progress: number) => void): Promise<UploadResponse> {
     try {
-      return await apiService.uploadFile<UploadResponse>('/user/upload/packing-list', file, onProgress);
+      return await apiService.uploadFile<UploadResponse>('/user/upload/packing-list', file, onProgress, newIdempotencyKey());
     } catch (error: any) {
       throw new Error(error.response?.data?.error || 'Upload failed');
     }
@@ -187,7 +195,7 @@ class AuthService {
       const data: any = { action };
       if (comment) data.comment = comment;
       
-      return await apiService.post(`/admin/review/${uploadId}`, data);
+      return await apiService.post(`/admin/review/${uploadId}`, data, newIdempotencyKey());
     } catch (error: any) {
       throw new Error(error.response?.data?.error || 'Review failed');
     }
@@ -1,5 +1,6 @@
 export const TOKEN_KEY = 'packing_list_token';
 export const USER_KEY = 'packing_list_user';
+export const REFRESH_TOKEN_KEY = 'packing_list_refresh_token';
 
 export interface User {
   id: number;
@@ -16,8 +17,17 @@ export const getToken = (): string | null => {
   return localStorage.getItem(TOKEN_KEY);
 };
 
+export const setRefreshToken = (token: string): void => {
+  localStorage.setItem(REFRESH_TOKEN_KEY, token);
+};
+
+export const getRefreshToken = (): string | null => {
+  return localStorage.getItem(REFRESH_TOKEN_KEY);
+};
+
 export const removeToken = (): void => {
   localStorage.removeItem(TOKEN_KEY);
+  localStorage.removeItem(REFRESH_TOKEN_KEY);
   localStorage.removeItem(USER_KEY);
 };
 